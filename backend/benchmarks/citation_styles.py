@@ -0,0 +1,57 @@
+"""
+Throughput benchmark for the compiled citation style renderers.
+
+Renders a seeded set of randomized CrossRef-like records (0-5 authors,
+missing and empty fields, websites and journal articles) in each style
+and in all styles at once, and reports records per second against the
+100k records/s target.
+
+    python backend/benchmarks/citation_styles.py [records]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.citation_styles import STYLES, render_styles  # noqa: E402
+
+TARGET_RECORDS_PER_SECOND = 100_000
+
+
+def random_record(rng: random.Random) -> dict:
+    def maybe(value):
+        return rng.choice([None, "", value])
+
+    authors = [
+        {"given": rng.choice(["", "Ann", "Ann Marie", "J R R", None]), "family": rng.choice(["Smith", "", None, "Lee"])}
+        for _ in range(rng.randint(0, 5))
+    ]
+    return {
+        "title": maybe("A Study of Sleep and Memory"), "authors": authors, "year": maybe(2020),
+        "journal": maybe("Nature"), "volume": maybe("12"), "issue": maybe(3), "pages": maybe("1-9"),
+        "doi": maybe("10.1000/xyz"), "url": maybe("https://example.org/a"), "site_name": maybe("Example"),
+        "access_date": maybe("2026-01-01"), "type": rng.choice(["website", "journal-article", None]),
+    }
+
+
+def records_per_second(records: list, styles: list) -> float:
+    started = time.perf_counter()
+    for record in records:
+        render_styles(record, styles)
+    return len(records) / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = random.Random(1)
+    records = [random_record(rng) for _ in range(count)]
+    render_styles(records[0], list(STYLES))  # compile the renderers outside the timing
+
+    print(f"{count} records, target {TARGET_RECORDS_PER_SECOND:,} records/s")
+    for styles in [[style] for style in STYLES] + [list(STYLES)]:
+        rate = records_per_second(records, styles)
+        verdict = "ok" if rate >= TARGET_RECORDS_PER_SECOND else "BELOW TARGET"
+        print(f"{'+'.join(styles):20} {rate:12,.0f} records/s  {verdict}")
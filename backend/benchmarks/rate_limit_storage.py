@@ -0,0 +1,74 @@
+"""
+Rate limiter storage benchmark.
+
+For each storage (per-process memory:// and the shared sqlite:// file)
+and strategy (fixed-window, sliding-window-counter):
+
+- per-request overhead: microseconds per limiter hit in one process,
+  spread over 50 client addresses
+- shared limit: four processes hit one key 100 times each against a
+  100/minute limit; a shared, atomic store allows exactly 100 in total,
+  memory:// allows 100 per process
+
+    python backend/benchmarks/rate_limit_storage.py [hits]
+
+tests/test_limiter_storage.py checks the shared limit on sqlite://.
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import limiter_storage  # noqa: E402,F401  registers the sqlite:// storage scheme
+from limits import parse  # noqa: E402
+from limits.storage import storage_from_string  # noqa: E402
+from limits.strategies import STRATEGIES  # noqa: E402
+
+STRATEGY_NAMES = ("fixed-window", "sliding-window-counter")
+PROCESSES = 4
+LIMIT = 100
+
+
+def hit_many(uri: str, strategy: str, hits: int, results):
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = parse(f"{LIMIT}/minute")
+    results.put(sum(limiter.hit(item, "203.0.113.1") for _ in range(hits)))
+
+
+def allowed_across_processes(uri: str, strategy: str, processes: int = PROCESSES, hits: int = LIMIT) -> int:
+    """Total hits allowed when `processes` workers each make `hits` hits on one key at once."""
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=hit_many, args=(uri, strategy, hits, results)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(results.get() for _ in workers)
+
+
+def microseconds_per_hit(uri: str, strategy: str, hits: int) -> float:
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = parse("1000000/minute")
+    started = time.perf_counter()
+    for i in range(hits):
+        limiter.hit(item, f"203.0.113.{i % 50}")
+    return (time.perf_counter() - started) / hits * 1e6
+
+
+if __name__ == "__main__":
+    hits = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_uri = f"sqlite:///{os.path.join(directory, 'ratelimit.db')}"
+        print(f"{'storage':10} {'strategy':24} {'us/hit':>8} {'allowed':>14}")
+        for uri in ("memory://", sqlite_uri):
+            for strategy in STRATEGY_NAMES:
+                storage_from_string(uri).reset()
+                overhead = microseconds_per_hit(uri, strategy, hits)
+                storage_from_string(uri).reset()
+                allowed = allowed_across_processes(uri, strategy)
+                print(f"{uri.split(':')[0]:10} {strategy:24} {overhead:8.1f} "
+                      f"{allowed:>6}/{PROCESSES * LIMIT} (limit {LIMIT})")
@@ -0,0 +1,114 @@
+"""
+Placement-check microbenchmark for the timetable solver.
+
+Compares ScheduleState (per-day bitmasks, counted load and course days
+kept up to date by place/remove) with the list-of-lists grid the old
+randomized backtracking scanned in is_safe on every candidate slot. Each
+placement is one check plus, when it fits, a place and the undo, which
+is what a search node costs.
+
+    python backend/benchmarks/timetable_placements.py [placements]
+
+prints placements per second for both at 60 and 15 minute slots.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.timetable_solver import ScheduleState, Session, TimetableProblem  # noqa: E402
+
+NUM_DAYS = 5
+MAX_PER_DAY_HOURS = 8
+
+
+class GridState:
+    """The old representation: one cell per slot holding a course name, None or FREE_TIME."""
+
+    def __init__(self, problem: TimetableProblem):
+        self.problem = problem
+        self.grid = [["FREE_TIME" if slot in problem.blocked[d] else None for slot in range(problem.num_slots)]
+                     for d in range(problem.num_days)]
+
+    def fits(self, session: Session, day: int, start: int) -> bool:
+        # Same checks, in the same order, as the old is_safe
+        num_slots = self.problem.num_slots
+        if start + session.duration > num_slots:
+            return False
+        for slot in range(start, start + session.duration):
+            if self.grid[day][slot] is not None:
+                return False
+        if day not in session.allowed_days:
+            return False
+        if self.problem.one_per_day:
+            for slot in range(num_slots):
+                if self.grid[day][slot] == session.name:
+                    return False
+        if self.problem.max_per_day is not None:
+            current = sum(1 for slot in range(num_slots)
+                          if self.grid[day][slot] is not None and self.grid[day][slot] != "FREE_TIME")
+            if current + session.duration > self.problem.max_per_day:
+                return False
+        return True
+
+    def place(self, session: Session, day: int, start: int):
+        for slot in range(start, start + session.duration):
+            self.grid[day][slot] = session.name
+
+    def remove(self, session: Session, day: int, start: int):
+        for slot in range(start, start + session.duration):
+            self.grid[day][slot] = None
+
+
+def build_problem(slots_per_hour: int, seed: int = 1) -> TimetableProblem:
+    """A 08:00-18:00 week with a blocked lunch hour and twelve 1-3 hour sessions."""
+    rng = random.Random(seed)
+    num_slots = 10 * slots_per_hour
+    sessions = [Session(i, f"C{i % 6}", rng.choice([1, 2, 3]) * slots_per_hour, list(range(NUM_DAYS)))
+                for i in range(12)]
+    lunch = set(range(4 * slots_per_hour, 5 * slots_per_hour))
+    return TimetableProblem(NUM_DAYS, num_slots, sessions, [set(lunch) for _ in range(NUM_DAYS)], [0] * NUM_DAYS,
+                            max_per_day=MAX_PER_DAY_HOURS * slots_per_hour, one_per_day=True)
+
+
+def half_filled(problem: TimetableProblem):
+    """ScheduleState and GridState holding the same first-fit placement of half the sessions."""
+    state, grid = ScheduleState(problem), GridState(problem)
+    for session in problem.sessions[:len(problem.sessions) // 2]:
+        for day in range(problem.num_days):
+            start = next((s for s in range(problem.num_slots) if state.fits(session, day, s)), None)
+            if start is not None:
+                state.place(session, day, start)
+                grid.place(session, day, start)
+                break
+    return state, grid
+
+
+def random_probes(problem: TimetableProblem, count: int, seed: int = 2):
+    rng = random.Random(seed)
+    return [(rng.choice(problem.sessions), rng.randrange(problem.num_days), rng.randrange(problem.num_slots))
+            for _ in range(count)]
+
+
+def placements_per_second(state, probes) -> float:
+    started = time.perf_counter()
+    for session, day, start in probes:
+        if state.fits(session, day, start):
+            state.place(session, day, start)
+            state.remove(session, day, start)
+    return len(probes) / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{'slots':>12} {'grid is_safe':>14} {'ScheduleState':>14} {'speedup':>8}")
+    for minutes in (60, 15):
+        problem = build_problem(60 // minutes)
+        state, grid = half_filled(problem)
+        probes = random_probes(problem, count)
+        old = placements_per_second(grid, probes)
+        new = placements_per_second(state, probes)
+        print(f"{str(minutes) + ' min':>12} {old / 1000:12.0f}k/s {new / 1000:12.0f}k/s {new / old:7.1f}x")
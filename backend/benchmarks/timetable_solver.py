@@ -0,0 +1,144 @@
+"""
+Benchmark corpus for the timetable solver.
+
+Hard cases the old randomized backtracking could not finish within 20s
+(over-capacity weeks, courses split into more sessions than days, tight
+caps around blocked lunches), plus feasible shapes for comparison. Each
+case records whether a complete timetable exists. All times are whole
+hours, so the outcome is the same at every slot length; each case is run
+at 60, 30, 15 and 5 minute slots to show how the search scales with grid
+resolution.
+
+    python backend/benchmarks/timetable_solver.py [repeats]
+
+prints the median solve time per case and resolution, then the search
+nodes CSPSolver expands on the chunked cases with neither, either or both
+of twin ordering (symmetry breaking) and nogood recording;
+tests/test_timetable_corpus.py checks the outcomes and a time bound.
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.auto_timetable import (  # noqa: E402
+    CourseRequest, FixedEvent, FreePeriod, GenerateRequest, Preferences, TimeConstraints, build_problem,
+    generate_timetable, time_str_to_minutes,
+)
+from modules.timetable_solver import CSPSolver  # noqa: E402
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+SLOT_MINUTES = (60, 30, 15, 5)
+
+# name -> (expected success, request arguments)
+CASES = {
+    "feasible-8x3h": (True, dict(
+        courses=[(f"C{i}", 3, []) for i in range(8)])),
+    "over-capacity-12x3h-cap7": (False, dict(
+        courses=[(f"C{i}", 3, []) for i in range(12)], max_hours_per_day=7)),
+    "tight-exact-fit-cap6": (True, dict(
+        courses=[(f"C{i}", 3, []) for i in range(10)], max_hours_per_day=6)),
+    "split-one-per-day": (True, dict(
+        courses=[("Math", 10, []), ("Phys", 8, []), ("Chem", 6, []), ("Bio", 4, [])],
+        max_session_duration=2, max_hours_per_day=6)),
+    "split-six-sessions-five-days": (False, dict(
+        courses=[("Math", 12, []), ("Phys", 4, [])], max_session_duration=2)),
+    "preferred-days-clash": (False, dict(
+        courses=[(f"C{i}", 4, ["Monday", "Tuesday"]) for i in range(6)], end="16:00")),
+    "exact-fill-mixed": (True, dict(
+        courses=[(f"A{i}", 5, []) for i in range(5)] + [(f"B{i}", 2, []) for i in range(5)]
+        + [(f"C{i}", 1, []) for i in range(5)], end="16:00")),
+    "blocked-lunch-feasible": (True, dict(
+        courses=[(f"C{i}", 2, []) for i in range(15)],
+        free=[(d, "12:00", "13:00") for d in DAYS], fixed=[("Lab", d, "08:00", "10:00") for d in DAYS],
+        max_hours_per_day=8)),
+    "blocked-lunch-over-cap": (False, dict(
+        courses=[(f"C{i}", 2, []) for i in range(18)],
+        free=[(d, "12:00", "13:00") for d in DAYS], fixed=[("Lab", d, "08:00", "10:00") for d in DAYS],
+        max_hours_per_day=6)),
+    # Courses split into 2h chunks, one per day, where no capacity count
+    # shows the conflict; only search does. Without twin ordering and
+    # nogoods these took the old solver past its 20s limit.
+    "chunked-wed-tight": (True, dict(
+        courses=[(f"K{i}", 10, []) for i in range(4)], max_session_duration=2,
+        fixed=[("Gym", "Wednesday", "09:00", "10:00")])),
+    "chunked-wed-short-a-block": (False, dict(
+        courses=[(f"K{i}", 10, []) for i in range(4)], max_session_duration=2,
+        fixed=[("Gym", "Wednesday", "09:00", "10:00"), ("Club", "Wednesday", "13:00", "14:00")])),
+    "chunked-wed-fragmented": (False, dict(
+        courses=[(f"K{i}", 10, []) for i in range(3)], max_session_duration=2,
+        fixed=[("E1", "Wednesday", "09:00", "10:00"), ("E2", "Wednesday", "13:00", "14:00"),
+               ("E3", "Wednesday", "16:00", "17:00")])),
+}
+
+ABLATION_SECONDS = 20.0
+CHUNKED_CASES = [name for name in CASES if name.startswith("chunked-")]
+
+# label -> CSPSolver switches
+ABLATIONS = {
+    "baseline": dict(break_symmetry=False, learn_nogoods=False),
+    "symmetry only": dict(break_symmetry=True, learn_nogoods=False),
+    "nogoods only": dict(break_symmetry=False, learn_nogoods=True),
+    "both": dict(break_symmetry=True, learn_nogoods=True),
+}
+
+
+def build_request(courses, start="08:00", end="18:00", free=(), fixed=(), slot_minutes=None,
+                  **preferences) -> GenerateRequest:
+    return GenerateRequest(
+        courses=[CourseRequest(name=name, duration=hours, preferred_days=days) for name, hours, days in courses],
+        constraints=TimeConstraints(
+            start_time=start, end_time=end,
+            free_periods=[FreePeriod(day=day, start_time=a, end_time=b) for day, a, b in free],
+        ),
+        fixed_events=[FixedEvent(name=name, day=day, start_time=a, end_time=b) for name, day, a, b in fixed],
+        preferences=Preferences(**preferences),
+        seed=1,
+        slot_minutes=slot_minutes,
+    )
+
+
+def solve_case(name: str, slot_minutes: int = None):
+    """Solve one corpus case, at the given slot length if any; returns (seconds, response)."""
+    _, arguments = CASES[name]
+    request = build_request(slot_minutes=slot_minutes, **arguments)
+    started = time.perf_counter()
+    response = generate_timetable(request)
+    return time.perf_counter() - started, response
+
+
+def count_nodes(name: str, seconds: float, **switches):
+    """Search nodes CSPSolver expands on a case at 60 minute slots; returns (nodes, outcome)."""
+    _, arguments = CASES[name]
+    request = build_request(**arguments)
+    day_start = time_str_to_minutes(request.constraints.start_time)
+    num_slots = (time_str_to_minutes(request.constraints.end_time) - day_start) // 60
+    problem, _ = build_problem(request, day_start, num_slots, 60)
+    solver = CSPSolver(problem, seed=1, deadline=time.monotonic() + seconds, **switches)
+    solved = solver.solve() is not None
+    return solver.nodes, "timeout" if solver.timed_out else ("sat" if solved else "unsat")
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'case':32} {'expected':>9} " + " ".join(f"{str(m) + ' min':>10}" for m in SLOT_MINUTES))
+    for name, (expected, _) in CASES.items():
+        cells = []
+        for minutes in SLOT_MINUTES:
+            timings = []
+            for _ in range(repeats):
+                elapsed, response = solve_case(name, minutes)
+                timings.append(elapsed)
+            mark = "" if response.success is expected else "!"
+            cells.append(f"{statistics.median(timings) * 1000:7.1f}ms{mark}")
+        print(f"{name:32} {str(expected):>9} " + " ".join(f"{cell:>10}" for cell in cells))
+
+    print(f"\nsearch nodes, stopping after {ABLATION_SECONDS:.0f}s")
+    print(f"{'case':32} " + " ".join(f"{label:>20}" for label in ABLATIONS))
+    for name in CHUNKED_CASES:
+        cells = [f"{nodes} {outcome}" for nodes, outcome in
+                 (count_nodes(name, ABLATION_SECONDS, **switches) for switches in ABLATIONS.values())]
+        print(f"{name:32} " + " ".join(f"{cell:>20}" for cell in cells))
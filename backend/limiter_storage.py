@@ -0,0 +1,155 @@
+"""
+SQLite storage backend for the rate limiter.
+
+Registers the sqlite:// scheme with the limits library, so every uvicorn
+worker on a host counts requests in one shared file instead of its own
+memory. Each sliding-window check reads both window counters and
+increments the current one inside a single BEGIN IMMEDIATE transaction,
+which makes it atomic across processes. Use redis:// instead when
+replicas run on more than one host.
+
+    sqlite:///backend/data/ratelimit.db   (relative path)
+    sqlite:////var/run/ratelimit.db       (absolute path)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+# Expired counters are deleted at most this often per process
+PURGE_INTERVAL_SECONDS = 60
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit counters in a SQLite table, shared by processes on one host."""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        path = uri[len("sqlite://"):]
+        self.db_path = path[1:] if path.startswith("/") else path
+        self.lock = threading.Lock()
+        self.conn = None
+        self.pid = None
+        self.next_purge = 0.0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def connection(self) -> sqlite3.Connection:
+        # A connection must not cross a fork, so each worker opens its own
+        if self.conn is None or self.pid != os.getpid():
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_expiry ON rate_limits (expires_at)")
+            self.conn, self.pid = conn, os.getpid()
+        return self.conn
+
+    def _get(self, conn: sqlite3.Connection, key: str, now: float) -> int:
+        row = conn.execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _incr(self, conn: sqlite3.Connection, key: str, expiry: float, amount: int, now: float) -> int:
+        # An expired counter restarts from `amount` with a fresh expiry
+        return conn.execute(
+            "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END, "
+            "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END "
+            "RETURNING count",
+            (key, amount, now + expiry, now, now),
+        ).fetchone()[0]
+
+    def _purge(self, conn: sqlite3.Connection, now: float):
+        if now >= self.next_purge:
+            self.next_purge = now + PURGE_INTERVAL_SECONDS
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        with self.lock:
+            return self._incr(self.connection(), key, expiry, amount, time.time())
+
+    def get(self, key: str) -> int:
+        with self.lock:
+            return self._get(self.connection(), key, time.time())
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        with self.lock:
+            row = self.connection().execute(
+                "SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        return row[0] if row else now
+
+    def check(self) -> bool:
+        try:
+            with self.lock:
+                self.connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        with self.lock:
+            return self.connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str) -> None:
+        with self.lock:
+            self.connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def _sliding_window(self, conn: sqlite3.Connection, key: str, expiry: int, now: float):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        # Same TTL arithmetic as limits' MemoryStorage
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        with self.lock:
+            conn = self.connection()
+            self._purge(conn, now)
+            # IMMEDIATE takes the write lock up front, so no other worker can
+            # hit the same counters between the check and the increment
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+                allowed = floor(previous_count * previous_ttl / expiry + current_count) + amount <= limit
+                if allowed:
+                    _, current_key = self.sliding_window_keys(key, expiry, now)
+                    self._incr(conn, current_key, 2 * expiry, amount, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return allowed
+
+    def get_sliding_window(self, key: str, expiry: int):
+        with self.lock:
+            return self._sliding_window(self.connection(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        with self.lock:
+            self.connection().execute("DELETE FROM rate_limits WHERE key IN (?, ?)", (previous_key, current_key))
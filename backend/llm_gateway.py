@@ -0,0 +1,206 @@
+"""
+Shared async gateway for LLM calls through OpenRouter.
+
+All AI endpoints go through one pooled AsyncOpenAI client so completions
+never block the event loop. Each call gets a timeout, retries with
+jittered exponential backoff on 429/5xx and connection errors, and a
+per-model circuit breaker that fails fast while a model keeps erroring.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError
+
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+DEFAULT_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Circuit breaker: open after this many consecutive failures, for this long
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_client: Optional[AsyncOpenAI] = None
+_client_key: Optional[str] = None
+
+
+def get_client() -> Optional[AsyncOpenAI]:
+    """Return the shared OpenRouter client, or None if no API key is configured."""
+    global _client, _client_key
+    api_key = os.getenv("OPENROUTER_API_KEY", "")
+    if not api_key:
+        return None
+    if _client is None or _client_key != api_key:
+        _client = AsyncOpenAI(
+            base_url=OPENROUTER_BASE_URL,
+            api_key=api_key,
+            max_retries=0,  # retries are handled here so they share the breaker
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=DEFAULT_TIMEOUT,
+            ),
+        )
+        _client_key = api_key
+    return _client
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial call."""
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.reset_seconds or self.trial_in_flight:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half-open"
+
+
+_breakers = {}
+
+
+def get_breaker(model: str) -> CircuitBreaker:
+    if model not in _breakers:
+        _breakers[model] = CircuitBreaker()
+    return _breakers[model]
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After when the server sends one."""
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+async def chat_completion(
+    messages: list,
+    model: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    **kwargs,
+):
+    """
+    Run a chat completion through the shared client.
+
+    Raises HTTPException: 500 if no API key is configured, 503 while the
+    model's circuit is open or after retries are exhausted, 504 on timeout.
+    """
+    client = get_client()
+    if client is None:
+        raise HTTPException(
+            status_code=500,
+            detail="OPENROUTER_API_KEY environment variable is not set. Please configure your API key."
+        )
+
+    breaker = get_breaker(model)
+    if not breaker.allow():
+        raise HTTPException(
+            status_code=503,
+            detail="The AI service is temporarily unavailable. Please try again shortly."
+        )
+
+    attempt = 0
+    while True:
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=timeout,
+                **kwargs,
+            )
+        except Exception as e:
+            if is_retryable(e) and attempt < max_retries:
+                await asyncio.sleep(backoff_delay(attempt, e))
+                attempt += 1
+                continue
+            if is_retryable(e):
+                breaker.record_failure()
+                if isinstance(e, APITimeoutError):
+                    raise HTTPException(status_code=504, detail="The AI service took too long to respond.")
+                raise HTTPException(
+                    status_code=503,
+                    detail="The AI service is temporarily unavailable. Please try again shortly."
+                )
+            # Client-side errors (bad request, auth) say nothing about model health
+            breaker.trial_in_flight = False
+            raise
+        except asyncio.CancelledError:
+            breaker.trial_in_flight = False
+            raise
+
+        breaker.record_success()
+        return response
+
+
+async def stream_chat_completion(
+    messages: list,
+    model: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    **kwargs,
+):
+    """
+    Stream a chat completion, yielding content deltas as they arrive.
+
+    Opening the stream is retried like chat_completion; once tokens start
+    flowing errors propagate. Closing the generator (e.g. on client
+    disconnect) closes the upstream HTTP response.
+    """
+    stream = await chat_completion(
+        messages, model, timeout=timeout, max_retries=max_retries, stream=True, **kwargs
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+from typing import Optional
+
+from fastapi import FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
@@ -10,9 +12,10 @@ from modules.pdf_merge_split import router as pdf_merge_split_router
 from modules.pdf_compressor import router as pdf_compressor_router
 from modules.paraphraser import router as paraphraser_router
 from modules.image_to_pdf import router as image_to_pdf_router
-from modules.feedback import router as feedback_router
+from modules.feedback import router as feedback_router, check_admin_token
 from modules.citation_generator import router as citation_router
 from modules.auto_timetable import router as auto_timetable_router
+from model_router import metrics as llm_routing_metrics
 
 app = FastAPI(
     title="StuDenTools API",
@@ -36,6 +39,9 @@ app.add_middleware(
         "X-Reduction-Percent",
         "X-Original-Size-Formatted",
         "X-Compressed-Size-Formatted",
+        "X-Cohort-GPA",
+        "X-Cohort-Students",
+        "X-Cohort-Total-Credits",
     ],
 )
 
@@ -58,3 +64,10 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+
+@app.get("/metrics/llm")
+async def llm_metrics(x_admin_token: Optional[str] = Header(None)):
+    """Per-model latency percentiles, error rates and routing/hedging counters (admin only)."""
+    check_admin_token(x_admin_token)
+    return llm_routing_metrics()
+
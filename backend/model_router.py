@@ -0,0 +1,242 @@
+"""
+Latency-aware routing across several OpenRouter models.
+
+Free-tier models have unpredictable tail latency, so each AI endpoint can
+be configured with a list of interchangeable models. The router keeps a
+rolling window of latency and errors per model, sends each request to the
+fastest healthy model, and if that model has not answered by its own p95
+latency, fires a hedged duplicate at the next-best model and uses
+whichever answers first. Streams report time to first token in a
+separate window, so it never mixes with full-completion latency.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+import llm_gateway
+
+WINDOW_SIZE = 100
+MIN_SAMPLES = 5
+MAX_ERROR_RATE = 0.5
+HEDGING_ENABLED = os.getenv("LLM_HEDGING", "true").lower() != "false"
+# Never hedge sooner than this, so fast models are not doubled up needlessly
+MIN_HEDGE_DELAY = 0.5
+
+
+def models_from_env(name: str, default: str) -> List[str]:
+    """Read a comma-separated model list from the environment."""
+    models = [model.strip() for model in os.getenv(name, default).split(",") if model.strip()]
+    return models or [default]
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ModelStats:
+    """Rolling latency/error window and routing counters for one model."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW_SIZE)  # (latency_seconds, succeeded)
+        self.first_token = deque(maxlen=WINDOW_SIZE)  # stream time to first token, seconds
+        self.requests = 0
+        self.primary_picks = 0
+        self.hedges_sent = 0
+        self.wins = 0
+
+    def record(self, latency: float, succeeded: bool):
+        self.samples.append((latency, succeeded))
+
+    def record_first_token(self, latency: float):
+        self.first_token.append(latency)
+
+    def latencies(self) -> List[float]:
+        return [latency for latency, succeeded in self.samples if succeeded]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, succeeded in self.samples if not succeeded) / len(self.samples)
+
+    @property
+    def p50(self) -> Optional[float]:
+        return percentile(self.latencies(), 0.5)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return percentile(self.latencies(), 0.95)
+
+    def healthy(self, model: str) -> bool:
+        if llm_gateway.get_breaker(model).state == "open":
+            return False
+        return len(self.samples) < MIN_SAMPLES or self.error_rate <= MAX_ERROR_RATE
+
+    def snapshot(self, model: str) -> dict:
+        p50, p95 = self.p50, self.p95
+        ttft = percentile(list(self.first_token), 0.5)
+        return {
+            "samples": len(self.samples),
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "ttft_p50_ms": round(ttft * 1000) if ttft is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "healthy": self.healthy(model),
+            "circuit": llm_gateway.get_breaker(model).state,
+            "requests": self.requests,
+            "primary_picks": self.primary_picks,
+            "hedges_sent": self.hedges_sent,
+            "wins": self.wins,
+        }
+
+
+_stats = {}
+
+
+def get_stats(model: str) -> ModelStats:
+    if model not in _stats:
+        _stats[model] = ModelStats()
+    return _stats[model]
+
+
+def rank_models(models: List[str]) -> List[str]:
+    """
+    Order models for a request: healthy before unhealthy; among healthy ones,
+    models still warming up (too few samples) first, then by p50 latency.
+    Unhealthy models are kept as a last resort.
+    """
+    def sort_key(indexed):
+        index, model = indexed
+        stats = get_stats(model)
+        if not stats.healthy(model):
+            return (2, stats.error_rate, index)
+        if len(stats.samples) < MIN_SAMPLES:
+            return (0, 0.0, index)
+        return (1, stats.p50 or 0.0, index)
+
+    return [model for _, model in sorted(enumerate(models), key=sort_key)]
+
+
+async def _timed_completion(model: str, messages: list, **kwargs):
+    stats = get_stats(model)
+    stats.requests += 1
+    started = time.monotonic()
+    try:
+        response = await llm_gateway.chat_completion(messages, model, **kwargs)
+    except asyncio.CancelledError:
+        # Lost a hedge race (or the client left). The elapsed time is only a
+        # lower bound on this model's latency, but once it reaches the model's
+        # median it is still evidence of slowness; recording it lets a model
+        # that has turned slow drop in the ranking instead of being picked and
+        # hedged on every request. Shorter lower bounds say nothing and are skipped.
+        elapsed = time.monotonic() - started
+        if stats.p50 is not None and elapsed >= stats.p50:
+            stats.record(elapsed, True)
+        raise
+    except Exception:
+        stats.record(time.monotonic() - started, False)
+        raise
+    stats.record(time.monotonic() - started, True)
+    return response
+
+
+async def chat_completion(messages: list, models: List[str], **kwargs):
+    """
+    Run a chat completion on the best of `models`, hedging to the runner-up
+    once the primary exceeds its p95 latency. Errors from one model fall
+    through to the next; the last error is raised if every model fails.
+    """
+    ranked = rank_models(models)
+    primary = ranked[0]
+    get_stats(primary).primary_picks += 1
+
+    pending = {asyncio.create_task(_timed_completion(primary, messages, **kwargs)): primary}
+    remaining = ranked[1:]
+    last_error = None
+
+    primary_stats = get_stats(primary)
+    hedge_delay = None
+    if HEDGING_ENABLED and remaining and len(primary_stats.latencies()) >= MIN_SAMPLES:
+        hedge_delay = max(primary_stats.p95, MIN_HEDGE_DELAY)
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                hedge_delay = None
+                if not remaining:
+                    continue
+                # Primary is slower than its p95: hedge once with the next model
+                hedge_model = remaining.pop(0)
+                get_stats(hedge_model).hedges_sent += 1
+                pending[asyncio.create_task(_timed_completion(hedge_model, messages, **kwargs))] = hedge_model
+                continue
+
+            for task in done:
+                model = pending.pop(task)
+                error = task.exception()
+                if error is None:
+                    get_stats(model).wins += 1
+                    return task.result()
+                last_error = error
+
+            if not pending and remaining:
+                # Every in-flight attempt failed: fall through to the next model
+                fallback = remaining.pop(0)
+                pending[asyncio.create_task(_timed_completion(fallback, messages, **kwargs))] = fallback
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if last_error is not None:
+        raise last_error
+    raise HTTPException(status_code=503, detail="No AI model is available. Please try again shortly.")
+
+
+async def stream_chat_completion(messages: list, models: List[str], **kwargs):
+    """
+    Stream from the best-ranked model. Streams are not hedged (tokens from two
+    models cannot be mixed). Time to first token goes into its own window,
+    kept out of ranking and hedge delays; failures to open the stream are
+    counted by the gateway's circuit breaker.
+    """
+    model = rank_models(models)[0]
+    stats = get_stats(model)
+    stats.primary_picks += 1
+    stats.requests += 1
+    started = time.monotonic()
+    first_token = True
+    upstream = llm_gateway.stream_chat_completion(messages, model, **kwargs)
+    try:
+        async for token in upstream:
+            if first_token:
+                stats.record_first_token(time.monotonic() - started)
+                first_token = False
+            yield token
+        stats.wins += 1
+    finally:
+        await upstream.aclose()
+
+
+def metrics() -> dict:
+    """Per-model routing metrics for every model that has been configured or used."""
+    return {
+        "hedging_enabled": HEDGING_ENABLED,
+        "models": {model: stats.snapshot(model) for model, stats in _stats.items()},
+    }
+
+
+def register_models(models: List[str]):
+    """Make configured models show up in metrics before their first request."""
+    for model in models:
+        get_stats(model)
@@ -1,39 +1,74 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
-import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import shutil
+import tempfile
+import time
+
+from openpyxl import Workbook
+
+from modules.spreadsheets import iter_records, sheet_format
+from modules.timetable_solver import (
+    OPTIMIZE_WORKERS, CSPSolver, Conflict, Objective, Session, TimetableProblem, analyze, optimize, repair,
+)
+
+# Upper bound on solver time per request, so one hard input cannot hold a worker
+MAX_TIME_BUDGET_MS = int(os.getenv("TIMETABLE_MAX_TIME_BUDGET_MS", "10000"))
+# Optimization always runs until its deadline, so it gets a shorter default
+OPTIMIZE_TIME_BUDGET_MS = int(os.getenv("TIMETABLE_OPTIMIZE_TIME_BUDGET_MS", "2000"))
+# Bulk uploads: solver time per student, for the whole file, and students per file
+BULK_TIME_BUDGET_MS = int(os.getenv("TIMETABLE_BULK_TIME_BUDGET_MS", "2000"))
+BULK_TOTAL_TIME_BUDGET_MS = int(os.getenv("TIMETABLE_BULK_TOTAL_TIME_BUDGET_MS", "120000"))
+MAX_BULK_STUDENTS = int(os.getenv("TIMETABLE_MAX_BULK_STUDENTS", "1000"))
+# Bulk uploads get their own pool so they never queue ahead of single requests
+BULK_WORKERS = int(os.getenv("TIMETABLE_BULK_WORKERS", str(max(1, OPTIMIZE_WORKERS // 2))))
+
+BULK_COLUMNS = ("student", "course", "duration")
+BULK_OPTIONAL_COLUMNS = ("preferred_days",)
 
 router = APIRouter(
     prefix="/auto-timetable",
     tags=["Auto Timetable"]
 )
 
+# Rate limiting
+from rate_limiter import limiter, RATE_LIMITS
+
+# 'HH:MM' (or 'H:MM'), checked before any time reaches time_str_to_minutes
+TIME_PATTERN = r"^\d{1,2}:[0-5]\d$"
+
 class CourseRequest(BaseModel):
     name: str
-    duration: int  # in hours
+    duration: int = Field(..., gt=0, description="Hours per week")
     preferred_days: Optional[List[str]] = []
 
 class FreePeriod(BaseModel):
     day: str
-    start_time: str
-    end_time: str
+    start_time: str = Field(..., pattern=TIME_PATTERN)
+    end_time: str = Field(..., pattern=TIME_PATTERN)
 
 class FixedEvent(BaseModel):
     name: str
     day: str
-    start_time: str
-    end_time: str
+    start_time: str = Field(..., pattern=TIME_PATTERN)
+    end_time: str = Field(..., pattern=TIME_PATTERN)
 
 class TimeConstraints(BaseModel):
-    start_time: str = "08:00"
-    end_time: str = "18:00"
+    start_time: str = Field("08:00", pattern=TIME_PATTERN)
+    end_time: str = Field("18:00", pattern=TIME_PATTERN)
     free_periods: List[FreePeriod] = []
 
 class Preferences(BaseModel):
     compact_schedule: bool = False
     preferred_days: Optional[List[str]] = []
     max_hours_per_day: Optional[int] = None
-    min_break_duration: Optional[int] = None
+    min_break_duration: Optional[int] = None  # minutes
     max_session_duration: Optional[int] = None
 
 class GenerateRequest(BaseModel):
@@ -41,18 +76,36 @@ class GenerateRequest(BaseModel):
     constraints: TimeConstraints
     fixed_events: List[FixedEvent] = []
     preferences: Preferences
+    seed: Optional[int] = Field(None, description="Seed for reproducible timetables; omit for a different valid timetable each time")
+    time_budget_ms: Optional[int] = Field(None, ge=1, description="Stop searching after this many milliseconds and return the best partial timetable")
+    optimize: Optional[bool] = Field(None, description="Optimize for compact_schedule, min_break_duration and preferred_days; defaults to on when any of them is set")
+    slot_minutes: Optional[int] = Field(None, description="Grid resolution in minutes (5-60, dividing an hour); defaults to the coarsest that represents every time in the request exactly")
 
 class TimetableEntry(BaseModel):
     course_name: str
     day: str
-    start_time: str
-    end_time: str
+    start_time: str = Field(..., pattern=TIME_PATTERN)
+    end_time: str = Field(..., pattern=TIME_PATTERN)
     color: str
 
+class UnplacedSession(BaseModel):
+    course_name: str
+    duration: int
+
 class GenerateResponse(BaseModel):
     timetable: List[TimetableEntry]
     success: bool
     message: str
+    unplaced_sessions: List[UnplacedSession] = []
+    conflicts: List[str] = Field([], description="Why the constraints cannot all be met, when that is known without searching")
+    score: Optional[Dict[str, float]] = Field(None, description="Optimization penalties (lower is better); gaps, short_breaks and off_preferred_days are in hours")
+
+class RepairRequest(GenerateRequest):
+    previous_timetable: List[TimetableEntry] = Field(..., description="The timetable generated before the courses, constraints or fixed events changed")
+
+class RepairResponse(GenerateResponse):
+    kept_sessions: int = Field(0, description="Sessions left exactly where the previous timetable had them")
+    moved_sessions: int = Field(0, description="Sessions placed anew because their old spot no longer fits or they are new")
 
 DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
 COLORS = [
@@ -60,57 +113,69 @@ COLORS = [
     '#ec4899', '#06b6d4', '#84cc16', '#f97316', '#6366f1'
 ]
 
-def time_str_to_int(time_str: str) -> int:
-    """Converts 'HH:MM' to integer hour."""
-    return int(time_str.split(':')[0])
+# Slot lengths that divide an hour evenly
+SLOT_MINUTES = (5, 6, 10, 12, 15, 20, 30, 60)
 
-def int_to_time_str(hour: int) -> str:
-    """Converts integer hour to 'HH:MM'."""
-    return f"{hour:02d}:00"
+def time_str_to_minutes(time_str: str) -> int:
+    """Converts 'HH:MM' to minutes since midnight."""
+    hours, _, minutes = time_str.partition(':')
+    return int(hours) * 60 + int(minutes or 0)
 
-@router.post("/generate", response_model=GenerateResponse)
-async def generate_timetable(request: GenerateRequest):
-    courses = request.courses
-    constraints = request.constraints
-    
-    start_hour = time_str_to_int(constraints.start_time)
-    end_hour = time_str_to_int(constraints.end_time)
-    
-    total_hours = end_hour - start_hour
-    if total_hours <= 0:
-        raise HTTPException(status_code=400, detail="End time must be after start time")
-        
-    grid = [[None for _ in range(total_hours)] for _ in range(len(DAYS))]
+def minutes_to_time_str(minutes: int) -> str:
+    """Converts minutes since midnight to 'HH:MM'."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def resolve_slot_minutes(request: GenerateRequest, extra_periods: list = ()) -> int:
+    """The requested slot length, or the coarsest one that fits every time in the request (and `extra_periods`)."""
+    if request.slot_minutes is not None:
+        if request.slot_minutes not in SLOT_MINUTES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"slot_minutes must be one of {', '.join(str(m) for m in SLOT_MINUTES)}"
+            )
+        return request.slot_minutes
+
+    times = [request.constraints.start_time, request.constraints.end_time]
+    for period in list(request.constraints.free_periods) + list(request.fixed_events) + list(extra_periods):
+        times += [period.start_time, period.end_time]
+    step = 60
+    for time_str in times:
+        step = math.gcd(step, time_str_to_minutes(time_str) % 60)
+    # Times off a 5-minute boundary are rounded outwards onto 5-minute slots
+    return step if step in SLOT_MINUTES else SLOT_MINUTES[0]
+
+def period_slots(start_time: str, end_time: str, day_start: int, slot_minutes: int, num_slots: int) -> range:
+    """Slots touched by a period, rounded outwards so partial slots count as taken."""
+    first = (time_str_to_minutes(start_time) - day_start) // slot_minutes
+    last = -(-(time_str_to_minutes(end_time) - day_start) // slot_minutes)
+    return range(max(first, 0), min(last, num_slots))
 
-    for fp in constraints.free_periods:
+def build_problem(request: GenerateRequest, day_start: int, num_slots: int, slot_minutes: int):
+    """Translate a request into slot indices for the solver. Returns (problem, sorted_courses)."""
+    slots_per_hour = 60 // slot_minutes
+    blocked = [set() for _ in DAYS]
+    labels = [dict() for _ in DAYS]
+
+    for fp in request.constraints.free_periods:
         if fp.day in DAYS:
             day_idx = DAYS.index(fp.day)
-            fp_start = time_str_to_int(fp.start_time)
-            fp_end = time_str_to_int(fp.end_time)
-            
-            fp_start_idx = fp_start - start_hour
-            fp_end_idx = fp_end - start_hour
-            
-            for h in range(fp_start_idx, fp_end_idx):
-                if 0 <= h < total_hours:
-                    grid[day_idx][h] = "FREE_TIME"
+            for slot in period_slots(fp.start_time, fp.end_time, day_start, slot_minutes, num_slots):
+                blocked[day_idx].add(slot)
+                labels[day_idx][slot] = "FREE_TIME"
 
     for fe in request.fixed_events:
         if fe.day in DAYS:
             day_idx = DAYS.index(fe.day)
-            fe_start = time_str_to_int(fe.start_time)
-            fe_end = time_str_to_int(fe.end_time)
-            
-            fe_start_idx = fe_start - start_hour
-            fe_end_idx = fe_end - start_hour
-            
-            for h in range(fe_start_idx, fe_end_idx):
-                if 0 <= h < total_hours:
-                    grid[day_idx][h] = fe.name
+            for slot in period_slots(fe.start_time, fe.end_time, day_start, slot_minutes, num_slots):
+                blocked[day_idx].add(slot)
+                labels[day_idx][slot] = fe.name
+
+    # Fixed events count towards max_hours_per_day, free periods do not
+    fixed_load = [sum(1 for label in day.values() if label != "FREE_TIME") for day in labels]
 
     processed_courses = []
-    
-    for course in courses:
+
+    for course in request.courses:
         if request.preferences.max_session_duration and course.duration > request.preferences.max_session_duration:
             duration = course.duration
             max_dur = request.preferences.max_session_duration
@@ -126,94 +191,434 @@ async def generate_timetable(request: GenerateRequest):
             processed_courses.append(course)
 
     sorted_courses = sorted(processed_courses, key=lambda c: c.duration, reverse=True)
-    
-    assignments = {}
 
-    def is_safe(course, day_idx, start_h_idx):
-        if start_h_idx + course.duration > total_hours:
-            return False
+    sessions = []
+    for i, course in enumerate(sorted_courses):
+        allowed_days = [
+            d for d, day in enumerate(DAYS)
+            if not course.preferred_days or day in course.preferred_days
+        ]
+        sessions.append(Session(i, course.name, course.duration * slots_per_hour, allowed_days))
 
-        for h in range(start_h_idx, start_h_idx + course.duration):
-            if grid[day_idx][h] is not None:
-                return False
+    max_hours = request.preferences.max_hours_per_day
+    problem = TimetableProblem(
+        num_days=len(DAYS),
+        num_slots=num_slots,
+        sessions=sessions,
+        blocked=blocked,
+        fixed_load=fixed_load,
+        max_per_day=max_hours * slots_per_hour if max_hours is not None else None,
+        one_per_day=bool(request.preferences.max_session_duration),
+        fixed=[{slot for slot, label in day.items() if label != "FREE_TIME"} for day in labels],
+        duration_step=slots_per_hour,
+    )
+    return problem, sorted_courses
 
-        if course.preferred_days and DAYS[day_idx] not in course.preferred_days:
-            return False
+def build_objective(preferences: Preferences, slot_minutes: int) -> Objective:
+    return Objective(
+        compact=preferences.compact_schedule,
+        # Breaks are in minutes, rounded up to whole slots
+        min_break=-(-(preferences.min_break_duration or 0) // slot_minutes),
+        preferred_days=[DAYS.index(day) for day in preferences.preferred_days or [] if day in DAYS],
+        slots_per_hour=60 // slot_minutes,
+    )
 
-        if request.preferences.max_session_duration:
-            for h in range(total_hours):
-                if grid[day_idx][h] == course.name:
-                    return False
+def format_hours(slots: int, slots_per_hour: int) -> str:
+    return f"{slots / slots_per_hour:g}h"
 
-        if request.preferences.max_hours_per_day:
-            current_hours = sum(
-                1 for h in range(total_hours)
-                if grid[day_idx][h] is not None and grid[day_idx][h] != "FREE_TIME"
-            )
-            if current_hours + course.duration > request.preferences.max_hours_per_day:
-                return False
-            
-        return True
+def explain_conflict(conflict: Conflict, sorted_courses: List[CourseRequest], request: GenerateRequest, slots_per_hour: int) -> str:
+    """One-sentence explanation of a pre-solve conflict, naming the constraints involved."""
+    names = sorted({sorted_courses[i].name for i in conflict.sessions})
+    day_names = ", ".join(DAYS[d] for d in conflict.days)
+    constraints = [f"the {request.constraints.start_time}-{request.constraints.end_time} day"]
+    if request.fixed_events:
+        constraints.append("fixed events")
+    if request.constraints.free_periods:
+        constraints.append("free periods")
+    if request.preferences.max_hours_per_day is not None:
+        constraints.append(f"max_hours_per_day ({request.preferences.max_hours_per_day}h)")
+    limits = constraints[0] if len(constraints) == 1 else ", ".join(constraints[:-1]) + " and " + constraints[-1]
+
+    if conflict.kind == "too_long":
+        return (
+            f"{names[0]} needs a {format_hours(conflict.needed, slots_per_hour)} session, but the longest block "
+            f"available on its days ({day_names}) is {format_hours(conflict.available, slots_per_hour)}, given {limits}"
+        )
+    if conflict.kind == "course_days":
+        return (
+            f"{names[0]} is split into {conflict.needed} sessions by max_session_duration, which allows one per day, "
+            f"but only {conflict.available} of its days can fit a session"
+        )
+    if conflict.kind == "day_group":
+        return (
+            f"{', '.join(names)} can only be scheduled on {day_names} (preferred days) and need "
+            f"{format_hours(conflict.needed, slots_per_hour)}, but those days have only "
+            f"{format_hours(conflict.available, slots_per_hour)} available, given {limits}"
+        )
+    if conflict.kind == "capacity":
+        return (
+            f"Courses need {format_hours(conflict.needed, slots_per_hour)} in total, but the week has only "
+            f"{format_hours(conflict.available, slots_per_hour)} available, given {limits}"
+        )
+    return (
+        f"{conflict.needed} sessions of {format_hours(conflict.length, slots_per_hour)} or longer are needed, but only "
+        f"{conflict.available} blocks that long fit, given {limits}"
+    )
 
-    def solve(course_idx):
-        if course_idx == len(sorted_courses):
-            return True
+def build_timetable(request: GenerateRequest, sorted_courses: List[CourseRequest], assignments: dict,
+                    day_start: int, slot_minutes: int, colors: Optional[dict] = None) -> List[TimetableEntry]:
+    timetable = []
+    for i, course in enumerate(sorted_courses):
+        if i in assignments:
+            d_idx, slot = assignments[i]
             
-        course = sorted_courses[course_idx]
-        
-        day_indices = list(range(len(DAYS)))
-        random.shuffle(day_indices)
-
-        if course.preferred_days:
-            pref_indices = [i for i in day_indices if DAYS[i] in course.preferred_days]
-            other_indices = [i for i in day_indices if DAYS[i] not in course.preferred_days]
-            day_indices = pref_indices + other_indices
-
-        for d_idx in day_indices:
-            hour_indices = list(range(total_hours))
-            random.shuffle(hour_indices)
+            real_start = day_start + slot * slot_minutes
+            real_end = real_start + course.duration * 60
             
-            for h_idx in hour_indices:
-                if is_safe(course, d_idx, h_idx):
-                    for h in range(h_idx, h_idx + course.duration):
-                        grid[d_idx][h] = course.name
-                    assignments[course_idx] = (d_idx, h_idx)
-                    
-                    if solve(course_idx + 1):
-                        return True
-
-                    for h in range(h_idx, h_idx + course.duration):
-                        grid[d_idx][h] = None
-                    del assignments[course_idx]
-                    
-        return False
-
-    if solve(0):
-        timetable = []
-        for i, course in enumerate(sorted_courses):
-            if i in assignments:
-                d_idx, h_idx = assignments[i]
-                
-                real_start_hour = start_hour + h_idx
-                real_end_hour = real_start_hour + course.duration
-                
-                timetable.append(TimetableEntry(
-                    course_name=course.name,
-                    day=DAYS[d_idx],
-                    start_time=int_to_time_str(real_start_hour),
-                    end_time=int_to_time_str(real_end_hour),
-                    color=COLORS[i % len(COLORS)]
-                ))
-        
-        for fe in request.fixed_events:
-             timetable.append(TimetableEntry(
-                course_name=fe.name,
-                day=fe.day,
-                start_time=fe.start_time,
-                end_time=fe.end_time,
-                color='#6b7280'
+            timetable.append(TimetableEntry(
+                course_name=course.name,
+                day=DAYS[d_idx],
+                start_time=minutes_to_time_str(real_start),
+                end_time=minutes_to_time_str(real_end),
+                color=(colors or {}).get(i, COLORS[i % len(COLORS)])
             ))
+    
+    for fe in request.fixed_events:
+         timetable.append(TimetableEntry(
+            course_name=fe.name,
+            day=fe.day,
+            start_time=fe.start_time,
+            end_time=fe.end_time,
+            color='#6b7280'
+        ))
+    return timetable
 
-        return GenerateResponse(timetable=timetable, success=True, message="Timetable generated successfully")
+def match_previous(previous_timetable: List[TimetableEntry], sorted_courses: List[CourseRequest],
+                   day_start: int, slot_minutes: int):
+    """
+    Pair each session with an entry of the same course and length in a previous timetable.
+    Returns ({index: (day, slot)}, {index: color}); entries off the grid keep only their color.
+    """
+    unused = list(previous_timetable)
+    placements, colors = {}, {}
+    for i, course in enumerate(sorted_courses):
+        for entry in unused:
+            start = time_str_to_minutes(entry.start_time)
+            if (entry.course_name != course.name or entry.day not in DAYS
+                    or time_str_to_minutes(entry.end_time) - start != course.duration * 60):
+                continue
+            unused.remove(entry)
+            colors[i] = entry.color
+            if (start - day_start) % slot_minutes == 0:
+                placements[i] = (DAYS.index(entry.day), (start - day_start) // slot_minutes)
+            break
+    return placements, colors
+
+@router.post("/generate", response_model=GenerateResponse)
+def generate_timetable(request: GenerateRequest):
+    """
+    Generate a timetable that satisfies the constraints.
+
+    - The search stops after `time_budget_ms` (capped by the server)
+    - If no complete timetable is found, the best partial one is returned with success=false
+      and the sessions that could not be placed
+    - In optimization mode, restarts run in parallel until the budget is used and the
+      best-scoring timetable is returned with its score breakdown
+    """
+    return solve_request(request)
+
+def solve_request(request: GenerateRequest, workers: int = OPTIMIZE_WORKERS) -> GenerateResponse:
+    """Solve one timetable request; `workers` is the number of parallel optimization restarts."""
+    slot_minutes = resolve_slot_minutes(request)
+    objective = build_objective(request.preferences, slot_minutes)
+    optimizing = request.optimize if request.optimize is not None else objective.active
+    default_budget_ms = OPTIMIZE_TIME_BUDGET_MS if optimizing else MAX_TIME_BUDGET_MS
+    budget_ms = min(request.time_budget_ms or default_budget_ms, MAX_TIME_BUDGET_MS)
+    deadline = time.monotonic() + budget_ms / 1000
+    constraints = request.constraints
+
+    day_start = time_str_to_minutes(constraints.start_time)
+    day_end = time_str_to_minutes(constraints.end_time)
+
+    num_slots = (day_end - day_start) // slot_minutes
+    if num_slots <= 0:
+        raise HTTPException(status_code=400, detail="End time must be after start time")
+
+    problem, sorted_courses = build_problem(request, day_start, num_slots, slot_minutes)
+    solver = CSPSolver(problem, seed=request.seed, deadline=deadline)
+
+    conflicts = analyze(problem)
+    if conflicts:
+        # Clearly impossible: skip the search and fill what fits greedily
+        partial = solver.best_partial()
+        explanations = [explain_conflict(c, sorted_courses, request, 60 // slot_minutes) for c in conflicts]
+        return GenerateResponse(
+            timetable=build_timetable(request, sorted_courses, partial, day_start, slot_minutes),
+            success=False,
+            message=f"Could not generate a valid timetable: {explanations[0]}",
+            unplaced_sessions=[
+                UnplacedSession(course_name=course.name, duration=course.duration)
+                for i, course in enumerate(sorted_courses) if i not in partial
+            ],
+            conflicts=explanations,
+        )
+
+    assignments = solver.solve()
+
+    if assignments is not None:
+        score = None
+        if optimizing:
+            _, assignments = optimize(problem, objective, assignments, request.seed, deadline, workers)
+            score = objective.breakdown(problem, assignments)
+        timetable = build_timetable(request, sorted_courses, assignments, day_start, slot_minutes)
+        return GenerateResponse(timetable=timetable, success=True, message="Timetable generated successfully", score=score)
+
+    partial = solver.best_partial()
+    unplaced = [
+        UnplacedSession(course_name=course.name, duration=course.duration)
+        for i, course in enumerate(sorted_courses) if i not in partial
+    ]
+    if solver.timed_out:
+        message = f"Time budget reached: placed {len(partial)} of {len(sorted_courses)} sessions"
+    else:
+        message = "Could not generate a valid timetable with given constraints"
+    return GenerateResponse(
+        timetable=build_timetable(request, sorted_courses, partial, day_start, slot_minutes),
+        success=False,
+        message=message,
+        unplaced_sessions=unplaced,
+    )
+
+@router.post("/repair", response_model=RepairResponse)
+def repair_timetable(request: RepairRequest):
+    """
+    Update a previous timetable after the request changed, moving as little as possible.
+
+    - Send the changed request together with the timetable it replaces
+    - Sessions whose old spot still fits stay exactly where they were; only sessions that
+      now conflict and new ones are re-solved, releasing more of the timetable a day at a
+      time only if they cannot be placed around the rest
+    - Optimization is off unless `optimize` is true, and then only moved sessions are optimized
+    """
+    slot_minutes = resolve_slot_minutes(request, request.previous_timetable)
+    objective = build_objective(request.preferences, slot_minutes)
+    budget_ms = min(request.time_budget_ms or MAX_TIME_BUDGET_MS, MAX_TIME_BUDGET_MS)
+    deadline = time.monotonic() + budget_ms / 1000
+    constraints = request.constraints
+
+    day_start = time_str_to_minutes(constraints.start_time)
+    day_end = time_str_to_minutes(constraints.end_time)
+
+    num_slots = (day_end - day_start) // slot_minutes
+    if num_slots <= 0:
+        raise HTTPException(status_code=400, detail="End time must be after start time")
+
+    problem, sorted_courses = build_problem(request, day_start, num_slots, slot_minutes)
+    previous, colors = match_previous(request.previous_timetable, sorted_courses, day_start, slot_minutes)
+    assignments, complete, timed_out = repair(
+        problem, previous, seed=request.seed, deadline=deadline,
+        objective=objective if request.optimize else None,
+    )
+
+    kept = sum(1 for i, placement in assignments.items() if previous.get(i) == placement)
+    timetable = build_timetable(request, sorted_courses, assignments, day_start, slot_minutes, colors)
+    if complete:
+        return RepairResponse(
+            timetable=timetable,
+            success=True,
+            message=f"Timetable updated: {kept} of {len(sorted_courses)} sessions kept in place",
+            score=objective.breakdown(problem, assignments) if objective.active else None,
+            kept_sessions=kept,
+            moved_sessions=len(assignments) - kept,
+        )
+
+    explanations = [explain_conflict(c, sorted_courses, request, 60 // slot_minutes) for c in analyze(problem)]
+    if explanations:
+        message = f"Could not update the timetable: {explanations[0]}"
+    elif timed_out:
+        message = f"Time budget reached: placed {len(assignments)} of {len(sorted_courses)} sessions"
     else:
-        return GenerateResponse(timetable=[], success=False, message="Could not generate a valid timetable with given constraints")
+        message = "Could not update the timetable with given constraints"
+    return RepairResponse(
+        timetable=timetable,
+        success=False,
+        message=message,
+        unplaced_sessions=[
+            UnplacedSession(course_name=course.name, duration=course.duration)
+            for i, course in enumerate(sorted_courses) if i not in assignments
+        ],
+        conflicts=explanations,
+        kept_sessions=kept,
+        moved_sessions=len(assignments) - kept,
+    )
+
+def read_bulk_courses(upload: UploadFile) -> Dict[str, List[CourseRequest]]:
+    """Group the rows of a bulk upload into each student's course list, in first-seen order."""
+    students: Dict[str, List[CourseRequest]] = {}
+    for number, row in iter_records(upload, BULK_COLUMNS, BULK_OPTIONAL_COLUMNS):
+        student = str(row["student"] or "").strip()
+        course = str(row["course"] or "").strip()
+        try:
+            duration = float(row["duration"])
+        except (TypeError, ValueError):
+            duration = 0
+        if not student or not course or duration <= 0 or not duration.is_integer():
+            raise HTTPException(
+                status_code=400,
+                detail=f"Row {number}: each row needs a student, a course and a whole number of hours"
+            )
+
+        preferred_days = [day.strip().title() for day in str(row["preferred_days"] or "").replace(";", ",").split(",") if day.strip()]
+        unknown = [day for day in preferred_days if day not in DAYS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Row {number}: unknown day(s) {', '.join(unknown)}")
+
+        if student not in students:
+            if len(students) >= MAX_BULK_STUDENTS:
+                raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_STUDENTS} students per upload")
+            students[student] = []
+        students[student].append(CourseRequest(name=course, duration=int(duration), preferred_days=preferred_days))
+
+    if not students:
+        raise HTTPException(status_code=400, detail="The file has no course rows")
+    return students
+
+_bulk_executor: Optional[ProcessPoolExecutor] = None
+
+def get_bulk_executor() -> ProcessPoolExecutor:
+    """Process pool for bulk uploads, separate from the one optimization restarts use."""
+    global _bulk_executor
+    if _bulk_executor is None:
+        _bulk_executor = ProcessPoolExecutor(max_workers=BULK_WORKERS)
+    return _bulk_executor
+
+def within_deadline(request: GenerateRequest, deadline: float) -> Optional[GenerateRequest]:
+    """The request with its budget cut to the time left before `deadline`, or None if none is left."""
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        return None
+    return request.model_copy(update={"time_budget_ms": min(request.time_budget_ms or remaining_ms, remaining_ms)})
+
+def skipped_bulk_result(student: str) -> tuple:
+    return student, GenerateResponse(
+        timetable=[], success=False, message="Not solved: the upload ran out of time before this student"
+    )
+
+def solve_bulk(requests: Dict[str, GenerateRequest], deadline: float):
+    """
+    Yield (student, response) in upload order. Students are solved across the
+    bulk process pool with a few jobs queued per worker, so results can be
+    written out while later students are still being solved. No student's
+    budget runs past `deadline`; students not started by then are skipped.
+    """
+    if BULK_WORKERS <= 1:
+        for student, request in requests.items():
+            request = within_deadline(request, deadline)
+            yield (student, solve_request(request, workers=1)) if request else skipped_bulk_result(student)
+        return
+
+    executor = get_bulk_executor()
+    pending = deque()
+    for student, request in requests.items():
+        request = within_deadline(request, deadline)
+        if request is None:
+            pending.append((student, None))
+        else:
+            # workers=1: optimization restarts must not start a pool inside a pool worker
+            pending.append((student, executor.submit(solve_request, request, 1)))
+        if len(pending) >= 2 * BULK_WORKERS:
+            yield collect_bulk_result(*pending.popleft())
+    while pending:
+        yield collect_bulk_result(*pending.popleft())
+
+def collect_bulk_result(student: str, future) -> tuple:
+    if future is None:
+        return skipped_bulk_result(student)
+    try:
+        return student, future.result()
+    except Exception as e:
+        print(f"Bulk timetable for {student} failed: {e}")
+        return student, GenerateResponse(timetable=[], success=False, message="Timetable generation failed")
+
+def write_bulk_workbook(path: str, results):
+    """Write a Summary sheet (one row per student) and a Timetables sheet (one row block per student)."""
+    workbook = Workbook(write_only=True)
+    summary = workbook.create_sheet("Summary")
+    summary.append(["Student", "Success", "Sessions placed", "Sessions unplaced", "Message"])
+    sessions = workbook.create_sheet("Timetables")
+    sessions.append(["Student", "Course", "Day", "Start", "End"])
+
+    for student, response in results:
+        summary.append([
+            student, "Yes" if response.success else "No",
+            len(response.timetable), len(response.unplaced_sessions), response.message,
+        ])
+        entries = sorted(response.timetable, key=lambda e: (DAYS.index(e.day), e.start_time))
+        for entry in entries:
+            sessions.append([student, entry.course_name, entry.day, entry.start_time, entry.end_time])
+    workbook.save(path)
+
+def cleanup_temp_dir(temp_dir: str):
+    """Remove temporary directory and all its contents."""
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+@router.post("/bulk")
+@limiter.limit(RATE_LIMITS["file_processing"])
+def generate_bulk(
+    request: Request,
+    file: UploadFile = File(..., description="CSV or XLSX with student, course, duration and optional preferred_days columns"),
+    start_time: str = Form("08:00"),
+    end_time: str = Form("18:00"),
+    max_hours_per_day: Optional[int] = Form(None),
+    min_break_duration: Optional[int] = Form(None, description="Minutes"),
+    max_session_duration: Optional[int] = Form(None),
+    compact_schedule: bool = Form(False),
+    time_budget_ms: Optional[int] = Form(None, ge=1, description="Solver time per student"),
+    seed: Optional[int] = Form(None),
+):
+    """
+    Generate timetables for a whole cohort from one spreadsheet.
+
+    - One row per course: student, course, duration (hours), preferred_days (e.g. "Monday;Wednesday")
+    - The day, break and session settings apply to every student
+    - Students are solved in parallel, each within its own time budget; students not
+      started within TIMETABLE_BULK_TOTAL_TIME_BUDGET_MS are reported as not solved
+    - Returns an XLSX with a Summary sheet and a Timetables sheet listing every student's sessions
+    """
+    sheet_format(file.filename)
+    try:
+        if time_str_to_minutes(end_time) <= time_str_to_minutes(start_time):
+            raise HTTPException(status_code=400, detail="End time must be after start time")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Times must be in HH:MM format")
+
+    students = read_bulk_courses(file)
+    settings = dict(
+        constraints=TimeConstraints(start_time=start_time, end_time=end_time),
+        preferences=Preferences(
+            compact_schedule=compact_schedule,
+            max_hours_per_day=max_hours_per_day,
+            min_break_duration=min_break_duration,
+            max_session_duration=max_session_duration,
+        ),
+        seed=seed,
+        time_budget_ms=min(time_budget_ms or BULK_TIME_BUDGET_MS, MAX_TIME_BUDGET_MS),
+    )
+    requests = {student: GenerateRequest(courses=courses, **settings) for student, courses in students.items()}
+
+    temp_dir = tempfile.mkdtemp()
+    output_path = os.path.join(temp_dir, "timetables.xlsx")
+    try:
+        deadline = time.monotonic() + BULK_TOTAL_TIME_BUDGET_MS / 1000
+        write_bulk_workbook(output_path, solve_bulk(requests, deadline))
+    except Exception:
+        cleanup_temp_dir(temp_dir)
+        raise
+
+    return FileResponse(
+        path=output_path,
+        filename="timetables.xlsx",
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        background=BackgroundTask(cleanup_temp_dir, temp_dir)
+    )
@@ -1,11 +1,15 @@
 import os
 import re
+import json
+import asyncio
 import httpx
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from openai import OpenAI
 from dotenv import load_dotenv
-from typing import Optional
+from typing import List, Optional
+
+from modules import citation_index, citation_styles, html_metadata
 
 load_dotenv()
 
@@ -16,18 +20,21 @@ from rate_limiter import limiter, RATE_LIMITS
 from fastapi import Request
 
 # OpenRouter configuration
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+import llm_gateway
+import model_router
 DEFAULT_MODEL = "google/gemini-2.0-flash-exp:free"
+# Interchangeable models the router picks between (comma-separated in CITATION_MODELS)
+CITATION_MODELS = model_router.models_from_env("CITATION_MODELS", DEFAULT_MODEL)
+model_router.register_models(CITATION_MODELS)
 
-def get_openrouter_client():
-    """Create and return an OpenRouter client."""
-    api_key = os.getenv("OPENROUTER_API_KEY", "")
-    if not api_key:
-        return None
-    return OpenAI(
-        base_url=OPENROUTER_BASE_URL,
-        api_key=api_key,
-    )
+
+# Bulk bibliography configuration
+BULK_MAX_INPUTS = 500
+BULK_DEFAULT_CONCURRENCY = int(os.getenv("CITATION_BULK_CONCURRENCY", "8"))
+BULK_MAX_CONCURRENCY = 32
+# URLs whose page markup is incomplete cost an LLM call each; cap them per bulk request,
+# since the whole request is charged as one hit of RATE_LIMITS["ai"]
+BULK_MAX_AI_URLS = int(os.getenv("CITATION_BULK_MAX_AI_URLS", "10"))
 
 
 DOI_PATTERN = r"^10\.\d{4,}/[^\s]+"
@@ -49,6 +56,10 @@ class CitationRequest(BaseModel):
         default=None,
         description="Source type: journal, website, or book (auto-detected if not provided)"
     )
+    additional_styles: List[str] = Field(
+        default=[],
+        description="Other styles to render in the same pass, returned in `citations`"
+    )
 
 
 class CitationResponse(BaseModel):
@@ -56,6 +67,26 @@ class CitationResponse(BaseModel):
     detected_type: str
     input_type: str
     metadata: dict
+    citations: dict = {}
+
+
+class BulkCitationRequest(BaseModel):
+    inputs: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=BULK_MAX_INPUTS,
+        description=f"DOIs, URLs, or paper titles (max {BULK_MAX_INPUTS})"
+    )
+    style: str = Field(
+        default="apa",
+        description="Citation style: apa, ieee, or harvard"
+    )
+    concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=BULK_MAX_CONCURRENCY,
+        description="Maximum number of sources resolved at the same time"
+    )
 
 
 def detect_input_type(input_text: str) -> str:
@@ -89,26 +120,59 @@ def extract_doi(input_text: str) -> str:
     return input_text
 
 
+CROSSREF_HEADERS = {"User-Agent": "StuDenTools/1.0 (mailto:studentools@example.com)"}
+
+_crossref_client: Optional[httpx.AsyncClient] = None
+
+
+def get_crossref_client() -> httpx.AsyncClient:
+    """Shared CrossRef client, so bulk lookups reuse pooled keep-alive connections."""
+    global _crossref_client
+    if _crossref_client is None:
+        _crossref_client = httpx.AsyncClient(
+            timeout=15.0,
+            headers=CROSSREF_HEADERS,
+            limits=httpx.Limits(max_connections=BULK_MAX_CONCURRENCY, max_keepalive_connections=BULK_DEFAULT_CONCURRENCY),
+        )
+    return _crossref_client
+
+
 async def fetch_crossref_by_doi(doi: str) -> dict:
     """Fetch metadata from CrossRef API using DOI."""
     url = f"https://api.crossref.org/works/{doi}"
     
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.get(url, headers={
-            "User-Agent": "StuDenTools/1.0 (mailto:studentools@example.com)"
-        })
-        
-        if response.status_code == 404:
-            raise HTTPException(status_code=404, detail="DOI not found in CrossRef database")
-        if response.status_code != 200:
-            raise HTTPException(status_code=502, detail="Failed to fetch data from CrossRef")
-        
-        data = response.json()
-        return data.get("message", {})
+    response = await get_crossref_client().get(url)
+
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail="DOI not found in CrossRef database")
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail="Failed to fetch data from CrossRef")
+
+    data = response.json()
+    item = data.get("message", {})
+
+    await store_in_index(item)
+    return item
+
+
+async def store_in_index(item: dict) -> None:
+    """Add a fetched CrossRef work to the local title index (best effort)."""
+    try:
+        await asyncio.to_thread(citation_index.add_work, item)
+    except Exception as e:
+        print(f"Failed to update citation index: {e}")
 
 
 async def fetch_crossref_by_title(title: str) -> dict:
-    """Search CrossRef API by paper title."""
+    """Search the local title index, falling back to the CrossRef API."""
+    try:
+        local_match = await asyncio.to_thread(citation_index.search_title, title)
+    except Exception as e:
+        print(f"Citation index lookup failed: {e}")
+        local_match = None
+    if local_match:
+        return local_match
+
     url = "https://api.crossref.org/works"
     params = {
         "query.title": title,
@@ -116,21 +180,19 @@ async def fetch_crossref_by_title(title: str) -> dict:
         "select": "DOI,title,author,published-print,published-online,container-title,volume,issue,page,publisher,type"
     }
     
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.get(url, params=params, headers={
-            "User-Agent": "StuDenTools/1.0 (mailto:studentools@example.com)"
-        })
-        
-        if response.status_code != 200:
-            raise HTTPException(status_code=502, detail="Failed to search CrossRef")
-        
-        data = response.json()
-        items = data.get("message", {}).get("items", [])
-        
-        if not items:
-            raise HTTPException(status_code=404, detail="No papers found matching that title")
-        
-        return items[0]
+    response = await get_crossref_client().get(url, params=params)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail="Failed to search CrossRef")
+
+    data = response.json()
+    items = data.get("message", {}).get("items", [])
+
+    if not items:
+        raise HTTPException(status_code=404, detail="No papers found matching that title")
+
+    await store_in_index(items[0])
+    return items[0]
 
 
 def parse_crossref_metadata(data: dict) -> dict:
@@ -175,15 +237,66 @@ def parse_crossref_metadata(data: dict) -> dict:
     }
 
 
-async def extract_url_metadata(url: str) -> dict:
-    """Use OpenRouter to extract citation metadata from a URL."""
-    client = get_openrouter_client()
-    if not client:
+class AIBudget:
+    """How many more LLM-backed URL extractions one bulk request may make."""
+
+    def __init__(self, limit: int):
+        self.remaining = limit
+
+    def take(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+async def extract_url_metadata(url: str, ai_budget: Optional[AIBudget] = None) -> dict:
+    """
+    Extract citation metadata for a URL.
+
+    The page's own Highwire/Dublin Core/OpenGraph/JSON-LD tags are tried
+    first; the LLM is only asked when required fields are still missing,
+    and only while `ai_budget` (if given) has calls left.
+    `metadata_source` records which path produced the result: "html",
+    "html+llm", "llm" or "fallback".
+    """
+    try:
+        page_metadata = await html_metadata.extract_html_metadata(url)
+    except Exception as e:
+        print(f"HTML metadata extraction failed for {url}: {e}")
+        page_metadata = None
+
+    if page_metadata and html_metadata.has_required_fields(page_metadata):
+        page_metadata["metadata_source"] = "html"
+        return page_metadata
+
+    if not llm_gateway.get_client():
+        if page_metadata and page_metadata.get("title"):
+            page_metadata["metadata_source"] = "html"
+            return page_metadata
         raise HTTPException(
             status_code=500,
             detail="OPENROUTER_API_KEY is required for URL citation extraction"
         )
-    
+    if ai_budget is not None and not ai_budget.take():
+        if page_metadata and page_metadata.get("title"):
+            page_metadata["metadata_source"] = "html"
+            return page_metadata
+        raise HTTPException(
+            status_code=429,
+            detail=f"At most {BULK_MAX_AI_URLS} URLs per bibliography can be read with AI; cite this one on its own"
+        )
+
+    metadata = await extract_url_metadata_llm(url)
+    if page_metadata:
+        metadata.update({key: value for key, value in page_metadata.items() if value})
+        if metadata["metadata_source"] == "llm":
+            metadata["metadata_source"] = "html+llm"
+    return metadata
+
+
+async def extract_url_metadata_llm(url: str) -> dict:
+    """Use OpenRouter to extract citation metadata from a URL."""
     prompt = f"""Extract citation metadata from this URL for academic citation purposes.
 
 URL: {url}
@@ -204,8 +317,8 @@ Return a JSON object with these fields (use null for unknown values):
 
 Return ONLY the JSON object, no other text."""
 
-    response = client.chat.completions.create(
-        model=DEFAULT_MODEL,
+    response = await model_router.chat_completion(
+        models=CITATION_MODELS,
         messages=[
             {
                 "role": "system",
@@ -219,7 +332,6 @@ Return ONLY the JSON object, no other text."""
     )
     
     try:
-        import json
         text = response.choices[0].message.content.strip()
         if text.startswith("```json"):
             text = text[7:]
@@ -230,6 +342,7 @@ Return ONLY the JSON object, no other text."""
         
         metadata = json.loads(text.strip())
         metadata["type"] = "website"
+        metadata["metadata_source"] = "llm"
         return metadata
     except (json.JSONDecodeError, AttributeError, IndexError):
         return {
@@ -241,225 +354,77 @@ Return ONLY the JSON object, no other text."""
             "site_name": url.split("/")[2] if "/" in url else url,
             "url": url,
             "access_date": "2026-01-25",
-            "type": "website"
+            "type": "website",
+            "metadata_source": "fallback"
         }
 
 
-def format_citation_apa(metadata: dict) -> str:
-    """Format citation in APA 7th edition style."""
-    parts = []
-    
-    # Authors
-    authors = metadata.get("authors", [])
-    if authors:
-        author_strings = []
-        for i, author in enumerate(authors):
-            family = author.get("family", "")
-            given = author.get("given", "")
-            if family:
-                initials = "".join([n[0] + "." for n in given.split() if n]) if given else ""
-                author_strings.append(f"{family}, {initials}".strip(", "))
-        
-        if len(author_strings) == 1:
-            parts.append(author_strings[0])
-        elif len(author_strings) == 2:
-            parts.append(f"{author_strings[0]} & {author_strings[1]}")
-        elif len(author_strings) > 2:
-            parts.append(", ".join(author_strings[:-1]) + f", & {author_strings[-1]}")
-    
-    # Year
-    year = metadata.get("year")
-    if year:
-        parts.append(f"({year}).")
-    else:
-        parts.append("(n.d.).")
-    
-    # Title
-    title = metadata.get("title", "")
-    if title:
-        if metadata.get("type") == "website":
-            parts.append(f"{title}.")
-        else:
-            parts.append(f"{title}.")
-
-    journal = metadata.get("journal")
-    if journal:
-        journal_part = f"*{journal}*"
-        volume = metadata.get("volume")
-        issue = metadata.get("issue")
-        if volume:
-            journal_part += f", *{volume}*"
-            if issue:
-                journal_part += f"({issue})"
-        pages = metadata.get("pages")
-        if pages:
-            journal_part += f", {pages}"
-        parts.append(journal_part + ".")
-
-    site_name = metadata.get("site_name")
-    if site_name and metadata.get("type") == "website":
-        parts.append(f"*{site_name}*.")
-
-    doi = metadata.get("doi")
-    url = metadata.get("url")
-    if doi:
-        parts.append(f"https://doi.org/{doi}")
-    elif url and metadata.get("type") == "website":
-        access_date = metadata.get("access_date", "")
-        if access_date:
-            parts.append(f"Retrieved {access_date}, from {url}")
-        else:
-            parts.append(url)
-    
-    return " ".join(parts)
-
-
-def format_citation_ieee(metadata: dict) -> str:
-    """Format citation in IEEE style."""
-    parts = []
-
-    authors = metadata.get("authors", [])
-    if authors:
-        author_strings = []
-        for author in authors:
-            family = author.get("family", "")
-            given = author.get("given", "")
-            if family:
-                initials = " ".join([n[0] + "." for n in given.split() if n]) if given else ""
-                author_strings.append(f"{initials} {family}".strip())
-        
-        if len(author_strings) <= 3:
-            parts.append(", ".join(author_strings))
-        else:
-            parts.append(", ".join(author_strings[:3]) + " et al.")
-
-    title = metadata.get("title", "")
-    if title:
-        if metadata.get("type") == "website":
-            parts.append(f'"{title},"')
-        else:
-            parts.append(f'"{title},"')
-    
-    # Journal in italics
-    journal = metadata.get("journal")
-    if journal:
-        journal_part = f"*{journal}*"
-        parts.append(journal_part + ",")
-
-    volume = metadata.get("volume")
-    pages = metadata.get("pages")
-    if volume:
-        vol_str = f"vol. {volume}"
-        issue = metadata.get("issue")
-        if issue:
-            vol_str += f", no. {issue}"
-        if pages:
-            vol_str += f", pp. {pages}"
-        year = metadata.get("year")
-        if year:
-            vol_str += f", {year}"
-        parts.append(vol_str + ".")
-    elif metadata.get("year"):
-        parts.append(f"{metadata.get('year')}.")
-    
-    # DOI
-    doi = metadata.get("doi")
-    if doi:
-        parts.append(f"doi: {doi}.")
-
-    url = metadata.get("url")
-    if not doi and url and metadata.get("type") == "website":
-        site = metadata.get("site_name", "")
-        if site:
-            parts.append(f"*{site}*.")
-        access_date = metadata.get("access_date", "")
-        parts.append(f"[Online]. Available: {url}")
-        if access_date:
-            parts.append(f"[Accessed: {access_date}].")
-    
-    return " ".join(parts)
+def format_citations(metadata: dict, styles: List[str]) -> dict:
+    """Format metadata into several citation styles in one pass."""
+    return citation_styles.render_styles(metadata, [validate_style(style) for style in styles])
 
 
-def format_citation_harvard(metadata: dict) -> str:
-    """Format citation in Harvard style."""
-    parts = []
-    
-    # Authors
-    authors = metadata.get("authors", [])
-    if authors:
-        author_strings = []
-        for author in authors:
-            family = author.get("family", "")
-            given = author.get("given", "")
-            if family:
-                initials = "".join([n[0] + "." for n in given.split() if n]) if given else ""
-                author_strings.append(f"{family}, {initials}".strip(", "))
-        
-        if len(author_strings) == 1:
-            parts.append(author_strings[0])
-        elif len(author_strings) == 2:
-            parts.append(f"{author_strings[0]} and {author_strings[1]}")
-        elif len(author_strings) > 2:
-            parts.append(f"{author_strings[0]} et al.")
-    
-    # Year
-    year = metadata.get("year")
-    if year:
-        parts.append(f"({year})")
-    else:
-        parts.append("(n.d.)")
-    
-    # Title
-    title = metadata.get("title", "")
-    if title:
-        parts.append(f"'{title}',")
-    
-    # Journal in italics
-    journal = metadata.get("journal")
-    if journal:
-        journal_part = f"*{journal}*"
-        volume = metadata.get("volume")
-        issue = metadata.get("issue")
-        if volume:
-            journal_part += f", {volume}"
-            if issue:
-                journal_part += f"({issue})"
-        pages = metadata.get("pages")
-        if pages:
-            journal_part += f", pp. {pages}"
-        parts.append(journal_part + ".")
-
-    if metadata.get("type") == "website":
-        site_name = metadata.get("site_name")
-        if site_name:
-            parts.append(f"*{site_name}*.")
-        url = metadata.get("url")
-        access_date = metadata.get("access_date")
-        if url:
-            parts.append(f"Available at: {url}")
-            if access_date:
-                parts.append(f"(Accessed: {access_date}).")
-    
-    # DOI
-    doi = metadata.get("doi")
-    if doi and metadata.get("type") != "website":
-        parts.append(f"doi: {doi}.")
-    
-    return " ".join(parts)
+async def resolve_citation_metadata(input_text: str, source_type: Optional[str] = None,
+                                    ai_budget: Optional[AIBudget] = None) -> tuple:
+    """Resolve a DOI, URL, or title into (metadata, detected_type, input_type)."""
+    input_type = detect_input_type(input_text)
+
+    if input_type == "doi":
+        doi = extract_doi(input_text)
+        raw_data = await fetch_crossref_by_doi(doi)
+        metadata = parse_crossref_metadata(raw_data)
+        detected_type = metadata.get("type", "journal-article")
 
+    elif input_type == "url":
+        metadata = await extract_url_metadata(input_text, ai_budget)
+        detected_type = "website"
 
-def format_citation(metadata: dict, style: str) -> str:
-    """Format metadata into citation based on style."""
+    else:  # title search
+        raw_data = await fetch_crossref_by_title(input_text)
+        metadata = parse_crossref_metadata(raw_data)
+        detected_type = metadata.get("type", "journal-article")
+
+    if source_type:
+        detected_type = source_type
+        metadata["type"] = source_type
+
+    return metadata, detected_type, input_type
+
+
+def validate_style(style: str) -> str:
+    """Normalize a citation style name, rejecting unsupported ones."""
+    valid_styles = list(citation_styles.STYLES)
     style = style.lower()
-    
-    if style == "apa":
-        return format_citation_apa(metadata)
-    elif style == "ieee":
-        return format_citation_ieee(metadata)
-    elif style == "harvard":
-        return format_citation_harvard(metadata)
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported citation style: {style}")
+    if style not in valid_styles:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid style. Must be one of: {', '.join(valid_styles)}"
+        )
+    return style
+
+
+def normalize_bulk_input(input_text: str) -> str:
+    """Build the dedupe key for a bulk input so equivalent sources resolve once."""
+    input_text = input_text.strip()
+    if detect_input_type(input_text) == "doi":
+        return "doi:" + extract_doi(input_text).lower()
+    return " ".join(input_text.split()).casefold()
+
+
+def bibliography_sort_key(metadata: dict) -> tuple:
+    """Sort key for a reference list: first author's family name, then year and title."""
+    authors = metadata.get("authors") or []
+    lead = authors[0].get("family", "") if authors else ""
+    title = metadata.get("title") or ""
+    return ((lead or title).casefold(), str(metadata.get("year") or ""), title.casefold())
+
+
+def build_bibliography(entries: List[tuple], style: str) -> List[str]:
+    """Alphabetize (metadata, citation) pairs, numbering them for IEEE."""
+    ordered = [citation for _, citation in sorted(entries, key=lambda e: bibliography_sort_key(e[0]))]
+    if style == "ieee":
+        return [f"[{i}] {citation}" for i, citation in enumerate(ordered, start=1)]
+    return ordered
 
 
 @router.post("/api/citation", response_model=CitationResponse)
@@ -469,49 +434,29 @@ async def generate_citation(request: Request, citation_request: CitationRequest)
     Generate a formatted citation from DOI, URL, or paper title.
     
     - DOI: Uses CrossRef API for metadata
-    - URL: Uses AI to extract metadata from page
+    - URL: Reads the page's citation meta tags, asking AI only for gaps
     - Title: Searches CrossRef for matching papers
     
-    Supported styles: APA, IEEE, Harvard
+    Supported styles: APA, IEEE, Harvard. Pass `additional_styles` to get
+    the same source in several styles at once.
     """
 
-    valid_styles = ["apa", "ieee", "harvard"]
-    style = citation_request.style.lower()
-    if style not in valid_styles:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid style. Must be one of: {', '.join(valid_styles)}"
-        )
+    style = validate_style(citation_request.style)
+    styles = [style] + [validate_style(extra) for extra in citation_request.additional_styles]
 
-    input_type = detect_input_type(citation_request.input)
-    
     try:
-        if input_type == "doi":
-            doi = extract_doi(citation_request.input)
-            raw_data = await fetch_crossref_by_doi(doi)
-            metadata = parse_crossref_metadata(raw_data)
-            detected_type = metadata.get("type", "journal-article")
-            
-        elif input_type == "url":
-            metadata = await extract_url_metadata(citation_request.input)
-            detected_type = "website"
-            
-        else:  # title search
-            raw_data = await fetch_crossref_by_title(citation_request.input)
-            metadata = parse_crossref_metadata(raw_data)
-            detected_type = metadata.get("type", "journal-article")
-
-        if citation_request.source_type:
-            detected_type = citation_request.source_type
-            metadata["type"] = citation_request.source_type
-
-        citation = format_citation(metadata, style)
+        metadata, detected_type, input_type = await resolve_citation_metadata(
+            citation_request.input, citation_request.source_type
+        )
+
+        citations = format_citations(metadata, styles)
         
         return CitationResponse(
-            citation=citation,
+            citation=citations[style],
             detected_type=detected_type,
             input_type=input_type,
-            metadata=metadata
+            metadata=metadata,
+            citations=citations
         )
         
     except HTTPException:
@@ -521,3 +466,82 @@ async def generate_citation(request: Request, citation_request: CitationRequest)
             status_code=500,
             detail=f"Failed to generate citation: {str(e)}"
         )
+
+
+@router.post("/api/citation/bulk")
+@limiter.limit(RATE_LIMITS["ai"])
+async def generate_bibliography(request: Request, bulk_request: BulkCitationRequest):
+    """
+    Generate a bibliography from many DOIs, URLs, and titles in one request.
+
+    - Inputs are deduplicated, then resolved concurrently (bounded by `concurrency`)
+    - At most CITATION_BULK_MAX_AI_URLS URLs are sent to the LLM; further URLs
+      without usable page metadata get a 429 entry
+    - Response is NDJSON: one `entry` line per unique input as it completes,
+      followed by a final `bibliography` line with the alphabetized list
+
+    Each entry line carries either `citation` or `error`; one failing source
+    does not fail the rest of the bibliography.
+    """
+
+    style = validate_style(bulk_request.style)
+
+    unique_inputs = {}
+    for raw_input in bulk_request.inputs:
+        if len(raw_input.strip()) < 3:
+            continue
+        unique_inputs.setdefault(normalize_bulk_input(raw_input), raw_input.strip())
+
+    if not unique_inputs:
+        raise HTTPException(status_code=400, detail="Please provide at least one valid source.")
+
+    concurrency = bulk_request.concurrency or BULK_DEFAULT_CONCURRENCY
+    semaphore = asyncio.Semaphore(min(concurrency, BULK_MAX_CONCURRENCY))
+    ai_budget = AIBudget(BULK_MAX_AI_URLS)
+
+    async def resolve_one(index: int, input_text: str) -> tuple:
+        entry = {"event": "entry", "index": index, "input": input_text}
+        metadata = None
+        async with semaphore:
+            try:
+                metadata, detected_type, input_type = await resolve_citation_metadata(input_text, ai_budget=ai_budget)
+                entry.update({
+                    "citation": format_citations(metadata, [style])[style],
+                    "detected_type": detected_type,
+                    "input_type": input_type,
+                })
+            except HTTPException as e:
+                entry.update({"error": e.detail, "status_code": e.status_code})
+            except Exception as e:
+                entry.update({"error": f"Failed to generate citation: {str(e)}", "status_code": 500})
+        return metadata, entry
+
+    async def stream_entries():
+        tasks = [
+            asyncio.create_task(resolve_one(i, input_text))
+            for i, input_text in enumerate(unique_inputs.values())
+        ]
+        resolved = []
+        failed = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                metadata, entry = await finished
+                if "citation" in entry:
+                    resolved.append((metadata, entry["citation"]))
+                else:
+                    failed += 1
+                yield json.dumps(entry) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield json.dumps({
+            "event": "bibliography",
+            "style": style,
+            "entries": build_bibliography(resolved, style),
+            "total_inputs": len(bulk_request.inputs),
+            "unique_inputs": len(unique_inputs),
+            "failed": failed,
+        }) + "\n"
+
+    return StreamingResponse(stream_entries(), media_type="application/x-ndjson")
@@ -0,0 +1,223 @@
+"""
+Local CrossRef title index for the citation generator.
+
+Works are stored in SQLite with an FTS5 index over their titles, so title
+searches can be answered locally (BM25 candidates, re-ranked by fuzzy title
+similarity) before falling back to the remote CrossRef search API.
+
+The index is filled from two sources:
+- CrossRef metadata dumps (JSONL, optionally gzipped) via the import command
+- Works fetched from CrossRef at runtime, which are added as they arrive
+
+Build an index from dumps:
+    python -m modules.citation_index import works-0001.jsonl.gz works-0002.jsonl.gz
+"""
+
+import argparse
+import difflib
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+from typing import Iterable, Iterator, Optional
+
+INDEX_PATH = os.getenv("CITATION_INDEX_PATH", "backend/data/citation_index.db")
+MATCH_THRESHOLD = float(os.getenv("CITATION_INDEX_MATCH_THRESHOLD", "0.9"))
+CANDIDATE_LIMIT = 10
+IMPORT_BATCH_SIZE = 5000
+
+# Fields kept from each CrossRef work, matching the remote title search `select`
+STORED_FIELDS = (
+    "DOI", "title", "author", "published-print", "published-online", "created",
+    "container-title", "volume", "issue", "page", "publisher", "type",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    id INTEGER PRIMARY KEY,
+    doi TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(
+    title, content='works', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS works_ai AFTER INSERT ON works BEGIN
+    INSERT INTO works_fts(rowid, title) VALUES (new.id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS works_ad AFTER DELETE ON works BEGIN
+    INSERT INTO works_fts(works_fts, rowid, title) VALUES ('delete', old.id, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS works_au AFTER UPDATE ON works BEGIN
+    INSERT INTO works_fts(works_fts, rowid, title) VALUES ('delete', old.id, old.title);
+    INSERT INTO works_fts(rowid, title) VALUES (new.id, new.title);
+END;
+"""
+
+UPSERT_SQL = """
+INSERT INTO works (doi, title, data) VALUES (?, ?, ?)
+ON CONFLICT(doi) DO UPDATE SET title = excluded.title, data = excluded.data
+"""
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+_schema_ready = set()
+
+
+def connect(path: str = INDEX_PATH) -> sqlite3.Connection:
+    """Open the index database, creating the schema on first use."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    if path not in _schema_ready:
+        conn.executescript(SCHEMA)
+        _schema_ready.add(path)
+    return conn
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a title and collapse it to its word tokens."""
+    return " ".join(TOKEN_PATTERN.findall(title.casefold()))
+
+
+def build_match_query(title: str, operator: str = "AND") -> Optional[str]:
+    """Turn free text into an FTS5 query joining the quoted title tokens."""
+    tokens = TOKEN_PATTERN.findall(title.casefold())
+    if not tokens:
+        return None
+    return f" {operator} ".join(f'"{token}"' for token in dict.fromkeys(tokens))
+
+
+def compact_work(item: dict) -> Optional[tuple]:
+    """Reduce a CrossRef work to an index row (doi, title, data)."""
+    doi = item.get("DOI")
+    titles = item.get("title") or []
+    if not doi or not titles or not titles[0]:
+        return None
+    data = {field: item[field] for field in STORED_FIELDS if field in item}
+    return doi.lower(), titles[0], json.dumps(data, separators=(",", ":"))
+
+
+def add_work(item: dict, path: str = INDEX_PATH) -> None:
+    """Add or refresh a single CrossRef work in the index."""
+    row = compact_work(item)
+    if row is None:
+        return
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute(UPSERT_SQL, row)
+    finally:
+        conn.close()
+
+
+def search_title(title: str, path: str = INDEX_PATH, threshold: float = MATCH_THRESHOLD) -> Optional[dict]:
+    """
+    Find the best local match for a title.
+
+    BM25 picks the candidates (all title words first, any word as a
+    fallback), then each candidate is scored by fuzzy similarity to the
+    query. Returns the stored CrossRef work, or None when no candidate
+    reaches the threshold.
+    """
+    if not os.path.exists(path) or build_match_query(title) is None:
+        return None
+
+    conn = connect(path)
+    try:
+        rows = []
+        for operator in ("AND", "OR"):
+            rows = conn.execute(
+                "SELECT works.title, works.data FROM works_fts "
+                "JOIN works ON works.id = works_fts.rowid "
+                "WHERE works_fts MATCH ? ORDER BY bm25(works_fts) LIMIT ?",
+                (build_match_query(title, operator), CANDIDATE_LIMIT),
+            ).fetchall()
+            if rows:
+                break
+    finally:
+        conn.close()
+
+    wanted = normalize_title(title)
+    best_score, best_data = 0.0, None
+    for candidate_title, data in rows:
+        score = difflib.SequenceMatcher(None, wanted, normalize_title(candidate_title)).ratio()
+        if score > best_score:
+            best_score, best_data = score, data
+
+    if best_data is None or best_score < threshold:
+        return None
+    return json.loads(best_data)
+
+
+def iter_dump_items(file_path: str) -> Iterator[dict]:
+    """Yield CrossRef works from a JSONL dump (plain or gzipped)."""
+    opener = gzip.open if file_path.endswith(".gz") else open
+    with opener(file_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            # Accept both bare works and API-style {"message": work} envelopes
+            if "message" in item and isinstance(item["message"], dict):
+                item = item["message"]
+            yield item
+
+
+def import_items(items: Iterable[dict], path: str = INDEX_PATH) -> int:
+    """Bulk-load works into the index in batched transactions."""
+    conn = connect(path)
+    imported = 0
+    batch = []
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for item in items:
+            row = compact_work(item)
+            if row is None:
+                continue
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                with conn:
+                    conn.executemany(UPSERT_SQL, batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            with conn:
+                conn.executemany(UPSERT_SQL, batch)
+            imported += len(batch)
+        with conn:
+            conn.execute("INSERT INTO works_fts(works_fts) VALUES ('optimize')")
+    finally:
+        conn.close()
+    return imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local CrossRef title index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import CrossRef JSONL dumps")
+    import_parser.add_argument("files", nargs="+", help="JSONL or JSONL.gz files")
+    import_parser.add_argument("--db", default=INDEX_PATH, help="Index database path")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        total = 0
+        for file_path in args.files:
+            count = import_items(iter_dump_items(file_path), args.db)
+            print(f"{file_path}: imported {count} works")
+            total += count
+        print(f"Done. {total} works imported into {args.db}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
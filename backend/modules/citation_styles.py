@@ -0,0 +1,260 @@
+"""
+Declarative citation styles for the citation generator.
+
+Each style is a list of parts written in a small template language and
+compiled to Python source once at startup. Requesting several styles
+compiles them into one renderer, so a record's fields and author names
+are normalized once and every style is produced in a single pass.
+
+Template syntax (parts are joined with a single space):
+- `{field}`    value of a metadata field; the part is skipped if it is empty
+- `{?field}`   requires the field to be truthy, renders nothing
+- `{!field}`   requires the field to be falsy, renders nothing
+- `<...>`      optional group, dropped if any field inside is empty
+- `a|b`        alternatives; the first one whose fields are all present wins
+
+`{authors}` renders the author list using the style's `names` and `join` rules.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+def _inverted_names(authors: List[tuple]) -> List[str]:
+    """Family, A.B."""
+    return [f"{family}, {''.join(initials)}".strip(", ") for family, initials in authors]
+
+
+def _initials_first_names(authors: List[tuple]) -> List[str]:
+    """A. B. Family"""
+    return [f"{' '.join(initials)} {family}".strip() for family, initials in authors]
+
+
+def _join_ampersand_serial(names: List[str]) -> str:
+    if len(names) == 1:
+        return names[0]
+    if len(names) == 2:
+        return f"{names[0]} & {names[1]}"
+    return ", ".join(names[:-1]) + f", & {names[-1]}"
+
+
+def _join_et_al_after_three(names: List[str]) -> str:
+    if len(names) <= 3:
+        return ", ".join(names)
+    return ", ".join(names[:3]) + " et al."
+
+
+def _join_and_or_et_al(names: List[str]) -> str:
+    if len(names) == 1:
+        return names[0]
+    if len(names) == 2:
+        return f"{names[0]} and {names[1]}"
+    return f"{names[0]} et al."
+
+
+NAME_FORMATS: Dict[str, Callable[[List[tuple]], List[str]]] = {
+    "inverted": _inverted_names,
+    "initials_first": _initials_first_names,
+}
+
+AUTHOR_JOINS: Dict[str, Callable[[List[str]], str]] = {
+    "ampersand_serial": _join_ampersand_serial,
+    "et_al_after_three": _join_et_al_after_three,
+    "and_or_et_al": _join_and_or_et_al,
+}
+
+
+STYLE_DEFINITIONS = {
+    # APA 7th edition
+    "apa": {
+        "names": "inverted",
+        "join": "ampersand_serial",
+        "parts": [
+            "{authors}",
+            "({year}).|(n.d.).",
+            "{title}.",
+            "*{journal}*<, *{volume}*<({issue})>><, {pages}>.",
+            "{?website}*{site_name}*.",
+            "https://doi.org/{doi}|{?website}Retrieved {access_date}, from {url}|{?website}{url}",
+        ],
+    },
+    "ieee": {
+        "names": "initials_first",
+        "join": "et_al_after_three",
+        "parts": [
+            "{authors}",
+            '"{title},"',
+            "*{journal}*,",
+            "vol. {volume}<, no. {issue}><, pp. {pages}><, {year}>.|{year}.",
+            "doi: {doi}.",
+            "{!doi}{?website}{?url}*{site_name}*.",
+            "{!doi}{?website}[Online]. Available: {url}",
+            "{!doi}{?website}{?url}[Accessed: {access_date}].",
+        ],
+    },
+    "harvard": {
+        "names": "inverted",
+        "join": "and_or_et_al",
+        "parts": [
+            "{authors}",
+            "({year})|(n.d.)",
+            "'{title}',",
+            "*{journal}*<, {volume}<({issue})>><, pp. {pages}>.",
+            "{?website}*{site_name}*.",
+            "{?website}Available at: {url}",
+            "{?website}{?url}(Accessed: {access_date}).",
+            "{!website}doi: {doi}.",
+        ],
+    },
+}
+
+
+# Fields computed from metadata rather than read from it (Python source)
+DERIVED_FIELDS = {
+    "website": "metadata.get('type') == 'website'",
+}
+
+
+def _parse(template: str, pos: int = 0, closing: Optional[str] = None) -> tuple:
+    """Parse a template into a list of (kind, value) nodes."""
+    nodes = []
+    literal = []
+    while pos < len(template):
+        char = template[pos]
+        if char == closing:
+            break
+        if char in "{<":
+            if literal:
+                nodes.append(("text", "".join(literal)))
+                literal = []
+            if char == "{":
+                end = template.index("}", pos)
+                name = template[pos + 1:end]
+                if name[0] == "?":
+                    nodes.append(("truthy", name[1:]))
+                elif name[0] == "!":
+                    nodes.append(("falsy", name[1:]))
+                else:
+                    nodes.append(("field", name))
+                pos = end + 1
+            else:
+                children, pos = _parse(template, pos + 1, ">")
+                nodes.append(("optional", children))
+                pos += 1
+            continue
+        literal.append(char)
+        pos += 1
+    if literal:
+        nodes.append(("text", "".join(literal)))
+    return nodes, pos
+
+
+def _variable(name: str) -> str:
+    return "f_" + re.sub(r"\W", "_", name)
+
+
+def _compile_nodes(nodes: list, fields: set) -> tuple:
+    """Compile parsed nodes into (conditions, expression) Python source."""
+    conditions = []
+    pieces = []
+    for kind, value in nodes:
+        if kind == "text":
+            pieces.append(repr(value))
+        elif kind == "optional":
+            inner_conditions, inner_expr = _compile_nodes(value, fields)
+            if inner_conditions:
+                pieces.append(f"({inner_expr} if {' and '.join(inner_conditions)} else '')")
+            else:
+                pieces.append(inner_expr)
+        else:
+            fields.add(value)
+            variable = _variable(value)
+            if kind == "field":
+                conditions.append(variable)
+                pieces.append(f"str({variable})")
+            elif kind == "truthy":
+                conditions.append(variable)
+            else:
+                conditions.append(f"not {variable}")
+    return conditions, " + ".join(pieces) or "''"
+
+
+def _compile_style_body(name: str, definition: dict, fields: set) -> List[str]:
+    """Generate the source lines that render one style into `rendered[name]`."""
+    lines = [
+        f"    {_variable('authors')} = join_{name}(names_{definition['names']}) "
+        f"if names_{definition['names']} else ''",
+        "    parts = []",
+    ]
+    for part in definition["parts"]:
+        keyword = "if"
+        for alternative in part.split("|"):
+            conditions, expr = _compile_nodes(_parse(alternative)[0], fields)
+            if conditions:
+                lines.append(f"    {keyword} {' and '.join(conditions)}:")
+                keyword = "elif"
+            elif keyword == "if":
+                lines.append("    if True:")
+            else:
+                lines.append("    else:")
+            lines.append(f"        parts.append({expr})")
+            if not conditions:
+                break
+    lines.append(f"    rendered[{name!r}] = ' '.join(parts)")
+    return lines
+
+
+@lru_cache(maxsize=64)
+def compile_renderer(styles: tuple) -> Callable[[dict], Dict[str, str]]:
+    """
+    Compile one function that renders metadata in every style of `styles`.
+
+    Each field is read once and each author name format is built once,
+    however many of the requested styles use it.
+    """
+    namespace = {"normalize_authors": normalize_authors}
+    fields = set()
+    body = []
+    for name in styles:
+        definition = STYLE_DEFINITIONS[name]
+        namespace[f"join_{name}"] = AUTHOR_JOINS[definition["join"]]
+        body.extend(_compile_style_body(name, definition, fields))
+
+    header = ["def render(metadata):", "    rendered = {}"]
+    for field in sorted(fields - {"authors"}):
+        source = DERIVED_FIELDS.get(field, f"metadata.get({field!r})")
+        header.append(f"    {_variable(field)} = {source}")
+    header.append("    authors = normalize_authors(metadata)")
+    for name_format in dict.fromkeys(STYLE_DEFINITIONS[name]["names"] for name in styles):
+        namespace[f"format_{name_format}"] = NAME_FORMATS[name_format]
+        header.append(f"    names_{name_format} = format_{name_format}(authors)")
+
+    source = "\n".join(header + body + ["    return rendered"])
+    exec(compile(source, f"<citation styles {'+'.join(styles)}>", "exec"), namespace)
+    return namespace["render"]
+
+
+def normalize_authors(metadata: dict) -> List[tuple]:
+    """Extract (family, initials) pairs, skipping authors without a family name."""
+    authors = []
+    for author in metadata.get("authors") or []:
+        family = author.get("family", "")
+        if family:
+            given = author.get("given", "")
+            initials = [n[0] + "." for n in given.split() if n] if given else []
+            authors.append((family, initials))
+    return authors
+
+
+# Compile every style up front so bad definitions fail at startup
+for _style in STYLE_DEFINITIONS:
+    compile_renderer((_style,))
+compile_renderer(tuple(STYLE_DEFINITIONS))
+
+STYLES = tuple(STYLE_DEFINITIONS)
+
+
+def render_styles(metadata: dict, styles: Iterable[str]) -> Dict[str, str]:
+    """Render a record in every requested style in a single pass."""
+    return compile_renderer(tuple(dict.fromkeys(styles)))(metadata)
@@ -1,87 +1,97 @@
-import json
+import asyncio
+import hmac
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Header, Query
 from pydantic import BaseModel
-import httpx
 from dotenv import load_dotenv
 
+from modules.feedback_notifier import get_notifier
+from modules.feedback_store import MAX_PAGE_SIZE, get_store
+
 load_dotenv()
 
+# Pre-SQLite storage; imported into the feedback database on first use
+DATA_FILE = "backend/data/feedback.json"
+
+
+def notifications_enabled() -> bool:
+    return bool(os.getenv("RESEND_API_KEY") and os.getenv("MAIL_TO"))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if notifications_enabled():
+        # Email whatever was stored but not sent before the last shutdown
+        store = await asyncio.to_thread(get_store, DATA_FILE)
+        get_notifier(store).resume()
+    yield
+
+
 router = APIRouter(
     prefix="/api/feedback",
-    tags=["feedback"]
+    tags=["feedback"],
+    lifespan=lifespan,
 )
 
-DATA_FILE = "backend/data/feedback.json"
 
 class FeedbackModel(BaseModel):
     type: str = "general"  # 'bug', 'feature', 'other', default 'general'
     message: str
     email: Optional[str] = None
 
-def load_feedback():
-    if not os.path.exists(DATA_FILE):
-        return []
-    try:
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return []
-
-def save_feedback(feedback_list):
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, "w") as f:
-        json.dump(feedback_list, f, indent=2)
-
-async def send_email_notification(feedback: FeedbackModel):
-    api_key = os.getenv("RESEND_API_KEY")
-    recipient = os.getenv("MAIL_TO")
-    
-    if not api_key or not recipient:
-        print("Resend API Key or MAIL_TO missing. Skipping email.")
-        return
-
-    html = f"""
-    <h3>New Feedback Received</h3>
-    <p><strong>Type:</strong> {feedback.type}</p>
-    <p><strong>Message:</strong><br>{feedback.message}</p>
-    <p><strong>User Email:</strong> {feedback.email or 'Anonymous'}</p>
-    """
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://api.resend.com/emails",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "from": "StuDenTools <onboarding@resend.dev>",
-                    "to": [recipient],
-                    "subject": f"StuDenTools Feedback: {feedback.type.title()}",
-                    "html": html
-                }
-            )
-            if response.status_code != 200:
-                print(f"Resend API Error: {response.text}")
-        except Exception as e:
-            print(f"Failed to send email via Resend: {e}")
+def check_admin_token(x_admin_token: Optional[str]):
+    """404 when FEEDBACK_ADMIN_TOKEN is unset (the endpoint is hidden), 401 when the token is wrong."""
+    admin_token = os.getenv("FEEDBACK_ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 
 @router.post("/")
-async def submit_feedback(feedback: FeedbackModel, background_tasks: BackgroundTasks):
+async def submit_feedback(feedback: FeedbackModel):
     try:
-        entries = load_feedback()
         new_entry = feedback.dict()
         new_entry["timestamp"] = datetime.now().isoformat()
-        entries.append(new_entry)
-        save_feedback(entries)
-        
-        if os.getenv("RESEND_API_KEY"):
-            background_tasks.add_task(send_email_notification, feedback)
+        # The first call opens the database and imports the JSON file
+        store = await asyncio.to_thread(get_store, DATA_FILE)
+        # Created before the insert so its starting point excludes only older entries
+        notifier = get_notifier(store) if notifications_enabled() else None
+        # SQLite may wait on other writers, so keep it off the event loop
+        await asyncio.to_thread(store.add, new_entry)
+
+        if notifier:
+            # Batched into a digest email, see feedback_notifier
+            notifier.notify()
         
         return {"message": "Feedback received successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/")
+async def list_feedback(
+    type: Optional[str] = Query(None, description="Only entries of this type"),
+    since: Optional[str] = Query(None, description="ISO date/time, inclusive"),
+    until: Optional[str] = Query(None, description="ISO date/time, exclusive"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    List feedback newest first, one page at a time.
+
+    - Requires the X-Admin-Token header to match FEEDBACK_ADMIN_TOKEN; disabled when it is unset
+    - Pass next_cursor back as `cursor` for the following page
+    """
+    check_admin_token(x_admin_token)
+
+    store = await asyncio.to_thread(get_store, DATA_FILE)
+    try:
+        entries, next_cursor = await asyncio.to_thread(store.page, type, since, until, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"entries": entries, "next_cursor": next_cursor}
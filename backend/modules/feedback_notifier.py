@@ -0,0 +1,181 @@
+"""
+Digest email notifications for new feedback.
+
+A submission only bumps an in-memory counter. A background task sends one
+Resend email per digest window, counted from the first entry waiting, or
+as soon as DIGEST_MAX_ITEMS entries are waiting. Which entries still need
+sending is tracked per entry in the feedback store, so entries left unsent
+at shutdown go out when the app starts again, and two workers never email
+the same entry. Sends share one pooled httpx
+client and retry 429/5xx and connection errors with jittered exponential
+backoff.
+"""
+
+import asyncio
+import html
+import os
+import random
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import httpx
+
+from modules.feedback_store import FeedbackStore
+
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com/emails")
+DIGEST_WINDOW_SECONDS = float(os.getenv("FEEDBACK_DIGEST_WINDOW_SECONDS", "300"))
+DIGEST_MAX_ITEMS = int(os.getenv("FEEDBACK_DIGEST_MAX_ITEMS", "50"))
+
+SEND_TIMEOUT = 15.0
+SEND_MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared Resend client, so digests reuse one keep-alive connection."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+            timeout=SEND_TIMEOUT,
+        )
+    return _client
+
+
+def backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Full-jitter exponential backoff, honouring Retry-After when Resend sends one."""
+    if response is not None:
+        try:
+            retry_after = response.headers.get("retry-after")
+            if retry_after is not None:
+                return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def render_digest(entries: List[dict]) -> Tuple[str, str]:
+    """Subject and HTML body for one email covering `entries`."""
+    counts = Counter(entry["type"] for entry in entries)
+    if len(entries) == 1:
+        subject = f"StuDenTools Feedback: {entries[0]['type'].title()}"
+    else:
+        summary = ", ".join(f"{count} {kind}" for kind, count in counts.most_common())
+        subject = f"StuDenTools Feedback: {len(entries)} new ({summary})"
+
+    items = "".join(
+        f"""
+    <hr>
+    <p><strong>Type:</strong> {html.escape(entry['type'])} &middot; {html.escape(entry['timestamp'])}</p>
+    <p><strong>Message:</strong><br>{html.escape(entry['message']).replace(chr(10), '<br>')}</p>
+    <p><strong>User Email:</strong> {html.escape(entry['email'] or 'Anonymous')}</p>
+    """
+        for entry in entries
+    )
+    heading = "New Feedback Received" if len(entries) == 1 else f"{len(entries)} New Feedback Entries"
+    return subject, f"<h3>{heading}</h3>{items}"
+
+
+async def send_email(subject: str, body: str) -> bool:
+    """Send one email through Resend, retrying transient failures. Returns whether it was accepted."""
+    api_key = os.getenv("RESEND_API_KEY")
+    recipient = os.getenv("MAIL_TO")
+    if not api_key or not recipient:
+        print("Resend API Key or MAIL_TO missing. Skipping email.")
+        return False
+
+    for attempt in range(SEND_MAX_RETRIES + 1):
+        response = None
+        try:
+            response = await get_client().post(
+                RESEND_API_URL,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json={
+                    "from": "StuDenTools <onboarding@resend.dev>",
+                    "to": [recipient],
+                    "subject": subject,
+                    "html": body,
+                },
+            )
+            if response.is_success:
+                return True
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                print(f"Resend API Error: {response.text}")
+                return False
+        except httpx.TransportError as e:
+            print(f"Failed to send email via Resend: {e}")
+        if attempt < SEND_MAX_RETRIES:
+            await asyncio.sleep(backoff_delay(attempt, response))
+    print("Resend still failing after retries; feedback will be included in the next digest")
+    return False
+
+
+class DigestNotifier:
+    """Batches feedback notifications into digest emails."""
+
+    def __init__(self, store: FeedbackStore, window_seconds: float = DIGEST_WINDOW_SECONDS,
+                 max_items: int = DIGEST_MAX_ITEMS):
+        self.store = store
+        self.window_seconds = window_seconds
+        self.max_items = max_items
+        self.pending = 0
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.emails_sent = 0
+        store.start_notifications()
+
+    def notify(self):
+        """Record that an entry was stored; starts the digest window if none is open."""
+        self.pending += 1
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        if self.pending >= self.max_items:
+            self.wakeup.set()
+
+    def resume(self):
+        """Send entries a previous run stored but never emailed, then batch as usual."""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run(flush_first=True))
+
+    async def run(self, flush_first: bool = False):
+        if flush_first and not await self.flush():
+            self.pending = max(self.pending, 1)
+        while self.pending:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.window_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            self.pending = 0
+            if not await self.flush():
+                # Entries were handed back to the store; try again next window
+                self.pending = max(self.pending, 1)
+
+    async def flush(self) -> bool:
+        """Send every waiting entry, max_items per email. Returns False if a send failed."""
+        while True:
+            entries = await asyncio.to_thread(self.store.claim_unnotified, self.max_items)
+            if not entries:
+                return True
+            subject, body = render_digest(entries)
+            if not await send_email(subject, body):
+                await asyncio.to_thread(self.store.release, entries)
+                return False
+            await asyncio.to_thread(self.store.mark_notified, entries)
+            self.emails_sent += 1
+            if len(entries) < self.max_items:
+                return True
+
+
+_notifier: Optional[DigestNotifier] = None
+
+
+def get_notifier(store: FeedbackStore) -> DigestNotifier:
+    global _notifier
+    if _notifier is None:
+        _notifier = DigestNotifier(store)
+    return _notifier
@@ -0,0 +1,247 @@
+"""
+Append-only feedback storage in SQLite.
+
+Each submission is one INSERT in WAL mode, so it costs the same at a
+million entries as at ten, and concurrent submissions (from threads or
+worker processes) are serialized by SQLite instead of overwriting each
+other's copy of a JSON file. Entries from the old feedback.json are
+imported once, on first start. Reads are keyset-paginated on
+(timestamp, id) indexes, optionally filtered by type, so a page costs the
+same wherever it is in the history.
+
+Email notification state is kept per row: a claim leases unsent rows to
+one worker until it marks them notified or releases them, and a lease
+left by a worker that died mid-send expires after CLAIM_TIMEOUT_SECONDS.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+FEEDBACK_DB_PATH = os.getenv("FEEDBACK_DB", "backend/data/feedback.db")
+MAX_PAGE_SIZE = 200
+# Longer than a digest send with every retry (see feedback_notifier)
+CLAIM_TIMEOUT_SECONDS = 600
+
+
+def encode_cursor(timestamp: str, entry_id: int) -> str:
+    return f"{timestamp}|{entry_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Split a cursor from a previous page; ValueError if it is malformed."""
+    timestamp, _, entry_id = cursor.rpartition("|")
+    if not timestamp:
+        raise ValueError("malformed cursor")
+    return timestamp, int(entry_id)
+
+
+def to_entry(row: tuple) -> dict:
+    entry_id, type, message, email, timestamp = row
+    return {"id": entry_id, "type": type, "message": message, "email": email, "timestamp": timestamp}
+
+
+class FeedbackStore:
+    """SQLite feedback table with O(1) appends and paginated, indexed reads."""
+
+    def __init__(self, db_path: str = FEEDBACK_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit: every INSERT is its own transaction; migration opens one explicitly
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL syncs at checkpoints rather than on every commit
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS feedback ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, message TEXT NOT NULL, "
+            "email TEXT, timestamp TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS feedback_time ON feedback (timestamp, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS feedback_type_time ON feedback (type, timestamp, id)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS feedback_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._add_notification_columns()
+        self.conn.execute("CREATE INDEX IF NOT EXISTS feedback_unnotified ON feedback (id) WHERE notified = 0")
+
+    def _add_notification_columns(self):
+        """Add per-row notification state to older databases, carrying over the old notified_through mark."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                columns = {row[1] for row in self.conn.execute("PRAGMA table_info(feedback)")}
+                if "notified" not in columns:
+                    self.conn.execute("ALTER TABLE feedback ADD COLUMN notified INTEGER NOT NULL DEFAULT 0")
+                    self.conn.execute("ALTER TABLE feedback ADD COLUMN claimed_until REAL")
+                    mark = self.conn.execute(
+                        "SELECT value FROM feedback_meta WHERE key = 'notified_through'"
+                    ).fetchone()
+                    if mark:
+                        self.conn.execute("UPDATE feedback SET notified = 1 WHERE id <= ?", (int(mark[0]),))
+                        self.conn.execute(
+                            "INSERT OR IGNORE INTO feedback_meta (key, value) VALUES ('notifications_started', ?)",
+                            (mark[0],),
+                        )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def add(self, entry: dict) -> int:
+        """Append one entry and return its id."""
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO feedback (type, message, email, timestamp) VALUES (?, ?, ?, ?)",
+                (entry["type"], entry["message"], entry.get("email"), entry["timestamp"]),
+            )
+        return cursor.lastrowid
+
+    def migrate_json(self, path: str) -> int:
+        """
+        Import a legacy feedback.json once and rename it to *.migrated.
+
+        The import and its marker are one transaction, so workers starting
+        together import it exactly once. Returns the number of entries imported.
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not read {path} for migration: {e}")
+            return 0
+
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                done = self.conn.execute("SELECT 1 FROM feedback_meta WHERE key = 'json_migrated'").fetchone()
+                if not done:
+                    now = datetime.now().isoformat()
+                    self.conn.executemany(
+                        "INSERT INTO feedback (type, message, email, timestamp) VALUES (?, ?, ?, ?)",
+                        (
+                            (e.get("type") or "general", e.get("message") or "", e.get("email"), e.get("timestamp") or now)
+                            for e in entries if isinstance(e, dict)
+                        ),
+                    )
+                    self.conn.execute(
+                        "INSERT INTO feedback_meta (key, value) VALUES ('json_migrated', ?)", (now,)
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        if done:
+            return 0
+
+        try:
+            os.replace(path, path + ".migrated")
+        except OSError:
+            pass
+        print(f"Migrated {len(entries)} feedback entries from {path}")
+        return len(entries)
+
+    def page(self, type: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+             limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Newest-first page of entries, filtered by type and [since, until) on
+        the ISO timestamp. Returns (entries, cursor for the next page or None).
+        """
+        clauses, params = [], []
+        if type:
+            clauses.append("type = ?")
+            params.append(type)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if cursor:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT id, type, message, email, timestamp FROM feedback {where} "
+                "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        entries = [to_entry(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][4], rows[limit - 1][0]) if len(rows) > limit else None
+        return entries, next_cursor
+
+    def start_notifications(self):
+        """Begin notifying from the newest entry, so enabling email does not send the whole history."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                started = self.conn.execute(
+                    "INSERT OR IGNORE INTO feedback_meta (key, value) "
+                    "SELECT 'notifications_started', COALESCE(MAX(id), 0) FROM feedback"
+                ).rowcount
+                if started:
+                    self.conn.execute("UPDATE feedback SET notified = 1 WHERE notified = 0")
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def claim_unnotified(self, limit: int, lease_seconds: float = CLAIM_TIMEOUT_SECONDS) -> List[dict]:
+        """
+        Oldest unsent entries that no other worker holds, leased to the caller
+        in the same transaction so two workers never claim the same entry.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT id, type, message, email, timestamp FROM feedback "
+                    "WHERE notified = 0 AND (claimed_until IS NULL OR claimed_until <= ?) ORDER BY id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                self.conn.executemany(
+                    "UPDATE feedback SET claimed_until = ? WHERE id = ?", ((now + lease_seconds, row[0]) for row in rows)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [to_entry(row) for row in rows]
+
+    def mark_notified(self, entries: List[dict]):
+        """Record that claimed entries were sent."""
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE feedback SET notified = 1, claimed_until = NULL WHERE id = ?", ((e["id"],) for e in entries)
+            )
+
+    def release(self, entries: List[dict]):
+        """Give claimed entries back after a failed send, so the next claim picks them up."""
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE feedback SET claimed_until = NULL WHERE id = ? AND notified = 0", ((e["id"],) for e in entries)
+            )
+
+
+_store: Optional[FeedbackStore] = None
+
+
+def get_store(legacy_json_path: Optional[str] = None) -> FeedbackStore:
+    """Shared store, opened (and the legacy JSON file migrated) on first use."""
+    global _store
+    if _store is None:
+        _store = FeedbackStore()
+        if legacy_json_path:
+            _store.migrate_json(legacy_json_path)
+    return _store
@@ -1,9 +1,22 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+import asyncio
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from modules.spreadsheets import iter_frames, sheet_format
+
 router = APIRouter()
 
+# Rate limiting
+from rate_limiter import limiter, RATE_LIMITS
+
+GRADE_COLUMNS = ("student", "course", "grade", "credits")
+# Students per block of the streamed CSV
+CSV_BLOCK_ROWS = 10_000
+
 
 class Course(BaseModel):
     name: Optional[str] = Field(default=None, description="Course name (optional)")
@@ -23,6 +36,64 @@ class GPAResponse(BaseModel):
     scale_type: str
 
 
+class Term(BaseModel):
+    name: Optional[str] = Field(default=None, description="Term name (optional)")
+    courses: List[Course] = Field(..., min_length=1, description="Courses taken in the term")
+
+
+class CumulativeRequest(BaseModel):
+    terms: List[Term] = Field(..., min_length=1, description="Terms in chronological order")
+    scale_type: str = Field(default="4.0", description="GPA scale: '4.0' or '5.0'")
+
+
+class TermResult(BaseModel):
+    name: Optional[str]
+    gpa: float
+    credits: float
+    cgpa: float = Field(..., description="Cumulative GPA up to and including this term")
+
+
+class CumulativeResponse(BaseModel):
+    terms: List[TermResult]
+    cgpa: float
+    total_points: float = Field(..., description="Running total of grade points x credits; send back for updates")
+    total_credits: float
+    scale_type: str
+
+
+class GradeChange(BaseModel):
+    credits: float = Field(..., gt=0, description="Credit hours of the course")
+    old_grade: Optional[str] = Field(default=None, description="Grade being replaced; omit to add a course")
+    new_grade: Optional[str] = Field(default=None, description="Grade it becomes; omit to remove a course")
+
+
+class CumulativeUpdateRequest(BaseModel):
+    total_points: float = Field(..., ge=0, description="total_points from the previous response")
+    total_credits: float = Field(..., ge=0, description="total_credits from the previous response")
+    add_terms: List[Term] = Field(default=[], description="New terms to add")
+    changes: List[GradeChange] = Field(default=[], description="Grades added, changed or removed in earlier terms")
+    scale_type: str = Field(default="4.0", description="GPA scale: '4.0' or '5.0'")
+
+
+class TargetRequest(BaseModel):
+    total_points: float = Field(..., ge=0, description="Running total of grade points x credits so far")
+    total_credits: float = Field(..., ge=0, description="Credits completed so far")
+    target_cgpa: float = Field(..., ge=0, description="Cumulative GPA to reach")
+    next_credits: float = Field(..., gt=0, description="Credits still to be taken (e.g. next term)")
+    scale_type: str = Field(default="4.0", description="GPA scale: '4.0' or '5.0'")
+
+
+class TargetResponse(BaseModel):
+    current_cgpa: float
+    target_cgpa: float
+    required_gpa: float = Field(..., description="GPA needed over next_credits to reach the target exactly")
+    required_grade: Optional[str] = Field(..., description="Lowest grade that reaches the target if earned in every course, or null if none can")
+    achievable: bool
+    max_cgpa: float = Field(..., description="Cumulative GPA with the top grade in every remaining course")
+    min_cgpa: float = Field(..., description="Cumulative GPA with the lowest grade in every remaining course")
+    message: str
+
+
 SCALE_4_0 = {
     "A": 4.0,
     "B": 3.0,
@@ -73,6 +144,107 @@ def calculate_gpa(request: GPARequest) -> dict:
     }
 
 
+class RunningTotals:
+    """
+    Grade points and credits accumulated across terms.
+
+    Only the two sums are kept, so adding a term costs one pass over that
+    term's courses and changing a grade is O(1), however long the history.
+    """
+
+    def __init__(self, scale_map: dict, points: float = 0.0, credits: float = 0.0):
+        self.scale_map = scale_map
+        self.points = points
+        self.credits = credits
+
+    def add_course(self, grade: str, credits: float):
+        self.points += get_grade_points(grade, self.scale_map) * credits
+        self.credits += credits
+
+    def remove_course(self, grade: str, credits: float):
+        if credits > self.credits + 1e-9:
+            raise HTTPException(status_code=400, detail="Cannot remove more credits than have been recorded")
+        self.points = max(self.points - get_grade_points(grade, self.scale_map) * credits, 0.0)
+        self.credits = max(self.credits - credits, 0.0)
+
+    def add_term(self, term: Term) -> Tuple[float, float]:
+        """Add a term's courses; returns that term's (points, credits)."""
+        points = sum(get_grade_points(course.grade, self.scale_map) * course.credits for course in term.courses)
+        credits = sum(course.credits for course in term.courses)
+        self.points += points
+        self.credits += credits
+        return points, credits
+
+    def apply(self, change: GradeChange):
+        if change.old_grade is None and change.new_grade is None:
+            raise HTTPException(status_code=400, detail="Each change needs an old_grade, a new_grade or both")
+        if change.old_grade is not None:
+            self.remove_course(change.old_grade, change.credits)
+        if change.new_grade is not None:
+            self.add_course(change.new_grade, change.credits)
+
+    @property
+    def gpa(self) -> float:
+        return round(self.points / self.credits, 2) if self.credits > 0 else 0.0
+
+    def required_gpa(self, target: float, next_credits: float) -> float:
+        """Average grade points needed over `next_credits` for the cumulative GPA to reach `target`."""
+        return (target * (self.credits + next_credits) - self.points) / next_credits
+
+    def cgpa_with(self, grade_points: float, next_credits: float) -> float:
+        return round((self.points + grade_points * next_credits) / (self.credits + next_credits), 2)
+
+
+def invalid_row(rows: pd.Index, mask: np.ndarray) -> Optional[int]:
+    """Spreadsheet row number of the first True in `mask`, or None."""
+    return int(rows[mask.argmax()]) if mask.any() else None
+
+
+def grade_totals(upload: UploadFile, scale_map: dict) -> pd.DataFrame:
+    """
+    Per-student grade points, credits and course counts, read and reduced one
+    chunk at a time so memory grows with the number of students, not rows.
+    Grades are looked up like get_grade_points: case-insensitive, unknown = 0.
+    """
+    totals = None
+    for chunk in iter_frames(upload, GRADE_COLUMNS):
+        # Factorize, then clean and look up only the distinct values
+        student_codes, students = pd.factorize(chunk["student"])
+        grade_codes, grades = pd.factorize(chunk["grade"])
+        students = [str(student).strip() for student in students.tolist()]
+        grades = [str(grade).strip().upper() for grade in grades.tolist()]
+        credits = pd.to_numeric(chunk["credits"], errors="coerce").to_numpy()
+
+        # Missing cells get code -1, which indexes the trailing True
+        blank_students = np.array([not student for student in students] + [True])
+        blank_grades = np.array([not grade for grade in grades] + [True])
+        bad = invalid_row(chunk.index, blank_students[student_codes] | blank_grades[grade_codes])
+        if bad is not None:
+            raise HTTPException(status_code=400, detail=f"Row {bad}: student and grade are required")
+        bad = invalid_row(chunk.index, ~(credits > 0))
+        if bad is not None:
+            raise HTTPException(status_code=400, detail=f"Row {bad}: credits must be a number greater than 0")
+
+        points = np.array([get_grade_points(grade, scale_map) for grade in grades])[grade_codes]
+        part = pd.DataFrame({
+            "points": np.bincount(student_codes, weights=points * credits, minlength=len(students)),
+            "total_credits": np.bincount(student_codes, weights=credits, minlength=len(students)),
+            "total_courses": np.bincount(student_codes, minlength=len(students)),
+        }, index=students)
+        totals = part if totals is None else pd.concat([totals, part])
+        # Names that only differ by surrounding spaces, or repeat across chunks, are merged here
+        totals = totals.groupby(level=0, sort=False).sum()
+
+    if totals is None or totals.empty:
+        raise HTTPException(status_code=400, detail="The file has no grade rows")
+    return totals
+
+
+def iter_csv(results: pd.DataFrame):
+    for start in range(0, len(results), CSV_BLOCK_ROWS):
+        yield results.iloc[start:start + CSV_BLOCK_ROWS].to_csv(index=False, header=start == 0)
+
+
 @router.post("/api/gpa", response_model=GPAResponse)
 async def calculate_gpa_endpoint(request: GPARequest):
     """
@@ -114,3 +286,143 @@ async def get_grade_scales():
         },
         "available_grades": list(SCALE_4_0.keys())
     }
+
+
+@router.post("/api/gpa/bulk")
+@limiter.limit(RATE_LIMITS["file_processing"])
+async def calculate_bulk_gpa(
+    request: Request,
+    file: UploadFile = File(..., description="CSV or XLSX with student, course, grade and credits columns"),
+    scale_type: str = Form(default="4.0", description="GPA scale: '4.0' or '5.0'"),
+):
+    """
+    Calculate GPAs for a whole class from one grade sheet.
+
+    - One row per course taken: student, course, grade, credits
+    - Grades are mapped like /api/gpa (unknown grades count as 0 points)
+    - Returns CSV: student, gpa, total_credits, total_courses
+
+    Response Headers:
+    - X-Cohort-GPA: Credit-weighted GPA over every row
+    - X-Cohort-Students: Number of students
+    - X-Cohort-Total-Credits: Credits across the cohort
+    """
+    sheet_format(file.filename)
+    scale_map = SCALE_5_0 if scale_type == "5.0" else SCALE_4_0
+
+    totals = await asyncio.to_thread(grade_totals, file, scale_map)
+    # Python's round, so results match /api/gpa to the last digit
+    totals["gpa"] = [round(points / credits, 2) for points, credits in zip(totals["points"], totals["total_credits"])]
+    results = totals.rename_axis("student").reset_index()[["student", "gpa", "total_credits", "total_courses"]]
+
+    cohort_credits = float(totals["total_credits"].sum())
+    return StreamingResponse(
+        iter_csv(results),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": 'attachment; filename="gpa_results.csv"',
+            "X-Cohort-GPA": str(round(float(totals["points"].sum()) / cohort_credits, 2)),
+            "X-Cohort-Students": str(len(results)),
+            "X-Cohort-Total-Credits": str(round(cohort_credits, 2)),
+        },
+    )
+
+
+@router.post("/api/gpa/cumulative", response_model=CumulativeResponse)
+async def calculate_cumulative_gpa(request: CumulativeRequest):
+    """
+    Calculate term GPAs and the cumulative GPA (CGPA) across terms.
+
+    - Returns running totals (total_points, total_credits) that can be sent to
+      /api/gpa/cumulative/update and /api/gpa/target instead of the full history
+    """
+    scale_map = SCALE_5_0 if request.scale_type == "5.0" else SCALE_4_0
+    totals = RunningTotals(scale_map)
+    results = []
+    for term in request.terms:
+        points, credits = totals.add_term(term)
+        results.append(TermResult(
+            name=term.name,
+            gpa=round(points / credits, 2),
+            credits=credits,
+            cgpa=totals.gpa,
+        ))
+
+    return CumulativeResponse(
+        terms=results,
+        cgpa=totals.gpa,
+        total_points=totals.points,
+        total_credits=totals.credits,
+        scale_type=request.scale_type,
+    )
+
+
+@router.post("/api/gpa/cumulative/update", response_model=CumulativeResponse)
+async def update_cumulative_gpa(request: CumulativeUpdateRequest):
+    """
+    Update running totals without resending earlier terms.
+
+    - add_terms: new terms, each costing only its own courses
+    - changes: a grade changed (old_grade and new_grade), a course added (new_grade)
+      or removed (old_grade); each change is O(1)
+    """
+    scale_map = SCALE_5_0 if request.scale_type == "5.0" else SCALE_4_0
+    totals = RunningTotals(scale_map, request.total_points, request.total_credits)
+    for change in request.changes:
+        totals.apply(change)
+
+    results = []
+    for term in request.add_terms:
+        points, credits = totals.add_term(term)
+        results.append(TermResult(name=term.name, gpa=round(points / credits, 2), credits=credits, cgpa=totals.gpa))
+
+    return CumulativeResponse(
+        terms=results,
+        cgpa=totals.gpa,
+        total_points=totals.points,
+        total_credits=totals.credits,
+        scale_type=request.scale_type,
+    )
+
+
+@router.post("/api/gpa/target", response_model=TargetResponse)
+async def calculate_target_gpa(request: TargetRequest):
+    """
+    What GPA is needed over the next credits to reach a target CGPA.
+
+    Example: 60 credits at 3.2 CGPA (total_points 192), target 3.5 with 18 credits next
+    term needs a term GPA of 4.5, which is above the 4.0 scale, so it is not achievable.
+    """
+    scale_map = SCALE_5_0 if request.scale_type == "5.0" else SCALE_4_0
+    totals = RunningTotals(scale_map, request.total_points, request.total_credits)
+    required = totals.required_gpa(request.target_cgpa, request.next_credits)
+    top, bottom = max(scale_map.values()), min(scale_map.values())
+
+    # Lowest grade that is enough if earned in every remaining course
+    required_grade = None
+    for grade, points in sorted(scale_map.items(), key=lambda item: item[1]):
+        if points >= required - 1e-9:
+            required_grade = grade
+            break
+
+    achievable = required <= top + 1e-9
+    if required <= bottom:
+        message = f"The target is already secured: even all {min(scale_map, key=scale_map.get)} grades keep the CGPA at or above {request.target_cgpa}"
+    elif achievable:
+        message = f"A GPA of {round(required, 2)} over the next {request.next_credits:g} credits reaches a CGPA of {request.target_cgpa}"
+    else:
+        message = (
+            f"Not reachable in {request.next_credits:g} credits: it would need a GPA of {round(required, 2)}, "
+            f"above the {request.scale_type} scale"
+        )
+
+    return TargetResponse(
+        current_cgpa=totals.gpa,
+        target_cgpa=request.target_cgpa,
+        required_gpa=round(max(required, 0.0), 2),
+        required_grade=required_grade,
+        achievable=achievable,
+        max_cgpa=totals.cgpa_with(top, request.next_credits),
+        min_cgpa=totals.cgpa_with(bottom, request.next_credits),
+        message=message,
+    )
@@ -0,0 +1,292 @@
+"""
+Citation metadata extraction from a web page's own markup.
+
+Most academic and news pages describe themselves with Highwire Press
+(`citation_*`), Dublin Core, OpenGraph or JSON-LD metadata. This module
+fetches a page with a size cap, feeds it through a streaming HTML parser
+and maps those tags onto the citation generator's metadata dict, so the
+LLM is only needed for pages that carry no usable metadata.
+"""
+
+import asyncio
+import codecs
+import ipaddress
+import json
+import re
+from datetime import date
+from html.parser import HTMLParser
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+MAX_HTML_BYTES = 1024 * 1024
+FETCH_TIMEOUT = 10.0
+USER_AGENT = "StuDenTools/1.0 (mailto:studentools@example.com)"
+
+# Fields a website citation needs before we skip the LLM
+REQUIRED_FIELDS = ("title", "year")
+
+DATE_PATTERN = re.compile(r"(\d{4})(?:[-/.](\d{1,2})(?:[-/.](\d{1,2}))?)?")
+
+
+class MetaTagParser(HTMLParser):
+    """Collects <meta> tags, the <title> text and JSON-LD blocks from a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.title = ""
+        self.json_ld = []
+        self.head_closed = False
+        self._capture = None
+        self._buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            key = attrs.get("name") or attrs.get("property") or attrs.get("itemprop")
+            content = attrs.get("content")
+            if key and content and content.strip():
+                self.meta.setdefault(key.strip().lower(), []).append(content.strip())
+        elif tag == "title" and not self.title:
+            self._capture, self._buffer = "title", []
+        elif tag == "script" and dict(attrs).get("type", "").lower() == "application/ld+json":
+            self._capture, self._buffer = "json_ld", []
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.head_closed = True
+        if self._capture == "title" and tag == "title":
+            self.title = " ".join("".join(self._buffer).split())
+            self._capture = None
+        elif self._capture == "json_ld" and tag == "script":
+            try:
+                self.json_ld.append(json.loads("".join(self._buffer)))
+            except json.JSONDecodeError:
+                pass
+            self._capture = None
+
+    def handle_data(self, data):
+        if self._capture:
+            self._buffer.append(data)
+
+    def first(self, *keys) -> Optional[str]:
+        """Return the first non-empty value among the given meta keys."""
+        for key in keys:
+            values = self.meta.get(key)
+            if values:
+                return values[0]
+        return None
+
+    def all(self, *keys) -> List[str]:
+        """Return all values of the first meta key that is present."""
+        for key in keys:
+            if key in self.meta:
+                return self.meta[key]
+        return []
+
+
+def is_public_url(url: str) -> bool:
+    """Reject URLs that point at loopback, private or link-local hosts."""
+    host = urlparse(url).hostname
+    if not host or host == "localhost" or host.endswith(".local"):
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return True
+    return address.is_global
+
+
+async def resolves_publicly(url: str) -> bool:
+    """Check that every address the URL's host resolves to is public."""
+    if not is_public_url(url):
+        return False
+    host = urlparse(url).hostname
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, None)
+    except OSError:
+        return False
+    return all(ipaddress.ip_address(info[4][0]).is_global for info in infos)
+
+
+async def fetch_page_metadata(url: str, max_bytes: int = MAX_HTML_BYTES) -> Optional[MetaTagParser]:
+    """
+    Stream a page into MetaTagParser, stopping at `max_bytes`.
+
+    Returns None if the page cannot be fetched or is not HTML.
+    """
+    async def check_destination(request: httpx.Request):
+        # Runs for the first request and every redirect hop
+        if not await resolves_publicly(str(request.url)):
+            raise httpx.InvalidURL(f"Refusing to fetch non-public address: {request.url.host}")
+
+    parser = MetaTagParser()
+    try:
+        async with httpx.AsyncClient(
+            timeout=FETCH_TIMEOUT,
+            follow_redirects=True,
+            event_hooks={"request": [check_destination]},
+        ) as client:
+            async with client.stream("GET", url, headers={"User-Agent": USER_AGENT}) as response:
+                if response.status_code != 200:
+                    return None
+                if "html" not in response.headers.get("content-type", "html"):
+                    return None
+
+                decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    chunk = chunk[:max_bytes - received]
+                    received += len(chunk)
+                    parser.feed(decoder.decode(chunk))
+                    if received >= max_bytes:
+                        break
+                    if parser.head_closed and has_required_fields(metadata_from_tags(parser, url)):
+                        break
+    except (httpx.HTTPError, httpx.InvalidURL, LookupError):
+        return None
+
+    return parser
+
+
+def parse_date(value: Optional[str]) -> tuple:
+    """Parse 'YYYY', 'YYYY-MM-DD', 'YYYY/MM/DD' (and ISO datetimes) into (year, month, day)."""
+    if not value:
+        return None, None, None
+    match = DATE_PATTERN.search(value)
+    if not match:
+        return None, None, None
+    year, month, day = (int(part) if part else None for part in match.groups())
+    return year, month, day
+
+
+def parse_author_name(name: str) -> Optional[dict]:
+    """Split 'Last, First' or 'First Last' into given/family names."""
+    name = " ".join(name.split())
+    if not name or name.startswith("http"):
+        return None
+    if "," in name:
+        family, given = [part.strip() for part in name.split(",", 1)]
+        return {"given": given, "family": family}
+    parts = name.split(" ")
+    if len(parts) == 1:
+        return {"given": "", "family": parts[0]}
+    return {"given": " ".join(parts[:-1]), "family": parts[-1]}
+
+
+def iter_json_ld_objects(blocks: list):
+    """Flatten JSON-LD blocks, including @graph lists, into individual objects."""
+    for block in blocks:
+        items = block if isinstance(block, list) else [block]
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get("@graph"), list):
+                yield from (obj for obj in item["@graph"] if isinstance(obj, dict))
+            else:
+                yield item
+
+
+def json_ld_metadata(blocks: list) -> dict:
+    """Pull title, authors, date and publisher from the most article-like JSON-LD object."""
+    best = None
+    for obj in iter_json_ld_objects(blocks):
+        if obj.get("headline") or obj.get("datePublished"):
+            best = obj
+            break
+        if best is None and obj.get("name"):
+            best = obj
+    if best is None:
+        return {}
+
+    authors = []
+    raw_authors = best.get("author") or []
+    for author in raw_authors if isinstance(raw_authors, list) else [raw_authors]:
+        name = author.get("name") if isinstance(author, dict) else author
+        parsed = parse_author_name(name) if isinstance(name, str) else None
+        if parsed:
+            authors.append(parsed)
+
+    publisher = best.get("publisher")
+    if isinstance(publisher, dict):
+        publisher = publisher.get("name")
+
+    return {
+        "title": best.get("headline") or best.get("name"),
+        "authors": authors,
+        "date": best.get("datePublished") or best.get("dateCreated"),
+        "publisher": publisher if isinstance(publisher, str) else None,
+    }
+
+
+def metadata_from_tags(parser: MetaTagParser, url: str) -> dict:
+    """Map collected tags onto citation metadata, preferring the most specific vocabulary."""
+    ld = json_ld_metadata(parser.json_ld)
+
+    title = (
+        parser.first("citation_title", "dc.title", "dcterms.title")
+        or ld.get("title")
+        or parser.first("og:title", "twitter:title")
+        or parser.title
+        or None
+    )
+
+    author_names = parser.all("citation_author", "dc.creator", "dcterms.creator")
+    authors = [a for a in (parse_author_name(name) for name in author_names) if a]
+    if not authors:
+        authors = ld.get("authors") or []
+    if not authors:
+        authors = [a for a in (parse_author_name(name) for name in parser.all("author", "article:author")) if a]
+
+    year, month, day = parse_date(
+        parser.first(
+            "citation_publication_date", "citation_date", "citation_online_date",
+            "dc.date", "dcterms.issued", "dcterms.created",
+        )
+        or ld.get("date")
+        or parser.first("article:published_time", "datepublished", "date")
+    )
+
+    publisher = parser.first("citation_publisher", "dc.publisher", "dcterms.publisher") or ld.get("publisher")
+    site_name = parser.first("og:site_name", "application-name") or publisher or urlparse(url).hostname
+
+    first_page = parser.first("citation_firstpage")
+    last_page = parser.first("citation_lastpage")
+    pages = f"{first_page}-{last_page}" if first_page and last_page else first_page
+
+    return {
+        "title": title,
+        "authors": authors,
+        "year": year,
+        "month": month,
+        "day": day,
+        "site_name": site_name,
+        "publisher": publisher,
+        "journal": parser.first("citation_journal_title"),
+        "volume": parser.first("citation_volume"),
+        "issue": parser.first("citation_issue"),
+        "pages": pages,
+        "doi": parser.first("citation_doi", "dc.identifier.doi"),
+        "url": url,
+        "access_date": date.today().isoformat(),
+        "type": "website",
+    }
+
+
+def has_required_fields(metadata: dict) -> bool:
+    """Whether extracted metadata is complete enough to cite without the LLM."""
+    return all(metadata.get(field) for field in REQUIRED_FIELDS)
+
+
+async def extract_html_metadata(url: str) -> Optional[dict]:
+    """Fetch a page and extract citation metadata from its markup, or None on failure."""
+    parser = await fetch_page_metadata(url)
+    if parser is None:
+        return None
+    metadata = metadata_from_tags(parser, url)
+    doi = metadata.get("doi")
+    if doi and doi.lower().startswith("doi:"):
+        metadata["doi"] = doi[4:].strip()
+    return metadata
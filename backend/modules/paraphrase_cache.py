@@ -0,0 +1,144 @@
+"""
+Result cache for the paraphraser.
+
+Entries are keyed by a hash of the whitespace-normalized text, the model
+name and the system-prompt version, so changing either the model or the
+prompt naturally invalidates old results. The in-memory layer is an LRU
+with a TTL; setting PARAPHRASE_CACHE_DB adds a SQLite layer that survives
+restarts and is shared by workers on the same host. SQLite reads and
+writes run in a worker thread so a busy database never blocks the event
+loop.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+CACHE_SIZE = int(os.getenv("PARAPHRASE_CACHE_SIZE", "1000"))
+CACHE_TTL_SECONDS = int(os.getenv("PARAPHRASE_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_DB_PATH = os.getenv("PARAPHRASE_CACHE_DB", "")
+DOCUMENT_TTL_SECONDS = int(os.getenv("PARAPHRASE_DOCUMENT_TTL", str(24 * 3600)))
+
+# Expired rows are deleted at most this often per process
+PURGE_INTERVAL_SECONDS = 60
+
+
+def normalize_text(text: str) -> str:
+    """Collapse all runs of whitespace so reformatted pastes share a cache entry."""
+    return " ".join(text.split())
+
+
+def make_key(text: str, model: str, prompt_version: str) -> str:
+    payload = "\x1f".join([model, prompt_version, normalize_text(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ParaphraseCache:
+    """LRU + TTL cache with optional SQLite persistence and hit statistics."""
+
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl_seconds: int = CACHE_TTL_SECONDS,
+                 db_path: str = CACHE_DB_PATH, table: str = "paraphrase_cache"):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.table = table
+        self.entries = OrderedDict()  # key -> (expires_at, text, tokens)
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.conn = None
+        self.lock = threading.Lock()
+        self.next_purge = 0.0
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, text TEXT NOT NULL, tokens INTEGER NOT NULL)"
+            )
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_expiry ON {table} (expires_at)")
+            self.conn.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is None and self.conn is not None:
+            entry = await asyncio.to_thread(self._load, key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is None or entry[0] < now:
+            if entry is not None:
+                await self.delete(key)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        self.tokens_saved += entry[2]
+        return entry[1]
+
+    async def put(self, key: str, text: str, tokens: int = 0):
+        entry = (time.time() + self.ttl_seconds, text, tokens)
+        self._remember(key, entry)
+        if self.conn is not None:
+            await asyncio.to_thread(self._save, key, entry)
+
+    async def delete(self, key: str):
+        self.entries.pop(key, None)
+        if self.conn is not None:
+            await asyncio.to_thread(self._drop, key)
+
+    def _load(self, key: str) -> Optional[tuple]:
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT expires_at, text, tokens FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def _save(self, key: str, entry: tuple):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, expires_at, text, tokens) VALUES (?, ?, ?, ?)",
+                (key, *entry),
+            )
+            if now >= self.next_purge:
+                self.next_purge = now + PURGE_INTERVAL_SECONDS
+                self.conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+
+    def _drop(self, key: str):
+        with self.lock, self.conn:
+            self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _remember(self, key: str, entry: tuple):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "llm_calls_saved": self.hits,
+            "tokens_saved": self.tokens_saved,
+            "persistent": self.conn is not None,
+        }
+
+
+cache = ParaphraseCache()
+
+# Previous submissions for incremental paraphrasing: document key -> JSON [[source, paraphrase], ...]
+documents = ParaphraseCache(ttl_seconds=DOCUMENT_TTL_SECONDS, table="paraphrase_documents")
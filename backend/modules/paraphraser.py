@@ -1,7 +1,12 @@
+import asyncio
+import difflib
+import json
 import os
+import re
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from openai import OpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,19 +18,65 @@ from rate_limiter import limiter, RATE_LIMITS
 from fastapi import Request
 
 # OpenRouter configuration
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+import llm_gateway
+import model_router
+from modules.paraphrase_cache import cache, documents, make_key, normalize_text
 DEFAULT_MODEL = "openai/gpt-oss-120b:free"  # Can be changed to any OpenRouter model
 
-def get_openrouter_client():
-    """Create and return an OpenRouter client."""
-    api_key = os.getenv("OPENROUTER_API_KEY", "")
-    if not api_key:
-        return None
-    return OpenAI(
-        base_url=OPENROUTER_BASE_URL,
-        api_key=api_key,
-    )
+# Interchangeable models the router picks between (comma-separated in PARAPHRASE_MODELS)
+PARAPHRASE_MODELS = model_router.models_from_env("PARAPHRASE_MODELS", DEFAULT_MODEL)
+model_router.register_models(PARAPHRASE_MODELS)
+# Cache keys name the whole pool, since any model in it may produce a result
+MODEL_POOL = ",".join(PARAPHRASE_MODELS)
+
+PARAPHRASE_SYSTEM_PROMPT = (
+    "You are an academic writing assistant. Your task is to paraphrase text in a formal, academic tone. "
+    "Use formal, scholarly language. Maintain the original meaning completely. Use appropriate academic vocabulary. "
+    "Avoid colloquialisms and informal expressions. Use passive voice where appropriate for academic writing. "
+    "Ensure clarity and precision. Do not add new information or opinions. Keep the same approximate length. "
+    "Only respond with the paraphrased text, nothing else."
+)
+BATCH_SYSTEM_PROMPT = (
+    "You are an academic writing assistant. Paraphrase text in a formal, academic tone. "
+    "Only respond with the paraphrased text, nothing else."
+)
+
+# Bump when a system prompt changes so cached results from the old prompt are not reused
+PROMPT_VERSION = "academic-v1"
+BATCH_PROMPT_VERSION = "academic-batch-v1"
+SENTENCES_PROMPT_VERSION = "academic-sentences-v1"
+
+SENTENCES_SYSTEM_PROMPT = PARAPHRASE_SYSTEM_PROMPT.replace(
+    "Only respond with the paraphrased text, nothing else.",
+    "You will receive numbered sentences like '[3] text', possibly surrounded by lines starting with "
+    "'CONTEXT:' that show the neighbouring text. Paraphrase only the numbered sentences, keeping them "
+    "consistent with the context. Respond with exactly one line per numbered sentence, in the form "
+    "'[3] paraphrased sentence', and nothing else."
+)
+
+CHUNK_PROMPT_VERSION = "academic-chunk-v1"
+CHUNK_SYSTEM_PROMPT = PARAPHRASE_SYSTEM_PROMPT.replace(
+    "Only respond with the paraphrased text, nothing else.",
+    "The text is one part of a longer document. Lines marked 'Preceding context:' and 'Following context:' "
+    "show the neighbouring text for continuity only; do not paraphrase or repeat them. Keep paragraph breaks. "
+    "Only respond with the paraphrased text, nothing else."
+)
 
+SENTENCE_BOUNDARY = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+(?=[\"'(\[]?[A-Z0-9])")
+ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "prof", "st", "vs", "fig", "al", "e.g", "i.e", "etc", "no", "vol", "pp"}
+PARAGRAPH_BOUNDARY = re.compile(r"\n\s*\n")
+NUMBERED_LINE = re.compile(r"^\s*\[(\d+)\]\s*(.+?)\s*$", re.MULTILINE)
+
+# Maximum number of batch items sent to the model at the same time
+BATCH_CONCURRENCY = int(os.getenv("PARAPHRASE_BATCH_CONCURRENCY", "5"))
+
+# Long-document mode: input cap, per-chunk token budget (~4 characters per token),
+# chunks paraphrased at the same time, and attempts per chunk
+LONG_MAX_LENGTH = 100_000
+LONG_CHUNK_TOKENS = int(os.getenv("PARAPHRASE_CHUNK_TOKENS", "800"))
+LONG_CONCURRENCY = int(os.getenv("PARAPHRASE_LONG_CONCURRENCY", "16"))
+LONG_CHUNK_ATTEMPTS = 2
+CHARS_PER_TOKEN = 4
 
 
 class ParaphraseRequest(BaseModel):
@@ -35,6 +86,15 @@ class ParaphraseRequest(BaseModel):
         max_length=5000,
         description="Text to paraphrase (10-5000 characters)"
     )
+    fresh: bool = Field(
+        default=False,
+        description="Skip cached results and ask the model for a new variant"
+    )
+    document_id: Optional[str] = Field(
+        default=None,
+        max_length=128,
+        description="Enables incremental mode: only sentences changed since this document's last submission are re-paraphrased"
+    )
 
 
 class ParaphraseResponse(BaseModel):
@@ -42,6 +102,252 @@ class ParaphraseResponse(BaseModel):
     paraphrased_text: str
     original_word_count: int
     paraphrased_word_count: int
+    cached: bool = False
+    reused_sentences: Optional[int] = None
+    paraphrased_sentences: Optional[int] = None
+
+
+class LongParaphraseRequest(BaseModel):
+    text: str = Field(
+        ...,
+        min_length=10,
+        max_length=LONG_MAX_LENGTH,
+        description=f"Document to paraphrase (10-{LONG_MAX_LENGTH} characters)"
+    )
+    fresh: bool = Field(
+        default=False,
+        description="Skip cached chunk results and ask the model for new variants"
+    )
+
+
+class LongParaphraseResponse(ParaphraseResponse):
+    chunks: int
+    cached_chunks: int
+
+
+def usage_tokens(response) -> int:
+    """Total tokens reported for a completion, or 0 if the provider omits usage."""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", 0) or 0
+
+
+def split_sentences(text: str) -> List[List[str]]:
+    """Split text into paragraphs, each a list of sentences."""
+    paragraphs = []
+    for paragraph in PARAGRAPH_BOUNDARY.split(text.strip()):
+        sentences = []
+        start = 0
+        for boundary in SENTENCE_BOUNDARY.finditer(paragraph):
+            last_word = paragraph[start:boundary.start()].rsplit(None, 1)[-1].rstrip(".").lower()
+            if last_word in ABBREVIATIONS:
+                continue
+            sentences.append(paragraph[start:boundary.start()].strip())
+            start = boundary.end()
+        sentences.append(paragraph[start:].strip())
+        sentences = [sentence for sentence in sentences if sentence]
+        if sentences:
+            paragraphs.append(sentences)
+    return paragraphs
+
+
+async def paraphrase_single_sentence(sentence: str) -> tuple:
+    """Paraphrase one sentence on its own. Returns (paraphrase, tokens used)."""
+    response = await model_router.chat_completion(
+        models=PARAPHRASE_MODELS,
+        messages=[
+            {"role": "system", "content": PARAPHRASE_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Paraphrase the following text:\n\n{sentence}"}
+        ],
+    )
+    paraphrased = response.choices[0].message.content.strip() if response.choices else ""
+    return paraphrased or sentence, usage_tokens(response)
+
+
+async def paraphrase_sentence_runs(runs: List[tuple]) -> tuple:
+    """
+    Paraphrase runs of changed sentences in one model call.
+
+    Each run is (context_before, sentences, context_after). Returns the
+    paraphrased sentences in order, plus the tokens used. Sentences the model
+    drops from its numbered answer are paraphrased individually.
+    """
+    lines = []
+    numbered = {}
+    for before, sentences, after in runs:
+        if before:
+            lines.append(f"CONTEXT: {before}")
+        for sentence in sentences:
+            number = len(numbered) + 1
+            numbered[number] = sentence
+            lines.append(f"[{number}] {sentence}")
+        if after:
+            lines.append(f"CONTEXT: {after}")
+        lines.append("")
+
+    response = await model_router.chat_completion(
+        models=PARAPHRASE_MODELS,
+        messages=[
+            {"role": "system", "content": SENTENCES_SYSTEM_PROMPT},
+            {"role": "user", "content": "Paraphrase the numbered sentences:\n\n" + "\n".join(lines)}
+        ],
+    )
+    tokens = usage_tokens(response)
+    content = response.choices[0].message.content if response.choices else ""
+
+    results = {}
+    for match in NUMBERED_LINE.finditer(content or ""):
+        number = int(match.group(1))
+        if number in numbered and number not in results:
+            results[number] = match.group(2)
+
+    missing = [number for number in numbered if number not in results]
+    if missing:
+        fallbacks = await asyncio.gather(*[paraphrase_single_sentence(numbered[n]) for n in missing])
+        for number, (paraphrased, used) in zip(missing, fallbacks):
+            results[number] = paraphrased
+            tokens += used
+
+    return [results[number] for number in sorted(numbered)], tokens
+
+
+async def paraphrase_incremental(paraphrase_request: ParaphraseRequest) -> ParaphraseResponse:
+    """
+    Re-paraphrase only the sentences that changed since the document's last submission.
+
+    The previous submission's (sentence, paraphrase) pairs are diffed against
+    the new sentences; unchanged sentences reuse their earlier paraphrase and
+    changed or inserted runs are sent to the model with one sentence of
+    context on either side.
+    """
+    paragraphs = split_sentences(paraphrase_request.text)
+    sentences = [sentence for paragraph in paragraphs for sentence in paragraph]
+
+    document_key = make_key(paraphrase_request.document_id, MODEL_POOL, SENTENCES_PROMPT_VERSION)
+    previous = None if paraphrase_request.fresh else await documents.get(document_key)
+    previous_units = json.loads(previous) if previous else []
+
+    matcher = difflib.SequenceMatcher(
+        None,
+        [normalize_text(source) for source, _ in previous_units],
+        [normalize_text(sentence) for sentence in sentences],
+        autojunk=False,
+    )
+
+    output = [None] * len(sentences)
+    runs = []
+    changed = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(j2 - j1):
+                output[j1 + offset] = previous_units[i1 + offset][1]
+        elif tag in ("replace", "insert"):
+            before = sentences[j1 - 1] if j1 > 0 else None
+            after = sentences[j2] if j2 < len(sentences) else None
+            runs.append((before, sentences[j1:j2], after))
+            changed.extend(range(j1, j2))
+
+    tokens = 0
+    if runs:
+        paraphrased_sentences, tokens = await paraphrase_sentence_runs(runs)
+        for index, paraphrased in zip(changed, paraphrased_sentences):
+            output[index] = paraphrased
+
+    await documents.put(document_key, json.dumps([list(unit) for unit in zip(sentences, output)]), tokens)
+
+    paraphrased_paragraphs = []
+    position = 0
+    for paragraph in paragraphs:
+        paraphrased_paragraphs.append(" ".join(output[position:position + len(paragraph)]))
+        position += len(paragraph)
+    paraphrased = "\n\n".join(paraphrased_paragraphs)
+
+    return ParaphraseResponse(
+        original_text=paraphrase_request.text,
+        paraphrased_text=paraphrased,
+        original_word_count=len(paraphrase_request.text.split()),
+        paraphrased_word_count=len(paraphrased.split()),
+        cached=not changed,
+        reused_sentences=len(sentences) - len(changed),
+        paraphrased_sentences=len(changed)
+    )
+
+
+def build_chunks(text: str, budget_chars: int) -> List[tuple]:
+    """
+    Split a document into (chunk_text, starts_paragraph) pairs of at most
+    roughly `budget_chars`, breaking only at paragraph or sentence boundaries.
+    """
+    chunks = []
+    current = []
+    current_length = 0
+
+    def flush():
+        nonlocal current, current_length
+        if current:
+            chunks.append(("\n\n".join(current), True))
+        current, current_length = [], 0
+
+    for sentences in split_sentences(text):
+        paragraph = " ".join(sentences)
+        if len(paragraph) <= budget_chars:
+            if current and current_length + len(paragraph) > budget_chars:
+                flush()
+            current.append(paragraph)
+            current_length += len(paragraph)
+            continue
+
+        # Paragraph is over budget on its own: split it between sentences
+        flush()
+        piece = []
+        piece_length = 0
+        starts_paragraph = True
+        for sentence in sentences:
+            if piece and piece_length + len(sentence) > budget_chars:
+                chunks.append((" ".join(piece), starts_paragraph))
+                starts_paragraph = False
+                piece, piece_length = [], 0
+            piece.append(sentence)
+            piece_length += len(sentence) + 1
+        chunks.append((" ".join(piece), starts_paragraph))
+
+    flush()
+    return chunks
+
+
+async def paraphrase_chunk(chunk: str, before: Optional[str], after: Optional[str], fresh: bool) -> tuple:
+    """Paraphrase one document chunk with neighbouring context. Returns (text, was_cached)."""
+    cache_key = make_key(chunk, MODEL_POOL, CHUNK_PROMPT_VERSION)
+    cached = None if fresh else await cache.get(cache_key)
+    if cached is not None:
+        return cached, True
+
+    prompt = []
+    if before:
+        prompt.append(f"Preceding context: {before}")
+    prompt.append(f"Paraphrase the following text:\n\n{chunk}")
+    if after:
+        prompt.append(f"Following context: {after}")
+
+    last_error = None
+    for _ in range(LONG_CHUNK_ATTEMPTS):
+        try:
+            response = await model_router.chat_completion(
+                models=PARAPHRASE_MODELS,
+                messages=[
+                    {"role": "system", "content": CHUNK_SYSTEM_PROMPT},
+                    {"role": "user", "content": "\n\n".join(prompt)}
+                ],
+            )
+        except HTTPException as e:
+            last_error = e
+            continue
+        paraphrased = response.choices[0].message.content.strip() if response.choices else ""
+        if paraphrased:
+            await cache.put(cache_key, paraphrased, usage_tokens(response))
+            return paraphrased, False
+        last_error = HTTPException(status_code=500, detail="The AI model returned an empty response.")
+
+    raise last_error
 
 
 @router.post("/api/paraphrase", response_model=ParaphraseResponse)
@@ -53,22 +359,40 @@ async def paraphrase_text(request: Request, paraphrase_request: ParaphraseReques
     - Input: Text (10-5000 characters)
     - Output: Academically paraphrased text
     - Tone: Formal, scholarly, precise
+    - Repeated texts are served from cache unless `fresh` is set
+    - With `document_id`, only sentences edited since the last submission
+      of that document are sent to the model
     """
-    
-    client = get_openrouter_client()
-    if not client:
-        raise HTTPException(
-            status_code=500,
-            detail="OPENROUTER_API_KEY environment variable is not set. Please configure your API key."
+
+    if paraphrase_request.document_id:
+        try:
+            return await paraphrase_incremental(paraphrase_request)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Paraphrasing failed: {str(e)}"
+            )
+
+    cache_key = make_key(paraphrase_request.text, MODEL_POOL, PROMPT_VERSION)
+    cached = None if paraphrase_request.fresh else await cache.get(cache_key)
+    if cached is not None:
+        return ParaphraseResponse(
+            original_text=paraphrase_request.text,
+            paraphrased_text=cached,
+            original_word_count=len(paraphrase_request.text.split()),
+            paraphrased_word_count=len(cached.split()),
+            cached=True
         )
     
     try:
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
+        response = await model_router.chat_completion(
+            models=PARAPHRASE_MODELS,
             messages=[
                 {
                     "role": "system",
-                    "content": "You are an academic writing assistant. Your task is to paraphrase text in a formal, academic tone. Use formal, scholarly language. Maintain the original meaning completely. Use appropriate academic vocabulary. Avoid colloquialisms and informal expressions. Use passive voice where appropriate for academic writing. Ensure clarity and precision. Do not add new information or opinions. Keep the same approximate length. Only respond with the paraphrased text, nothing else."
+                    "content": PARAPHRASE_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -90,6 +414,8 @@ async def paraphrase_text(request: Request, paraphrase_request: ParaphraseReques
                 status_code=500,
                 detail="The AI model returned an empty response."
             )
+
+        await cache.put(cache_key, paraphrased, usage_tokens(response))
         
         original_words = len(paraphrase_request.text.split())
         paraphrased_words = len(paraphrased.split())
@@ -110,18 +436,179 @@ async def paraphrase_text(request: Request, paraphrase_request: ParaphraseReques
         )
 
 
+@router.post("/api/paraphrase/long", response_model=LongParaphraseResponse)
+@limiter.limit(RATE_LIMITS["ai"])
+async def paraphrase_long_document(request: Request, paraphrase_request: LongParaphraseRequest):
+    """
+    Paraphrase a long document (up to 100,000 characters) in an academic tone.
+
+    - The text is split at paragraph and sentence boundaries into chunks of
+      about PARAPHRASE_CHUNK_TOKENS tokens
+    - Chunks are paraphrased concurrently, each with the neighbouring
+      sentences as read-only context, and reassembled in order
+    - A failing chunk is retried; the request fails only if a chunk keeps failing
+    """
+
+    if not llm_gateway.get_client():
+        raise HTTPException(
+            status_code=500,
+            detail="OPENROUTER_API_KEY environment variable is not set. Please configure your API key."
+        )
+
+    chunks = build_chunks(paraphrase_request.text, LONG_CHUNK_TOKENS * CHARS_PER_TOKEN)
+    if not chunks:
+        raise HTTPException(status_code=400, detail="Please provide text to paraphrase.")
+
+    edges = [split_sentences(chunk_text) for chunk_text, _ in chunks]
+    semaphore = asyncio.Semaphore(LONG_CONCURRENCY)
+
+    async def run_chunk(index: int) -> tuple:
+        before = edges[index - 1][-1][-1] if index > 0 else None
+        after = edges[index + 1][0][0] if index + 1 < len(chunks) else None
+        async with semaphore:
+            return await paraphrase_chunk(chunks[index][0], before, after, paraphrase_request.fresh)
+
+    tasks = [asyncio.create_task(run_chunk(i)) for i in range(len(chunks))]
+    try:
+        results = await asyncio.gather(*tasks)
+    except HTTPException as e:
+        raise HTTPException(status_code=e.status_code, detail=f"Paraphrasing a section failed: {e.detail}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Paraphrasing failed: {str(e)}"
+        )
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    parts = []
+    for (_, starts_paragraph), (paraphrased, _) in zip(chunks, results):
+        if parts:
+            parts.append("\n\n" if starts_paragraph else " ")
+        parts.append(paraphrased)
+    paraphrased_text = "".join(parts)
+
+    return LongParaphraseResponse(
+        original_text=paraphrase_request.text,
+        paraphrased_text=paraphrased_text,
+        original_word_count=len(paraphrase_request.text.split()),
+        paraphrased_word_count=len(paraphrased_text.split()),
+        cached=all(was_cached for _, was_cached in results),
+        chunks=len(chunks),
+        cached_chunks=sum(1 for _, was_cached in results if was_cached)
+    )
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/api/paraphrase/stream")
+@limiter.limit(RATE_LIMITS["ai"])
+async def paraphrase_text_stream(request: Request, paraphrase_request: ParaphraseRequest):
+    """
+    Paraphrase text in an academic tone, streaming the output as Server-Sent Events.
+
+    - `token` events carry `{"text": ...}` deltas as the model produces them
+    - A final `done` event carries the same fields as /api/paraphrase
+    - An `error` event carries `{"detail": ..., "status_code": ...}` if the model fails
+
+    If the client disconnects, the upstream model request is cancelled.
+    Cached results are replayed as a single `token` event.
+    """
+
+    cache_key = make_key(paraphrase_request.text, MODEL_POOL, PROMPT_VERSION)
+    cached = None if paraphrase_request.fresh else await cache.get(cache_key)
+    if cached is not None:
+        async def cached_stream():
+            yield sse_event("token", {"text": cached})
+            yield sse_event("done", ParaphraseResponse(
+                original_text=paraphrase_request.text,
+                paraphrased_text=cached,
+                original_word_count=len(paraphrase_request.text.split()),
+                paraphrased_word_count=len(cached.split()),
+                cached=True
+            ).model_dump())
+
+        return StreamingResponse(
+            cached_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    if not llm_gateway.get_client():
+        raise HTTPException(
+            status_code=500,
+            detail="OPENROUTER_API_KEY environment variable is not set. Please configure your API key."
+        )
+
+    async def event_stream():
+        tokens = []
+        upstream = model_router.stream_chat_completion(
+            models=PARAPHRASE_MODELS,
+            messages=[
+                {
+                    "role": "system",
+                    "content": PARAPHRASE_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": f"Paraphrase the following text:\n\n{paraphrase_request.text}"
+                }
+            ],
+        )
+        try:
+            async for token in upstream:
+                if await request.is_disconnected():
+                    return
+                tokens.append(token)
+                yield sse_event("token", {"text": token})
+        except HTTPException as e:
+            yield sse_event("error", {"detail": e.detail, "status_code": e.status_code})
+            return
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Paraphrasing failed: {str(e)}", "status_code": 500})
+            return
+        finally:
+            await upstream.aclose()
+
+        paraphrased = "".join(tokens).strip()
+        if not paraphrased:
+            yield sse_event("error", {"detail": "The AI model returned an empty response.", "status_code": 500})
+            return
+
+        await cache.put(cache_key, paraphrased)
+        yield sse_event("done", ParaphraseResponse(
+            original_text=paraphrase_request.text,
+            paraphrased_text=paraphrased,
+            original_word_count=len(paraphrase_request.text.split()),
+            paraphrased_word_count=len(paraphrased.split())
+        ).model_dump())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/api/paraphrase/batch")
 @limiter.limit(RATE_LIMITS["ai"])
-async def paraphrase_batch(request: Request, texts: list[str]):
+async def paraphrase_batch(request: Request, texts: list[str], stream: bool = False, fresh: bool = False):
     """
     Paraphrase multiple texts in academic tone.
     
     - Input: List of texts (max 5 texts, each 10-5000 characters)
-    - Output: List of paraphrased texts
+    - Output: List of paraphrased texts, in input order
+    - Texts are paraphrased concurrently (PARAPHRASE_BATCH_CONCURRENCY at a time)
+    - A failed item carries `error` and `status_code` instead of failing the batch
+    - `?stream=true` returns NDJSON, one result per line as each completes
+    - `?fresh=true` skips cached results
     """
     
-    client = get_openrouter_client()
-    if not client:
+    if not llm_gateway.get_client():
         raise HTTPException(
             status_code=500,
             detail="OPENROUTER_API_KEY environment variable is not set."
@@ -151,38 +638,85 @@ async def paraphrase_batch(request: Request, texts: list[str]):
                 detail=f"Text {i+1} exceeds 5000 character limit."
             )
     
-    try:
-        results = []
-        for text in texts:
-            response = client.chat.completions.create(
-                model=DEFAULT_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an academic writing assistant. Paraphrase text in a formal, academic tone. Only respond with the paraphrased text, nothing else."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Paraphrase the following text:\n\n{text}"
-                    }
-                ],
-            )
-            
-            paraphrased = response.choices[0].message.content.strip() if response.choices else text
-            
-            results.append({
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def paraphrase_item(index: int, text: str) -> dict:
+        cache_key = make_key(text, MODEL_POOL, BATCH_PROMPT_VERSION)
+        cached = None if fresh else await cache.get(cache_key)
+        if cached is not None:
+            return {
+                "index": index,
                 "original_text": text,
-                "paraphrased_text": paraphrased,
+                "paraphrased_text": cached,
                 "original_word_count": len(text.split()),
-                "paraphrased_word_count": len(paraphrased.split())
-            })
-        
-        return {"results": results}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Batch paraphrasing failed: {str(e)}"
-        )
+                "paraphrased_word_count": len(cached.split()),
+                "cached": True
+            }
+
+        async with semaphore:
+            try:
+                response = await model_router.chat_completion(
+                    models=PARAPHRASE_MODELS,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": BATCH_SYSTEM_PROMPT
+                        },
+                        {
+                            "role": "user",
+                            "content": f"Paraphrase the following text:\n\n{text}"
+                        }
+                    ],
+                )
+            except HTTPException as e:
+                return {"index": index, "original_text": text, "error": e.detail, "status_code": e.status_code}
+            except Exception as e:
+                return {
+                    "index": index,
+                    "original_text": text,
+                    "error": f"Paraphrasing failed: {str(e)}",
+                    "status_code": 500
+                }
+
+        paraphrased = response.choices[0].message.content.strip() if response.choices else text
+        if response.choices and paraphrased:
+            await cache.put(cache_key, paraphrased, usage_tokens(response))
+
+        return {
+            "index": index,
+            "original_text": text,
+            "paraphrased_text": paraphrased,
+            "original_word_count": len(text.split()),
+            "paraphrased_word_count": len(paraphrased.split()),
+            "cached": False
+        }
+
+    tasks = [asyncio.create_task(paraphrase_item(i, text)) for i, text in enumerate(texts)]
+
+    if stream:
+        async def stream_results():
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    yield json.dumps(await finished) + "\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+    results = await asyncio.gather(*tasks)
+    failed = sum(1 for result in results if "error" in result)
+
+    return {
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed
+    }
+
+
+@router.get("/api/paraphrase/cache/stats")
+async def paraphrase_cache_stats():
+    """
+    Report paraphrase cache effectiveness: hit ratio, LLM calls and tokens saved.
+    """
+    return cache.stats()
@@ -0,0 +1,163 @@
+"""
+Streaming readers for uploaded CSV/XLSX sheets.
+
+Rows are read one at a time (CSV through the csv module, XLSX through
+openpyxl's read-only mode), or as fixed-size DataFrame chunks for
+vectorized processing, so a large upload is never held in memory as a
+whole workbook. The first row is the header; column names are matched
+case-insensitively with spaces and dashes treated as underscores.
+"""
+
+import csv
+import io
+import os
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import pandas as pd
+from fastapi import HTTPException, UploadFile
+from openpyxl import load_workbook
+
+MAX_SHEET_SIZE = int(os.getenv("MAX_SHEET_SIZE_MB", "50")) * 1024 * 1024
+# Rows per DataFrame for chunked reads, bounding memory on large sheets
+FRAME_ROWS = 100_000
+
+SHEET_FORMATS = {".csv": "csv", ".xlsx": "xlsx"}
+
+
+def sheet_format(filename: str) -> str:
+    """'csv' or 'xlsx' from the file extension; 400 for anything else."""
+    fmt = SHEET_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Invalid file type. Please upload a .csv or .xlsx file.")
+    return fmt
+
+
+def check_size(upload: UploadFile):
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    if size > MAX_SHEET_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size exceeds the {MAX_SHEET_SIZE // (1024 * 1024)}MB limit"
+        )
+
+
+def normalize_header(value) -> str:
+    return "_".join(str(value or "").strip().lower().replace("-", " ").split())
+
+
+def iter_sheet_rows(upload: UploadFile) -> Iterator[tuple]:
+    """Yield every row of the first sheet as a tuple of cell values, header included."""
+    check_size(upload)
+    if sheet_format(upload.filename) == "csv":
+        text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            yield from (tuple(row) for row in csv.reader(text))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Could not read CSV file: {e}")
+        finally:
+            text.detach()  # leave the upload open for FastAPI to close
+        return
+
+    try:
+        workbook = load_workbook(upload.file, read_only=True, data_only=True)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read XLSX file: {e}")
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def resolve_columns(header: Sequence, required: Sequence[str], optional: Sequence[str] = ()) -> Dict[str, int]:
+    """Map column names to header positions, or 400 naming the required columns that are missing."""
+    positions = {}
+    for index, value in enumerate(header):
+        positions.setdefault(normalize_header(value), index)
+    missing = [name for name in required if name not in positions]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing column(s): {', '.join(missing)}. Expected columns: {', '.join(list(required) + list(optional))}"
+        )
+    return {name: positions[name] for name in list(required) + list(optional) if name in positions}
+
+
+def iter_records(upload: UploadFile, required: Sequence[str], optional: Sequence[str] = ()) -> Iterator[Tuple[int, dict]]:
+    """
+    Yield (row number, {column: value}) for each non-blank data row.
+
+    Row numbers are 1-based and count the header, matching what a
+    spreadsheet shows. Optional columns that are absent map to None.
+    """
+    rows = iter_sheet_rows(upload)
+    try:
+        header = next(rows, None)
+        if header is None:
+            raise HTTPException(status_code=400, detail="The file is empty")
+        columns = resolve_columns(header, required, optional)
+        names: List[str] = list(required) + list(optional)
+
+        for number, row in enumerate(rows, start=2):
+            values = {
+                name: row[columns[name]] if name in columns and columns[name] < len(row) else None
+                for name in names
+            }
+            if all(value is None or str(value).strip() == "" for value in values.values()):
+                continue
+            yield number, values
+    finally:
+        # Release the reader before the upload is closed, even if the caller stops early
+        rows.close()
+
+
+def iter_frames(upload: UploadFile, required: Sequence[str], optional: Sequence[str] = (),
+                chunk_rows: int = FRAME_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Yield the sheet as DataFrames of at most `chunk_rows` rows.
+
+    Columns are renamed to their normalized names and indexed by the
+    spreadsheet row number; blank rows are dropped. CSV cells arrive as
+    text, XLSX cells keep their types, so convert columns explicitly.
+    """
+    names: List[str] = list(required) + list(optional)
+    check_size(upload)
+
+    if sheet_format(upload.filename) == "csv":
+        try:
+            header = pd.read_csv(upload.file, nrows=0, encoding="utf-8-sig").columns
+            columns = resolve_columns(header, required, optional)
+            upload.file.seek(0)
+            reader = pd.read_csv(
+                upload.file, encoding="utf-8-sig", dtype=str, usecols=list(columns.values()),
+                skip_blank_lines=False, chunksize=chunk_rows,
+            )
+            for chunk in reader:
+                chunk.columns = [name for name, _ in sorted(columns.items(), key=lambda item: item[1])]
+                chunk.index += 2
+                yield chunk.reindex(columns=names).dropna(how="all")
+        except pd.errors.EmptyDataError:
+            raise HTTPException(status_code=400, detail="The file is empty")
+        except (UnicodeDecodeError, pd.errors.ParserError) as e:
+            raise HTTPException(status_code=400, detail=f"Could not read CSV file: {e}")
+        return
+
+    rows = iter_sheet_rows(upload)
+    try:
+        header = next(rows, None)
+        if header is None:
+            raise HTTPException(status_code=400, detail="The file is empty")
+        columns = resolve_columns(header, required, optional)
+        positions = [columns.get(name) for name in names]
+        batch, numbers = [], []
+        for number, row in enumerate(rows, start=2):
+            batch.append([row[p] if p is not None and p < len(row) else None for p in positions])
+            numbers.append(number)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=names, index=numbers).dropna(how="all")
+                batch, numbers = [], []
+        if batch:
+            yield pd.DataFrame(batch, columns=names, index=numbers).dropna(how="all")
+    finally:
+        rows.close()
@@ -0,0 +1,993 @@
+"""
+Constraint-propagation solver for the auto timetable generator.
+
+Each course session is a CSP variable whose domain is the set of
+(day, start slot) placements that fit the blocked slots and its preferred
+days. Search assigns variables in MRV / degree order, prunes neighbouring
+domains by forward checking and keeps them arc consistent (MAC), and
+checks a global capacity bound at every node, so over-constrained inputs
+fail quickly instead of enumerating every permutation. Interchangeable
+chunks of a course are placed in a fixed order, and residual states that
+were proven dead ends are remembered so they are not searched again.
+
+State is kept as bitmasks: bit s of a day's occupancy mask is slot s, and
+bit s of a session's domain mask on a day means "may start at slot s".
+Feasibility checks and domain pruning are a handful of integer operations
+regardless of how many slots a day has.
+
+Soft preferences (compact days, minimum breaks, preferred days) are
+scored by an Objective, and anneal() improves a feasible timetable by
+simulated annealing; optimize() runs independent restarts in a process
+pool and keeps the best. repair() re-solves only the sessions a change
+displaced, with the rest of a previous timetable pinned in place.
+
+The solver works purely on slot indices and knows nothing about the API
+models; auto_timetable.py translates requests into a TimetableProblem.
+"""
+
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+OPTIMIZE_WORKERS = int(os.getenv("TIMETABLE_OPTIMIZE_WORKERS", str(os.cpu_count() or 1)))
+
+# Cap on remembered dead-end states per solve, to bound memory
+MAX_NOGOODS = 200000
+
+# Penalty weights per hour (gaps, breaks, off-day time) or per day (days_used)
+WEIGHTS = {
+    "gaps": 1.0,
+    "short_breaks": 2.0,
+    "days_used": 2.0,
+    "off_preferred_days": 1.0,
+}
+
+# Simulated annealing temperature range
+START_TEMPERATURE = 3.0
+END_TEMPERATURE = 0.05
+
+
+def span(length: int) -> int:
+    """Bitmask with the lowest `length` bits set."""
+    return (1 << length) - 1 if length > 0 else 0
+
+
+def iter_bits(mask: int):
+    """Yield the indices of set bits, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def iter_runs(mask: int):
+    """Yield (start, end) for each run of consecutive set bits, lowest first."""
+    while mask:
+        start = (mask & -mask).bit_length() - 1
+        end = start
+        while (mask >> end) & 1:
+            end += 1
+        yield start, end
+        mask &= ~span(end)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+class Session:
+    """One block of a course to be placed on the grid."""
+
+    def __init__(self, index: int, name: str, duration: int, allowed_days: List[int]):
+        self.index = index
+        self.name = name
+        self.duration = duration
+        self.allowed_days = allowed_days
+
+
+class TimetableProblem:
+    """
+    Slot-level description of a timetable request.
+
+    - blocked[d]: slots on day d that no session may use (free periods, fixed events)
+    - fixed_load[d]: slots on day d already counted against max_per_day (fixed events)
+    - max_per_day: cap on counted slots per day, or None
+    - one_per_day: at most one session of the same course per day
+    - fixed[d]: the subset of blocked slots taken by fixed events (the rest are free periods)
+    - duration_step: every session duration is a multiple of this many slots
+    """
+
+    def __init__(self, num_days: int, num_slots: int, sessions: List[Session],
+                 blocked: List[set], fixed_load: List[int],
+                 max_per_day: Optional[int] = None, one_per_day: bool = False,
+                 fixed: Optional[List[set]] = None, duration_step: int = 1):
+        self.num_days = num_days
+        self.num_slots = num_slots
+        self.sessions = sessions
+        self.blocked = blocked
+        self.fixed_load = fixed_load
+        self.max_per_day = max_per_day
+        self.one_per_day = one_per_day
+        self.duration_step = duration_step
+        self.blocked_masks = [sum(1 << slot for slot in day) for day in blocked]
+        self.fixed_masks = [sum(1 << slot for slot in day) for day in (fixed or [set() for _ in blocked])]
+        self.anchored_masks = [self._anchored_starts(mask) for mask in self.blocked_masks]
+
+    def _anchored_starts(self, blocked_mask: int) -> int:
+        """
+        Starts the search needs to consider on a day.
+
+        Sliding every session of a valid timetable as early as it can go
+        keeps it valid, and afterwards each session starts at the start of
+        the day, the end of a blocked period or the end of another session.
+        With durations in multiples of duration_step, that is an anchor plus
+        a whole number of steps, so finer slots do not widen the search.
+        """
+        anchors = [0] + [end for _, end in iter_runs(blocked_mask)]
+        mask = 0
+        for anchor in anchors:
+            for slot in range(anchor, self.num_slots, self.duration_step):
+                mask |= 1 << slot
+        return mask
+
+
+def initial_domain(problem: TimetableProblem, session: Session) -> List[int]:
+    """Per-day bitmasks of the starts a session could take on an empty timetable."""
+    domain = [0] * problem.num_days
+    last_start = problem.num_slots - session.duration
+    if last_start < 0:
+        return domain
+    for d in session.allowed_days:
+        if problem.max_per_day is not None and problem.fixed_load[d] + session.duration > problem.max_per_day:
+            continue
+        # A start is valid if none of the `duration` slots from it is blocked
+        free = ~problem.blocked_masks[d]
+        starts = span(last_start + 1)
+        for offset in range(session.duration):
+            starts &= free >> offset
+        domain[d] = starts
+    return domain
+
+
+class Conflict:
+    """
+    A reason a problem cannot be solved, found before search. `needed` and
+    `available` are in slots (sessions for "course_days" and "blocks").
+    """
+
+    def __init__(self, kind: str, needed: int, available: int,
+                 sessions: Optional[List[int]] = None, days: Optional[List[int]] = None, length: int = 0):
+        self.kind = kind
+        self.needed = needed
+        self.available = available
+        self.sessions = sessions or []
+        self.days = days or []
+        self.length = length
+
+
+def analyze(problem: TimetableProblem) -> List[Conflict]:
+    """
+    Cheap necessary conditions, linear in sessions plus slots:
+
+    - too_long: a session longer than any free block (or the daily cap) on its allowed days
+    - course_days: with one session per day, a course with more sessions than usable days
+    - day_group: sessions confined to some days need more time than those days have
+    - capacity: total session time exceeds the free time in the week
+    - blocks: more sessions of at least some length than such blocks fit in the free runs
+
+    An empty list does not prove the problem is solvable; the search decides that.
+    """
+    days = range(problem.num_days)
+    cap = problem.max_per_day
+    runs = [list(iter_runs(~mask & span(problem.num_slots))) for mask in problem.blocked_masks]
+    room = []
+    for d in days:
+        free = sum(end - start for start, end in runs[d])
+        room.append(max(0, min(free, cap - problem.fixed_load[d]) if cap is not None else free))
+    longest = [min(max((end - start for start, end in runs[d]), default=0), room[d]) for d in days]
+
+    conflicts = []
+    reported = set()
+    for i, session in enumerate(problem.sessions):
+        if session.name in reported:
+            continue
+        best = max((longest[d] for d in session.allowed_days), default=0)
+        if session.duration > best:
+            reported.add(session.name)
+            conflicts.append(Conflict("too_long", session.duration, best, [i], session.allowed_days))
+
+    if problem.one_per_day:
+        by_course = {}
+        for i, session in enumerate(problem.sessions):
+            by_course.setdefault(session.name, []).append(i)
+        for name, members in by_course.items():
+            shortest = min(problem.sessions[i].duration for i in members)
+            # Same-name sessions may allow different days; any of them can use a day in the union
+            allowed = set().union(*(problem.sessions[i].allowed_days for i in members))
+            usable = [d for d in sorted(allowed) if longest[d] >= shortest]
+            if len(members) > len(usable) and name not in reported:
+                conflicts.append(Conflict("course_days", len(members), len(usable), members, usable))
+
+    all_days = span(problem.num_days)
+    demand_by_mask = {}
+    for i, session in enumerate(problem.sessions):
+        mask = sum(1 << d for d in session.allowed_days)
+        demand_by_mask.setdefault(mask, []).append(i)
+    for mask in demand_by_mask:
+        if mask == all_days:
+            continue
+        members = [i for other, group in demand_by_mask.items() if other & ~mask == 0 for i in group]
+        needed = sum(problem.sessions[i].duration for i in members)
+        available = sum(room[d] for d in iter_bits(mask))
+        if needed > available:
+            conflicts.append(Conflict("day_group", needed, available, members, list(iter_bits(mask))))
+
+    needed = sum(session.duration for session in problem.sessions)
+    available = sum(room)
+    if needed > available:
+        conflicts.append(Conflict("capacity", needed, available, list(range(len(problem.sessions))), list(days)))
+    elif not conflicts:
+        # Each session of length >= L takes a whole block of L slots from one free run
+        for length in sorted({session.duration for session in problem.sessions if session.duration > 0}, reverse=True):
+            members = [i for i, session in enumerate(problem.sessions) if session.duration >= length]
+            blocks = sum(
+                min(sum((end - start) // length for start, end in runs[d]), room[d] // length)
+                for d in days
+            )
+            if len(members) > blocks:
+                conflicts.append(Conflict("blocks", len(members), blocks, members, list(days), length))
+                break
+
+    return conflicts
+
+
+class ScheduleState:
+    """
+    Incrementally maintained occupancy for a partial timetable: per-day
+    occupancy bitmasks, per-day counted slots and the days each course uses.
+    place/remove are exact inverses, so search can undo in O(1).
+    """
+
+    def __init__(self, problem: TimetableProblem):
+        self.problem = problem
+        self.occupied = list(problem.blocked_masks)
+        self.load = list(problem.fixed_load)
+        self.course_days = {session.name: set() for session in problem.sessions}
+
+    def fits(self, session: Session, day: int, start: int) -> bool:
+        problem = self.problem
+        if start < 0 or start + session.duration > problem.num_slots:
+            return False
+        if self.occupied[day] & (span(session.duration) << start):
+            return False
+        if problem.max_per_day is not None and self.load[day] + session.duration > problem.max_per_day:
+            return False
+        if problem.one_per_day and day in self.course_days[session.name]:
+            return False
+        return day in session.allowed_days
+
+    def place(self, session: Session, day: int, start: int):
+        self.occupied[day] |= span(session.duration) << start
+        self.load[day] += session.duration
+        self.course_days[session.name].add(day)
+
+    def remove(self, session: Session, day: int, start: int):
+        self.occupied[day] &= ~(span(session.duration) << start)
+        self.load[day] -= session.duration
+        self.course_days[session.name].discard(day)
+
+    def free_slots(self, day: int) -> int:
+        return self.problem.num_slots - self.occupied[day].bit_count()
+
+
+class CSPSolver:
+    """
+    Backtracking search with MRV/degree ordering, forward checking and MAC.
+
+    break_symmetry and learn_nogoods switch off twin ordering and nogood
+    recording, for benchmarking how much search each one saves.
+    """
+
+    def __init__(self, problem: TimetableProblem, seed: Optional[int] = None, deadline: Optional[float] = None,
+                 break_symmetry: bool = True, learn_nogoods: bool = True):
+        self.problem = problem
+        self.rng = random.Random(seed)
+        self.sessions = problem.sessions
+        self.n = len(problem.sessions)
+        self.nodes = 0
+        self.deadline = deadline  # time.monotonic() value, or None for no limit
+        self.timed_out = False
+        self.learn_nogoods = learn_nogoods
+        self.best: Dict[int, Tuple[int, int]] = {}  # largest consistent partial assignment seen
+
+        self.state = ScheduleState(problem)
+        # domains[i][d] = bitmask of valid start slots for session i on day d
+        self.domains = [
+            [mask & anchored for mask, anchored in zip(initial_domain(problem, session), problem.anchored_masks)]
+            for session in self.sessions
+        ]
+        self.sizes = [sum(mask.bit_count() for mask in domain) for domain in self.domains]
+        self.assignment: Dict[int, Tuple[int, int]] = {}
+        self.trail = []  # (session, day, previous domain mask)
+
+        self.siblings = [
+            sum(1 for other in self.sessions if other.name == session.name) - 1
+            for session in self.sessions
+        ]
+
+        # Sessions with the same course, length and days are interchangeable
+        # ("twins"). They are placed in index order at strictly increasing
+        # (day, start), so each timetable is explored once, not once per
+        # permutation of its twins.
+        class_ids = {}
+        self.twin_class = []
+        self.later_twins = [[] for _ in self.sessions]
+        self.earlier_twin: List[Optional[int]] = []
+        last_member = {}
+        for i, session in enumerate(self.sessions):
+            twin_key = (session.name, session.duration, tuple(session.allowed_days)) if break_symmetry else i
+            c = class_ids.setdefault(twin_key, len(class_ids))
+            self.twin_class.append(c)
+            self.earlier_twin.append(last_member.get(c))
+            for j in range(i):
+                if self.twin_class[j] == c:
+                    self.later_twins[j].append(i)
+            last_member[c] = i
+        self.unplaced_twins = [0] * len(class_ids)
+        for c in self.twin_class:
+            self.unplaced_twins[c] += 1
+        self.twin_bound: List[Optional[Tuple[int, int]]] = [None] * len(class_ids)
+        if problem.one_per_day:
+            self._order_twin_days()
+
+        # Residual states already proven to have no completion
+        self.nogoods = set()
+
+    def _order_twin_days(self):
+        """
+        With one session per day, m ordered twins over days D[0] < D[1] < ...
+        put twin k somewhere in D[k] .. D[len(D) - m + k].
+        """
+        members = {}
+        for i, c in enumerate(self.twin_class):
+            members.setdefault(c, []).append(i)
+        for group in members.values():
+            days = [d for d in range(self.problem.num_days) if self.domains[group[0]][d]]
+            if len(days) < len(group):
+                continue  # _course_days_ok rejects this at the root
+            for k, i in enumerate(group):
+                first, last = days[k], days[len(days) - len(group) + k]
+                for d in range(self.problem.num_days):
+                    if d < first or d > last:
+                        self.sizes[i] -= self.domains[i][d].bit_count()
+                        self.domains[i][d] = 0
+
+    # -- domain bookkeeping -------------------------------------------------
+
+    def _restrict(self, i: int, d: int, mask: int):
+        """Narrow session i's domain on day d to `mask` (a subset), recording the undo."""
+        previous = self.domains[i][d]
+        self.trail.append((i, d, previous))
+        self.domains[i][d] = mask
+        self.sizes[i] -= (previous & ~mask).bit_count()
+
+    def _undo(self, mark: int):
+        while len(self.trail) > mark:
+            i, d, previous = self.trail.pop()
+            self.sizes[i] += previous.bit_count() - self.domains[i][d].bit_count()
+            self.domains[i][d] = previous
+
+    # -- constraints ---------------------------------------------------------
+
+    def _supported(self, i: int, j: int, d: int) -> int:
+        """
+        Starts of session i on day d that leave room for at least one
+        remaining start of session j on the same day.
+
+        i at s and j at t are disjoint iff t >= s + a or t <= s - b, so only
+        j's earliest and latest starts matter.
+        """
+        a, b = self.sessions[i], self.sessions[j]
+        if self.problem.one_per_day and a.name == b.name:
+            return 0
+        cap = self.problem.max_per_day
+        if cap is not None and self.state.load[d] + a.duration + b.duration > cap:
+            return 0
+        starts_j = self.domains[j][d]
+        earliest = (starts_j & -starts_j).bit_length() - 1
+        latest = starts_j.bit_length() - 1
+        return span(latest - a.duration + 1) | ~span(earliest + b.duration)
+
+    def _revise(self, i: int, j: int) -> bool:
+        """
+        Remove values of i with no support in j. Returns False on wipe-out.
+
+        Sessions on different days never conflict, so i only needs checking
+        when every remaining value of j sits on a single day.
+        """
+        only_day = None
+        for d, mask in enumerate(self.domains[j]):
+            if mask:
+                if only_day is not None:
+                    return True
+                only_day = d
+        if only_day is None or not self.domains[i][only_day]:
+            return True
+        current = self.domains[i][only_day]
+        narrowed = current & self._supported(i, j, only_day)
+        if narrowed != current:
+            self._restrict(i, only_day, narrowed)
+        return self.sizes[i] > 0
+
+    def _propagate(self, changed: List[int]) -> bool:
+        """AC-3 over unassigned variables, starting from the changed ones."""
+        queue = list(changed)
+        queued = set(queue)
+        while queue:
+            j = queue.pop()
+            queued.discard(j)
+            for i in range(self.n):
+                if i == j or i in self.assignment:
+                    continue
+                before = self.sizes[i]
+                if not self._revise(i, j):
+                    return False
+                if self.sizes[i] != before and i not in queued:
+                    queue.append(i)
+                    queued.add(i)
+        return True
+
+    def _capacity_ok(self) -> bool:
+        """Global bounds: remaining slots and open days must cover the unplaced sessions."""
+        needed = sum(self.sessions[i].duration for i in range(self.n) if i not in self.assignment)
+        cap = self.problem.max_per_day
+        available = 0
+        for d in range(self.problem.num_days):
+            room = self.state.free_slots(d)
+            if cap is not None:
+                room = min(room, cap - self.state.load[d])
+            available += max(room, 0)
+        if needed > available:
+            return False
+        return not self.problem.one_per_day or self._course_days_ok()
+
+    def _course_days_ok(self) -> bool:
+        """With one session per course per day, a course needs as many open days as unplaced sessions."""
+        pending = {}
+        for i in range(self.n):
+            if i in self.assignment:
+                continue
+            name = self.sessions[i].name
+            days, count = pending.get(name, (0, 0))
+            for d, mask in enumerate(self.domains[i]):
+                if mask:
+                    days |= 1 << d
+            pending[name] = (days, count + 1)
+        return all(count <= days.bit_count() for days, count in pending.values())
+
+    def _assign(self, i: int, d: int, start: int) -> bool:
+        """Place session i and forward-check every unassigned session. False on wipe-out."""
+        session = self.sessions[i]
+        self.assignment[i] = (d, start)
+        self.state.place(session, d, start)
+        self.unplaced_twins[self.twin_class[i]] -= 1
+        self.twin_bound[self.twin_class[i]] = (d, start)
+        if len(self.assignment) > len(self.best):
+            self.best = dict(self.assignment)
+
+        cap = self.problem.max_per_day
+        load = self.state.load[d]
+        end = start + session.duration
+        changed = []
+        for j in range(self.n):
+            if j in self.assignment:
+                continue
+            current = self.domains[j][d]
+            if not current:
+                continue
+            other = self.sessions[j]
+            if self.problem.one_per_day and other.name == session.name:
+                narrowed = 0
+            elif cap is not None and load + other.duration > cap:
+                narrowed = 0
+            else:
+                # Starts in (start - duration_j, end) would overlap the new session
+                first = max(0, start - other.duration + 1)
+                narrowed = current & ~(span(end - first) << first)
+            if narrowed != current:
+                self._restrict(j, d, narrowed)
+                if self.sizes[j] == 0:
+                    return False
+                changed.append(j)
+
+        # Later twins must come after this placement: earlier days are out,
+        # and on this day only later starts remain
+        for j in self.later_twins[i]:
+            before = self.sizes[j]
+            for earlier_day in range(d):
+                if self.domains[j][earlier_day]:
+                    self._restrict(j, earlier_day, 0)
+            if self.domains[j][d] & span(start + 1):
+                self._restrict(j, d, self.domains[j][d] & ~span(start + 1))
+            if self.sizes[j] == 0:
+                return False
+            if self.sizes[j] != before and j not in changed:
+                changed.append(j)
+
+        return self._capacity_ok() and self._propagate(changed)
+
+    def _unassign(self, i: int):
+        d, start = self.assignment.pop(i)
+        self.state.remove(self.sessions[i], d, start)
+        c = self.twin_class[i]
+        self.unplaced_twins[c] += 1
+        earlier = self.earlier_twin[i]
+        self.twin_bound[c] = self.assignment[earlier] if earlier is not None else None
+
+    def _residual_key(self) -> tuple:
+        """
+        Everything the rest of the search depends on: occupancy (which also
+        fixes daily loads), how many twins of each class are left, where the
+        still-relevant twin bounds are, and the days each course already uses.
+        Different orders of placing the same sessions map to the same key.
+        """
+        # With one session per day, later twins only care about the day
+        bounds = tuple(
+            None if not left or bound is None else (bound[0] if self.problem.one_per_day else bound)
+            for bound, left in zip(self.twin_bound, self.unplaced_twins)
+        )
+        key = (tuple(self.state.occupied), tuple(self.unplaced_twins), bounds)
+        if self.problem.one_per_day:
+            key += (tuple(frozenset(days) for days in self.state.course_days.values()),)
+        return key
+
+    # -- search --------------------------------------------------------------
+
+    def _select_variable(self) -> int:
+        """MRV, breaking ties by degree (longer sessions, more same-course siblings)."""
+        best, best_key = None, None
+        for i in range(self.n):
+            if i in self.assignment:
+                continue
+            earlier = self.earlier_twin[i]
+            if earlier is not None and earlier not in self.assignment:
+                continue
+            key = (self.sizes[i], -self.sessions[i].duration, -self.siblings[i], i)
+            if best_key is None or key < best_key:
+                best, best_key = i, key
+        return best
+
+    def _ordered_values(self, i: int) -> List[Tuple[int, int]]:
+        """
+        Starts flush against the day's edge or an occupied slot first (they
+        leave the free space least fragmented), random among equals.
+        """
+        duration = self.sessions[i].duration
+        last = self.problem.num_slots
+        ranked = []
+        for d, mask in enumerate(self.domains[i]):
+            occupied = self.state.occupied[d]
+            for s in iter_bits(mask):
+                end = s + duration
+                flush = s == 0 or end == last or (occupied >> (s - 1)) & 1 or (occupied >> end) & 1
+                ranked.append((0 if flush else 1, self.rng.random(), d, s))
+        ranked.sort()
+        return [(d, s) for _, _, d, s in ranked]
+
+    def _search(self) -> bool:
+        if len(self.assignment) == self.n:
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchTimeout()
+        key = self._residual_key() if self.learn_nogoods else None
+        if key in self.nogoods:
+            return False
+        self.nodes += 1
+
+        i = self._select_variable()
+        for d, start in self._ordered_values(i):
+            mark = len(self.trail)
+            if self._assign(i, d, start) and self._search():
+                return True
+            self._unassign(i)
+            self._undo(mark)
+
+        if self.learn_nogoods and len(self.nogoods) < MAX_NOGOODS:
+            self.nogoods.add(key)
+        return False
+
+    def solve(self) -> Optional[Dict[int, Tuple[int, int]]]:
+        """
+        Return {session index: (day, start slot)}, or None if no timetable
+        exists or the deadline passed first (timed_out tells which).
+        """
+        if any(size == 0 for size in self.sizes):
+            return None
+        if not self._capacity_ok() or not self._propagate(list(range(self.n))):
+            return None
+        try:
+            if not self._search():
+                return None
+        except SearchTimeout:
+            self.timed_out = True
+            return None
+        return dict(self.assignment)
+
+    def best_partial(self) -> Dict[int, Tuple[int, int]]:
+        """
+        The largest partial timetable found, extended greedily with any
+        remaining sessions that still fit. Call after solve() returns None.
+        """
+        state = ScheduleState(self.problem)
+        placed = dict(self.best)
+        for i, (d, start) in placed.items():
+            state.place(self.sessions[i], d, start)
+
+        remaining = [i for i in range(self.n) if i not in placed]
+        remaining.sort(key=lambda i: -self.sessions[i].duration)
+        for i in remaining:
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                break
+            session = self.sessions[i]
+            days = list(session.allowed_days)
+            self.rng.shuffle(days)
+            for d in days:
+                start = next(
+                    (s for s in range(self.problem.num_slots - session.duration + 1) if state.fits(session, d, s)),
+                    None,
+                )
+                if start is not None:
+                    state.place(session, d, start)
+                    placed[i] = (d, start)
+                    break
+        return placed
+
+
+class Objective:
+    """
+    Soft preferences a complete timetable is scored against; lower is better.
+
+    - compact: penalize idle slots between sessions (free periods excepted) and each day used
+    - min_break: slots required between consecutive sessions/fixed events on a day
+    - preferred_days: days sessions should be on; time elsewhere is penalized
+    - slots_per_hour: penalties are reported and weighed in hours whatever the slot size
+    """
+
+    def __init__(self, compact: bool = False, min_break: int = 0, preferred_days: Optional[List[int]] = None,
+                 slots_per_hour: int = 1):
+        self.compact = compact
+        self.min_break = min_break
+        self.preferred_days = set(preferred_days or [])
+        self.slots_per_hour = slots_per_hour
+
+    @property
+    def active(self) -> bool:
+        return self.compact or self.min_break > 0 or bool(self.preferred_days)
+
+    def day_parts(self, problem: TimetableProblem, d: int, intervals: List[Tuple[int, int]]) -> Tuple[int, int, int, int]:
+        """(gaps, short_breaks, days_used, off_preferred_days) for one day's session intervals."""
+        if not intervals:
+            return 0, 0, 0, 0
+        free_periods = problem.blocked_masks[d] & ~problem.fixed_masks[d]
+        busy = sorted(intervals + list(iter_runs(problem.fixed_masks[d])))
+
+        gaps = short = 0
+        for (_, end), (start, _) in zip(busy, busy[1:]):
+            if start < end:
+                continue
+            idle = start - end
+            if idle < self.min_break:
+                short += self.min_break - idle
+            elif self.compact:
+                unplanned = ((span(idle) << end) & ~free_periods).bit_count()
+                gaps += max(0, unplanned - self.min_break)
+
+        off = 0
+        if self.preferred_days and d not in self.preferred_days:
+            off = sum(end - start for start, end in intervals)
+        return gaps, short, 1 if self.compact else 0, off
+
+    def weigh(self, parts: Tuple[int, int, int, int]) -> float:
+        gaps, short, used, off = parts
+        hours = (WEIGHTS["gaps"] * gaps + WEIGHTS["short_breaks"] * short
+                 + WEIGHTS["off_preferred_days"] * off) / self.slots_per_hour
+        return hours + WEIGHTS["days_used"] * used
+
+    def breakdown(self, problem: TimetableProblem, assignment: Dict[int, Tuple[int, int]]) -> dict:
+        """Total score and its components for a (possibly partial) assignment."""
+        per_day = [[] for _ in range(problem.num_days)]
+        for i, (d, start) in assignment.items():
+            per_day[d].append((start, start + problem.sessions[i].duration))
+        totals = [0, 0, 0, 0]
+        for d, intervals in enumerate(per_day):
+            for k, value in enumerate(self.day_parts(problem, d, intervals)):
+                totals[k] += value
+        gaps, short, used, off = totals
+        return {
+            "total": self.weigh(tuple(totals)),
+            "gaps": gaps / self.slots_per_hour,
+            "short_breaks": short / self.slots_per_hour,
+            "days_used": used,
+            "off_preferred_days": off / self.slots_per_hour,
+        }
+
+
+def anneal(problem: TimetableProblem, objective: Objective, assignment: Dict[int, Tuple[int, int]],
+           seed: Optional[int], deadline: float) -> Tuple[float, Dict[int, Tuple[int, int]]]:
+    """
+    Improve a feasible assignment by simulated annealing until the deadline.
+
+    Moves relocate one session or swap two equal-length sessions on
+    different days; every candidate is checked with ScheduleState.fits, so
+    the timetable stays feasible throughout. Only the days a move touches
+    are re-scored. Returns (score, assignment) for the best timetable seen.
+    """
+    rng = random.Random(seed)
+    sessions = problem.sessions
+    n = len(sessions)
+    current = dict(assignment)
+
+    state = ScheduleState(problem)
+    per_day = [dict() for _ in range(problem.num_days)]  # {session: (start, end)} per day
+    for i, (d, start) in current.items():
+        state.place(sessions[i], d, start)
+        per_day[d][i] = (start, start + sessions[i].duration)
+
+    starts = [[list(iter_bits(mask)) for mask in initial_domain(problem, session)] for session in sessions]
+    open_days = [[d for d in range(problem.num_days) if starts[i][d]] for i in range(n)]
+    same_length = {}
+    for i, session in enumerate(sessions):
+        same_length.setdefault(session.duration, []).append(i)
+
+    def day_score(d):
+        return objective.weigh(objective.day_parts(problem, d, list(per_day[d].values())))
+
+    def relocate(i, d, start):
+        old_d, old_start = current[i]
+        state.remove(sessions[i], old_d, old_start)
+        del per_day[old_d][i]
+        state.place(sessions[i], d, start)
+        per_day[d][i] = (start, start + sessions[i].duration)
+        current[i] = (d, start)
+
+    def swap(i, j):
+        (d_i, s_i), (d_j, s_j) = current[i], current[j]
+        state.remove(sessions[i], d_i, s_i)
+        state.remove(sessions[j], d_j, s_j)
+        del per_day[d_i][i], per_day[d_j][j]
+        state.place(sessions[i], d_j, s_j)
+        state.place(sessions[j], d_i, s_i)
+        per_day[d_j][i] = (s_j, s_j + sessions[i].duration)
+        per_day[d_i][j] = (s_i, s_i + sessions[j].duration)
+        current[i], current[j] = (d_j, s_j), (d_i, s_i)
+
+    def can_swap(i, j):
+        (d_i, s_i), (d_j, s_j) = current[i], current[j]
+        state.remove(sessions[i], d_i, s_i)
+        state.remove(sessions[j], d_j, s_j)
+        ok = state.fits(sessions[i], d_j, s_j)
+        if ok:
+            state.place(sessions[i], d_j, s_j)
+            ok = state.fits(sessions[j], d_i, s_i)
+            state.remove(sessions[i], d_j, s_j)
+        state.place(sessions[i], d_i, s_i)
+        state.place(sessions[j], d_j, s_j)
+        return ok
+
+    day_scores = [day_score(d) for d in range(problem.num_days)]
+    score = sum(day_scores)
+    best_score, best = score, dict(current)
+
+    started = time.monotonic()
+    total_time = max(deadline - started, 1e-6)
+    temperature = START_TEMPERATURE
+    iteration = 0
+    while n and best_score > 0:
+        iteration += 1
+        if iteration % 64 == 0:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            progress = (now - started) / total_time
+            temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** progress
+
+        i = rng.randrange(n)
+        old_d, old_start = current[i]
+        partner = None
+        if rng.random() < 0.3:
+            # Equal-length sessions on the same day would score identically after swapping
+            partner = rng.choice(same_length[sessions[i].duration])
+            if current[partner][0] == old_d or not can_swap(i, partner):
+                continue
+            touched = (old_d, current[partner][0])
+            swap(i, partner)
+        else:
+            d = rng.choice(open_days[i])
+            start = rng.choice(starts[i][d])
+            if (d, start) == (old_d, old_start):
+                continue
+            state.remove(sessions[i], old_d, old_start)
+            ok = state.fits(sessions[i], d, start)
+            state.place(sessions[i], old_d, old_start)
+            if not ok:
+                continue
+            touched = (old_d, d)
+            relocate(i, d, start)
+
+        new_scores = {d: day_score(d) for d in set(touched)}
+        delta = sum(value - day_scores[d] for d, value in new_scores.items())
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            for d, value in new_scores.items():
+                day_scores[d] = value
+            score += delta
+            if score < best_score - 1e-9:
+                best_score, best = score, dict(current)
+        elif partner is not None:
+            swap(i, partner)
+        else:
+            relocate(i, old_d, old_start)
+
+    return best_score, best
+
+
+def _restart(problem: TimetableProblem, objective: Objective, seed: Optional[int],
+             initial: Optional[Dict[int, Tuple[int, int]]], wall_deadline: float):
+    """
+    One optimization restart: find a feasible timetable (unless given), then
+    anneal it. The deadline is wall-clock time because monotonic clocks are
+    not comparable across processes; a restart that was queued past it
+    returns None straight away.
+    """
+    seconds = wall_deadline - time.time()
+    if seconds <= 0:
+        return None
+    deadline = time.monotonic() + seconds
+    if initial is None:
+        initial = CSPSolver(problem, seed=seed, deadline=deadline).solve()
+        if initial is None:
+            return None
+    return anneal(problem, objective, initial, seed, deadline)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Shared process pool for optimization restarts, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=OPTIMIZE_WORKERS)
+    return _executor
+
+
+def optimize(problem: TimetableProblem, objective: Objective, initial: Dict[int, Tuple[int, int]],
+             seed: Optional[int], deadline: float, workers: int = OPTIMIZE_WORKERS) -> Tuple[float, Dict[int, Tuple[int, int]]]:
+    """
+    Run `workers` independent restarts in parallel until the deadline and
+    return the best (score, assignment). The first restart anneals the
+    given feasible timetable, the others start from their own seeded
+    solve. Restarts that miss the deadline are ignored, so the feasible
+    input is always a valid answer.
+    """
+    base_seed = seed if seed is not None else random.randrange(2 ** 32)
+    best = (objective.breakdown(problem, initial)["total"], initial)
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return best
+
+    if workers <= 1:
+        result = _restart(problem, objective, base_seed, initial, time.time() + remaining)
+        return min(best, result, key=lambda r: r[0]) if result else best
+
+    executor = get_executor()
+    # Leave a little time for results to travel back from the workers
+    wall_deadline = time.time() + remaining * 0.9
+    futures = [
+        executor.submit(_restart, problem, objective, base_seed + k, initial if k == 0 else None, wall_deadline)
+        for k in range(workers)
+    ]
+    done, pending = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+    for future in pending:
+        future.cancel()
+    for future in done:
+        result = future.result() if future.exception() is None else None
+        if result is not None and result[0] < best[0]:
+            best = result
+    return best
+
+
+def pin(problem: TimetableProblem, pinned: Dict[int, Tuple[int, int]]) -> Tuple[TimetableProblem, List[int]]:
+    """
+    The problem left once `pinned` placements are fixed: their slots are
+    blocked and counted like fixed events, and with one_per_day their days
+    are closed to the rest of the course. Returns (problem, original index
+    of each remaining session).
+    """
+    blocked = [set(day) for day in problem.blocked]
+    fixed = [set(iter_bits(mask)) for mask in problem.fixed_masks]
+    fixed_load = list(problem.fixed_load)
+    course_days = {}
+    for i, (d, start) in pinned.items():
+        session = problem.sessions[i]
+        slots = range(start, start + session.duration)
+        blocked[d].update(slots)
+        fixed[d].update(slots)
+        fixed_load[d] += session.duration
+        course_days.setdefault(session.name, set()).add(d)
+
+    order = [i for i in range(len(problem.sessions)) if i not in pinned]
+    sessions = []
+    for k, i in enumerate(order):
+        session = problem.sessions[i]
+        closed = course_days.get(session.name, set()) if problem.one_per_day else set()
+        sessions.append(Session(k, session.name, session.duration, [d for d in session.allowed_days if d not in closed]))
+
+    sub = TimetableProblem(
+        problem.num_days, problem.num_slots, sessions, blocked, fixed_load,
+        max_per_day=problem.max_per_day, one_per_day=problem.one_per_day,
+        fixed=fixed, duration_step=problem.duration_step,
+    )
+    return sub, order
+
+
+def repair(problem: TimetableProblem, previous: Dict[int, Tuple[int, int]], seed: Optional[int] = None,
+           deadline: Optional[float] = None, objective: Optional[Objective] = None):
+    """
+    Keep as much of a previous timetable as still fits and re-solve the rest.
+
+    Previous placements are kept in index order while they fit; the other
+    sessions are solved with the kept ones pinned. If that fails, kept
+    sessions are released a day at a time, starting with the days the
+    evicted sessions were on, so the last round re-solves everything. With
+    an objective, the re-solved sessions are annealed until the deadline.
+
+    Returns (assignment, complete, timed_out). An incomplete assignment is
+    the kept sessions plus whatever else still fits greedily.
+    """
+    state = ScheduleState(problem)
+    kept = {}
+    for i, (d, start) in sorted(previous.items()):
+        session = problem.sessions[i]
+        if state.fits(session, d, start):
+            state.place(session, d, start)
+            kept[i] = (d, start)
+    if len(kept) == len(problem.sessions):
+        return kept, True, False
+
+    evicted_days = list(dict.fromkeys(d for i, (d, _) in sorted(previous.items()) if i not in kept))
+    other_days = sorted((d for d in range(problem.num_days) if d not in evicted_days), key=lambda d: -state.free_slots(d))
+    release_order = evicted_days + other_days
+
+    fallback = None
+    timed_out = False
+    tried = set()
+    for released in range(len(release_order) + 1):
+        pinned = {i: p for i, p in kept.items() if p[0] not in release_order[:released]}
+        if len(pinned) in tried:
+            continue  # releasing this day freed nothing new
+        tried.add(len(pinned))
+
+        sub, order = pin(problem, pinned)
+        solver = CSPSolver(sub, seed=seed, deadline=deadline)
+        if fallback is None:
+            fallback = solver, order
+        if analyze(sub):
+            continue
+        found = solver.solve()
+        if found is not None:
+            if objective is not None and deadline is not None:
+                _, found = optimize(sub, objective, found, seed, deadline)
+            assignment = dict(pinned)
+            assignment.update((order[k], placement) for k, placement in found.items())
+            return assignment, True, False
+        if solver.timed_out:
+            timed_out = True
+            break
+
+    solver, order = fallback
+    assignment = dict(kept)
+    assignment.update((order[k], placement) for k, placement in solver.best_partial().items())
+    return assignment, len(assignment) == len(problem.sessions), timed_out
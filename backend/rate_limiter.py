@@ -1,8 +1,15 @@
 """
 Rate limiting middleware for StuDenTools API.
 Uses slowapi to protect endpoints from abuse.
+
+Counters live in RATE_LIMIT_STORAGE_URI. The default memory:// is per
+process, so with several workers each one enforces the limit separately;
+use sqlite:///path for workers on one host or redis://host:port across
+hosts (needs the redis package) to enforce one shared limit.
 """
 
+import os
+
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -10,8 +17,26 @@ from slowapi.middleware import SlowAPIMiddleware
 from fastapi import Request
 from fastapi.responses import JSONResponse
 
-# Create limiter instance with IP-based identification
-limiter = Limiter(key_func=get_remote_address)
+import limiter_storage  # noqa: F401  registers the sqlite:// storage scheme
+
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+# sliding-window-counter and fixed-window are atomic on every backend; moving-window needs memory:// or redis://
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+
+if RATE_LIMIT_STRATEGY == "moving-window" and RATE_LIMIT_STORAGE_URI.startswith("sqlite://"):
+    raise ValueError(
+        "RATE_LIMIT_STRATEGY=moving-window is not supported with sqlite:// storage; "
+        "use sliding-window-counter or fixed-window, or a memory:// or redis:// RATE_LIMIT_STORAGE_URI"
+    )
+
+# Create limiter instance with IP-based identification.
+# If a shared store becomes unreachable, fall back to per-process limits rather than failing requests.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=RATE_LIMIT_STRATEGY,
+    in_memory_fallback_enabled=not RATE_LIMIT_STORAGE_URI.startswith("memory://"),
+)
 
 # Rate limit configurations for different endpoint types
 RATE_LIMITS = {
@@ -0,0 +1,93 @@
+"""
+Shared test setup.
+
+The app imports its packages relative to backend/ (``from modules...``,
+``import llm_gateway``), so tests put that directory on sys.path the same
+way ``uvicorn main:app`` does when started from it.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits():
+    """Endpoints share one client address in tests, so limits would trip across tests."""
+    from rate_limiter import limiter
+    limiter.enabled = False
+    yield
+    limiter.enabled = True
+
+
+def completion_response(body: dict) -> httpx.Response:
+    """
+    OpenRouter-shaped reply that echoes the prompt back as 'P(...)', one
+    '[n] P(...)' line per numbered sentence when the prompt has them, as an
+    SSE stream when the request asks for one.
+    """
+    text = body["messages"][-1]["content"].split("\n\n", 1)[-1]
+    numbered = re.findall(r"^\[(\d+)\] (.*)$", text, re.M)
+    out = "\n".join(f"[{n}] P({s})" for n, s in numbered) if numbered else f"P({text})"
+    if body.get("stream"):
+        chunks = [
+            "data: " + json.dumps({
+                "id": "t", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }) + "\n\n"
+            for word in out.split(" ")
+        ]
+        return httpx.Response(200, content="".join(chunks) + "data: [DONE]\n\n",
+                              headers={"content-type": "text/event-stream"})
+    return httpx.Response(200, json={
+        "id": "t", "object": "chat.completion", "created": 0, "model": body["model"],
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": out}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+    })
+
+
+@pytest.fixture
+def openrouter(monkeypatch):
+    """
+    Point llm_gateway at a mocked OpenRouter. Call the fixture to configure it:
+    ``calls = openrouter(latency=0.3, rate_limited_calls={4})`` delays every
+    answer and returns 429 for the given 1-based calls. `calls` records the
+    model of every request, including the rate-limited ones.
+    """
+    import llm_gateway
+    from modules.paraphrase_cache import cache, documents
+
+    def install(latency: float = 0.0, rate_limited_calls=()) -> list:
+        calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            calls.append(body["model"])
+            if len(calls) in rate_limited_calls:
+                return httpx.Response(429, headers={"Retry-After": "0.05"}, json={"error": {"message": "rate limited"}})
+            if latency:
+                await asyncio.sleep(latency)
+            return completion_response(body)
+
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+        monkeypatch.setattr(llm_gateway, "_client_key", "test")
+        monkeypatch.setattr(llm_gateway, "_client", AsyncOpenAI(
+            base_url="http://openrouter.test/v1", api_key="test", max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        ))
+        # Results cached by an earlier test would skip the mock entirely
+        cache.entries.clear()
+        documents.entries.clear()
+        return calls
+
+    return install
@@ -0,0 +1,102 @@
+"""Timetable generation: input validation, the infeasibility pre-check, repair and bulk deadlines."""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from modules import auto_timetable
+
+app = FastAPI()
+app.include_router(auto_timetable.router)
+client = TestClient(app)
+
+
+def generate(courses, **preferences):
+    return client.post("/auto-timetable/generate", json={
+        "courses": courses,
+        "constraints": {"start_time": "08:00", "end_time": "12:00"},
+        "preferences": preferences,
+        "seed": 1,
+    })
+
+
+@pytest.mark.parametrize("duration", [0, -2])
+def test_non_positive_duration_is_rejected(duration):
+    response = generate([{"name": "Math", "duration": duration}])
+    assert response.status_code == 422
+
+
+def test_same_name_courses_on_different_days_are_feasible():
+    # One session per day; each "Math" entry may only use its own day
+    response = generate(
+        [
+            {"name": "Math", "duration": 1, "preferred_days": ["Monday"]},
+            {"name": "Math", "duration": 1, "preferred_days": ["Tuesday"]},
+        ],
+        max_session_duration=1,
+    )
+    body = response.json()
+    assert response.status_code == 200, body
+    assert body["success"] and not body["conflicts"]
+    assert sorted(entry["day"] for entry in body["timetable"]) == ["Monday", "Tuesday"]
+
+
+def repair(courses, previous_timetable):
+    return client.post("/auto-timetable/repair", json={
+        "courses": courses,
+        "constraints": {"start_time": "08:00", "end_time": "12:00"},
+        "preferences": {},
+        "previous_timetable": previous_timetable,
+        "seed": 1,
+    })
+
+
+def test_repair_keeps_an_unchanged_timetable():
+    courses = [{"name": "Math", "duration": 2}, {"name": "Physics", "duration": 1}]
+    previous = generate(courses).json()["timetable"]
+    body = repair(courses, previous).json()
+    assert body["success"] and body["kept_sessions"] == 2 and body["moved_sessions"] == 0
+    assert body["timetable"] == previous
+
+
+@pytest.mark.parametrize("start_time", ["9am", "09:00:00", "", "09:75"])
+def test_repair_rejects_malformed_previous_times(start_time):
+    response = repair([{"name": "Math", "duration": 1}], [
+        {"course_name": "Math", "day": "Monday", "start_time": start_time, "end_time": "10:00", "color": "#3b82f6"},
+    ])
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][-1] == "start_time"
+
+
+def bulk_requests(count):
+    return {
+        f"student-{n}": auto_timetable.GenerateRequest(
+            courses=[auto_timetable.CourseRequest(name="Math", duration=2)],
+            constraints=auto_timetable.TimeConstraints(start_time="08:00", end_time="12:00"),
+            preferences=auto_timetable.Preferences(),
+            time_budget_ms=auto_timetable.BULK_TIME_BUDGET_MS,
+        )
+        for n in range(count)
+    }
+
+
+def test_bulk_budget_is_cut_to_the_upload_deadline(monkeypatch):
+    monkeypatch.setattr(auto_timetable, "BULK_WORKERS", 1)
+    budgets = []
+    solve = auto_timetable.solve_request
+    monkeypatch.setattr(auto_timetable, "solve_request",
+                        lambda request, workers: budgets.append(request.time_budget_ms) or solve(request, workers))
+
+    results = list(auto_timetable.solve_bulk(bulk_requests(3), time.monotonic() + 0.5))
+    assert [response.success for _, response in results] == [True, True, True]
+    assert all(budget <= 500 for budget in budgets)
+
+
+def test_bulk_skips_students_after_the_upload_deadline(monkeypatch):
+    monkeypatch.setattr(auto_timetable, "BULK_WORKERS", 1)
+    results = list(auto_timetable.solve_bulk(bulk_requests(3), time.monotonic() - 1))
+    assert [student for student, _ in results] == ["student-0", "student-1", "student-2"]
+    assert not any(response.success for _, response in results)
+    assert "ran out of time" in results[0][1].message
@@ -0,0 +1,40 @@
+"""Bulk bibliographies: URL inputs may only spend a bounded number of LLM calls."""
+
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import llm_gateway
+from modules import citation_generator, html_metadata
+
+
+def test_llm_backed_urls_are_capped_per_request(monkeypatch):
+    llm_calls = []
+
+    async def no_page_metadata(url):
+        return None
+
+    async def fake_llm(url):
+        llm_calls.append(url)
+        return {"title": f"Page {len(llm_calls)}", "authors": [], "year": 2024, "url": url,
+                "type": "website", "metadata_source": "llm"}
+
+    monkeypatch.setattr(html_metadata, "extract_html_metadata", no_page_metadata)
+    monkeypatch.setattr(citation_generator, "extract_url_metadata_llm", fake_llm)
+    monkeypatch.setattr(llm_gateway, "get_client", lambda: object())
+    monkeypatch.setattr(citation_generator, "BULK_MAX_AI_URLS", 2)
+
+    app = FastAPI()
+    app.include_router(citation_generator.router)
+    response = TestClient(app).post("/api/citation/bulk", json={
+        "inputs": [f"https://example.com/article-{i}" for i in range(5)],
+    })
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    entries = [line for line in lines if line["event"] == "entry"]
+
+    assert len(llm_calls) == 2
+    assert sum("citation" in entry for entry in entries) == 2
+    assert sorted(entry.get("status_code") for entry in entries if "error" in entry) == [429, 429, 429]
+    assert lines[-1]["failed"] == 3
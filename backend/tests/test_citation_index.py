@@ -0,0 +1,43 @@
+"""Local CrossRef title index: dump import, fuzzy title search and runtime additions."""
+
+import gzip
+import json
+
+from modules import citation_index
+
+
+def work(doi: str, title: str, **fields) -> dict:
+    return {"DOI": doi, "title": [title], "type": "journal-article", **fields}
+
+
+def test_import_cli_and_search(tmp_path, capsys):
+    dump = tmp_path / "works-0001.jsonl.gz"
+    with gzip.open(dump, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(work("10.1000/ATTN", "Attention Is All You Need",
+                                author=[{"given": "Ashish", "family": "Vaswani"}])) + "\n")
+        f.write(json.dumps({"message": work("10.1000/resnet", "Deep Residual Learning for Image Recognition")}) + "\n")
+        f.write("not json\n")
+        f.write(json.dumps({"DOI": "10.1000/untitled"}) + "\n")
+    db = str(tmp_path / "index.db")
+
+    citation_index.main(["import", str(dump), "--db", db])
+    assert "Done. 2 works imported" in capsys.readouterr().out
+
+    # Case, punctuation and a small typo still match; the stored work comes back
+    match = citation_index.search_title("attention is all you need!", path=db)
+    assert match["DOI"] == "10.1000/ATTN"
+    assert match["author"][0]["family"] == "Vaswani"
+    assert citation_index.search_title("Deep residual learning for image recognitoin", path=db)["DOI"] == "10.1000/resnet"
+
+    # Sharing words is not enough to count as the same work
+    assert citation_index.search_title("Attention in residual networks", path=db) is None
+
+
+def test_add_work_refreshes_existing_entry(tmp_path):
+    db = str(tmp_path / "index.db")
+    citation_index.add_work(work("10.1000/x", "A Study of Things", volume="1"), path=db)
+    citation_index.add_work(work("10.1000/X", "A Study of Things", volume="2"), path=db)
+
+    assert citation_index.search_title("A study of things", path=db)["volume"] == "2"
+    assert citation_index.search_title("Something else entirely", path=db) is None
+    assert citation_index.search_title("anything", path=str(tmp_path / "missing.db")) is None
@@ -0,0 +1,35 @@
+"""Feedback submission and the admin listing."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from modules import feedback, feedback_store
+from modules.feedback_store import FeedbackStore
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(feedback_store, "_store", FeedbackStore(str(tmp_path / "feedback.db")))
+    monkeypatch.setenv("FEEDBACK_ADMIN_TOKEN", "secret")
+    monkeypatch.delenv("RESEND_API_KEY", raising=False)
+    app = FastAPI()
+    app.include_router(feedback.router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_submitted_feedback_is_listed_a_page_at_a_time(client):
+    for i in range(3):
+        response = client.post("/api/feedback/", json={"type": "bug", "message": f"message {i}"})
+        assert response.status_code == 200, response.text
+
+    headers = {"X-Admin-Token": "secret"}
+    first = client.get("/api/feedback/", params={"limit": 2}, headers=headers).json()
+    second = client.get("/api/feedback/", params={"limit": 2, "cursor": first["next_cursor"]}, headers=headers).json()
+    messages = [entry["message"] for entry in first["entries"] + second["entries"]]
+    assert messages == ["message 2", "message 1", "message 0"]
+    assert second["next_cursor"] is None
+
+    assert client.get("/api/feedback/", params={"cursor": "bad"}, headers=headers).status_code == 400
+    assert client.get("/api/feedback/", headers={"X-Admin-Token": "wrong"}).status_code == 401
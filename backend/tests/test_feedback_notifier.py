@@ -0,0 +1,169 @@
+"""Digest emails for feedback, against a mocked Resend API."""
+
+import asyncio
+import json
+import sqlite3
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from modules import feedback, feedback_notifier, feedback_store
+from modules.feedback_notifier import DigestNotifier
+from modules.feedback_store import FeedbackStore
+
+
+class MockResend:
+    """Records every email posted; the first `failures` posts get a 500."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.posts = 0
+        self.emails = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.posts += 1
+        if self.failures > 0:
+            self.failures -= 1
+            return httpx.Response(500, headers={"Retry-After": "0"})
+        self.emails.append(json.loads(request.content))
+        return httpx.Response(200, json={"id": "test"})
+
+
+@pytest.fixture
+def resend(monkeypatch):
+    def install(failures: int = 0) -> MockResend:
+        mock = MockResend(failures)
+        monkeypatch.setattr(feedback_notifier, "_client", httpx.AsyncClient(transport=httpx.MockTransport(mock)))
+        return mock
+
+    monkeypatch.setenv("RESEND_API_KEY", "test")
+    monkeypatch.setenv("MAIL_TO", "admin@example.com")
+    return install
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeedbackStore(str(tmp_path / "feedback.db"))
+
+
+def entry(i: int) -> dict:
+    return {"type": ["bug", "feature"][i % 2], "message": f"<b>message {i}</b>", "email": None,
+            "timestamp": f"2026-01-01T00:00:{i % 60:02d}"}
+
+
+async def submit(store: FeedbackStore, notifier: DigestNotifier, count: int, settle: float):
+    for i in range(count):
+        store.add(entry(i))
+        notifier.notify()
+    await asyncio.sleep(settle)
+
+
+def test_burst_is_batched_into_digests(resend, store):
+    mock = resend()
+
+    async def run():
+        notifier = DigestNotifier(store, window_seconds=0.2, max_items=50)
+        await submit(store, notifier, 120, settle=0.5)
+
+    asyncio.run(run())
+    assert mock.posts == 3
+    assert [email["subject"] for email in mock.emails] == [
+        "StuDenTools Feedback: 50 new (25 bug, 25 feature)",
+        "StuDenTools Feedback: 50 new (25 bug, 25 feature)",
+        "StuDenTools Feedback: 20 new (10 bug, 10 feature)",
+    ]
+    assert "&lt;b&gt;message 0&lt;/b&gt;" in mock.emails[0]["html"]
+
+
+def test_transient_errors_are_retried(resend, store):
+    mock = resend(failures=2)
+
+    async def run():
+        notifier = DigestNotifier(store, window_seconds=0.1, max_items=50)
+        await submit(store, notifier, 3, settle=0.5)
+
+    asyncio.run(run())
+    assert mock.posts == 3
+    assert [email["subject"] for email in mock.emails] == ["StuDenTools Feedback: 3 new (2 bug, 1 feature)"]
+
+
+def test_failed_batch_is_released_to_the_next_window(monkeypatch, resend, store):
+    monkeypatch.setattr(feedback_notifier, "SEND_MAX_RETRIES", 1)
+    mock = resend(failures=2)
+
+    async def run():
+        notifier = DigestNotifier(store, window_seconds=0.1, max_items=50)
+        await submit(store, notifier, 4, settle=0.6)
+
+    asyncio.run(run())
+    # Two failed attempts released the batch; the next window sent all four entries once
+    assert mock.posts == 3
+    assert [email["subject"] for email in mock.emails] == ["StuDenTools Feedback: 4 new (2 bug, 2 feature)"]
+    assert store.claim_unnotified(50) == []
+
+
+def test_unsent_entries_are_sent_on_startup(monkeypatch, resend, store):
+    mock = resend()
+    store.start_notifications()
+    store.add(entry(0))
+    store.add(entry(1))
+    monkeypatch.setattr(feedback_store, "_store", store)
+    monkeypatch.setattr(feedback_notifier, "_notifier", None)
+
+    app = FastAPI()
+    app.include_router(feedback.router)
+    with TestClient(app):
+        deadline = time.monotonic() + 2
+        while not mock.emails and time.monotonic() < deadline:
+            time.sleep(0.02)
+    assert [email["subject"] for email in mock.emails] == ["StuDenTools Feedback: 2 new (1 bug, 1 feature)"]
+
+
+def test_release_after_a_later_claim_loses_nothing(tmp_path):
+    # Two workers on one database: A's send fails after B claimed past it
+    path = str(tmp_path / "feedback.db")
+    worker_a, worker_b = FeedbackStore(path), FeedbackStore(path)
+    worker_a.start_notifications()
+    for i in range(4):
+        worker_a.add(entry(i))
+
+    batch_a = worker_a.claim_unnotified(2)
+    batch_b = worker_b.claim_unnotified(2)
+    assert [e["id"] for e in batch_a] == [1, 2] and [e["id"] for e in batch_b] == [3, 4]
+    worker_b.mark_notified(batch_b)
+    worker_a.release(batch_a)
+
+    assert [e["id"] for e in worker_b.claim_unnotified(50)] == [1, 2]
+
+
+def test_lease_of_a_crashed_worker_expires(store):
+    store.start_notifications()
+    store.add(entry(0))
+    assert len(store.claim_unnotified(50, lease_seconds=0.05)) == 1
+    assert store.claim_unnotified(50) == []
+    time.sleep(0.1)
+    claimed = store.claim_unnotified(50)
+    assert len(claimed) == 1
+    store.mark_notified(claimed)
+    time.sleep(0.1)
+    assert store.claim_unnotified(50) == []
+
+
+def test_old_notified_through_mark_is_migrated(tmp_path):
+    path = str(tmp_path / "feedback.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE feedback (id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, "
+                 "message TEXT NOT NULL, email TEXT, timestamp TEXT NOT NULL)")
+    conn.execute("CREATE TABLE feedback_meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT INTO feedback (type, message, email, timestamp) VALUES (?, ?, ?, ?)",
+                     [(e["type"], e["message"], e["email"], e["timestamp"]) for e in map(entry, range(3))])
+    conn.execute("INSERT INTO feedback_meta (key, value) VALUES ('notified_through', '2')")
+    conn.commit()
+    conn.close()
+
+    store = FeedbackStore(path)
+    store.start_notifications()
+    assert [e["id"] for e in store.claim_unnotified(50)] == [3]
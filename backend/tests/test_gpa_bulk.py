@@ -0,0 +1,59 @@
+"""Bulk GPA upload: every student's result must equal /api/gpa over their courses."""
+
+import csv
+import io
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from modules import gpa_calculator
+from modules.gpa_calculator import Course, GPARequest, calculate_gpa
+
+app = FastAPI()
+app.include_router(gpa_calculator.router)
+client = TestClient(app)
+
+
+def upload(rows, scale_type="4.0"):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(gpa_calculator.GRADE_COLUMNS)
+    writer.writerows(rows)
+    return client.post(
+        "/api/gpa/bulk",
+        files={"file": ("grades.csv", buffer.getvalue().encode(), "text/csv")},
+        data={"scale_type": scale_type},
+    )
+
+
+@pytest.mark.parametrize("scale_type", ["4.0", "5.0"])
+def test_bulk_matches_calculate_gpa(scale_type):
+    rng = random.Random(7)
+    courses = {}
+    rows = []
+    for n in range(600):
+        student = f"S{rng.randrange(40)}"
+        # Mixed case, stray spaces and an unknown grade, as in real sheets
+        grade = rng.choice(["A", "b", " C", "D ", "E", "F", "B+"])
+        credits = rng.choice([1, 2, 3, 4, 1.5])
+        rows.append([student if rng.random() < 0.8 else f" {student} ", f"Course {n}", grade, credits])
+        courses.setdefault(student, []).append(Course(grade=grade.strip(), credits=credits))
+
+    response = upload(rows, scale_type)
+    assert response.status_code == 200, response.text
+    results = {row["student"]: row for row in csv.DictReader(io.StringIO(response.text))}
+    assert set(results) == set(courses)
+    for student, taken in courses.items():
+        expected = calculate_gpa(GPARequest(courses=taken, scale_type=scale_type))
+        assert float(results[student]["gpa"]) == expected["gpa"], student
+        assert float(results[student]["total_credits"]) == pytest.approx(expected["total_credits"])
+        assert int(results[student]["total_courses"]) == expected["total_courses"]
+    assert response.headers["X-Cohort-Students"] == str(len(courses))
+
+
+def test_bulk_names_the_bad_row():
+    response = upload([["Ada", "Math", "A", 3], ["Ada", "Physics", "B", 0]])
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Row 3:")
@@ -0,0 +1,81 @@
+"""Cumulative GPA: running totals must agree with recomputing /api/gpa over every course."""
+
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from modules import gpa_calculator
+from modules.gpa_calculator import Course, GPARequest, calculate_gpa
+
+app = FastAPI()
+app.include_router(gpa_calculator.router)
+client = TestClient(app)
+
+
+def random_terms(rng, count):
+    return [
+        {"name": f"Term {t}", "courses": [
+            {"grade": rng.choice("ABCDF"), "credits": rng.choice([1, 2, 3, 4])} for _ in range(rng.randint(3, 7))
+        ]}
+        for t in range(count)
+    ]
+
+
+def recomputed(terms):
+    courses = [Course(**course) for term in terms for course in term["courses"]]
+    return calculate_gpa(GPARequest(courses=courses))["gpa"]
+
+
+def test_cumulative_matches_full_recompute():
+    terms = random_terms(random.Random(3), 8)
+    body = client.post("/api/gpa/cumulative", json={"terms": terms}).json()
+    assert [term["cgpa"] for term in body["terms"]] == [recomputed(terms[:k + 1]) for k in range(len(terms))]
+    assert body["terms"][0]["gpa"] == recomputed(terms[:1])
+    assert body["cgpa"] == recomputed(terms)
+
+
+def test_update_matches_full_recompute():
+    terms = random_terms(random.Random(4), 6)
+    first = client.post("/api/gpa/cumulative", json={"terms": terms[:5]}).json()
+
+    # Term 2's first course is regraded to A, and term 6 is added
+    changed = terms[1]["courses"][0]
+    change = {"credits": changed["credits"], "old_grade": changed["grade"], "new_grade": "A"}
+    body = client.post("/api/gpa/cumulative/update", json={
+        "total_points": first["total_points"], "total_credits": first["total_credits"],
+        "changes": [change], "add_terms": [terms[5]],
+    }).json()
+
+    changed["grade"] = "A"
+    assert body["cgpa"] == recomputed(terms)
+    assert body["terms"][0]["cgpa"] == body["cgpa"]
+
+
+@pytest.mark.parametrize("change", [
+    {"credits": 3},
+    {"credits": 500, "old_grade": "A"},
+])
+def test_invalid_update_is_rejected(change):
+    response = client.post("/api/gpa/cumulative/update", json={
+        "total_points": 30, "total_credits": 10, "changes": [change],
+    })
+    assert response.status_code == 400
+
+
+def test_target_out_of_reach():
+    body = client.post("/api/gpa/target", json={
+        "total_points": 192, "total_credits": 60, "target_cgpa": 3.5, "next_credits": 18,
+    }).json()
+    assert body["required_gpa"] == 4.5
+    assert body["achievable"] is False and body["required_grade"] is None
+    assert body["max_cgpa"] == round((192 + 4 * 18) / 78, 2)
+
+
+def test_target_names_the_lowest_sufficient_grade():
+    body = client.post("/api/gpa/target", json={
+        "total_points": 192, "total_credits": 60, "target_cgpa": 3.3, "next_credits": 20, "scale_type": "5.0",
+    }).json()
+    assert body["required_gpa"] == 3.6 and body["required_grade"] == "B" and body["achievable"] is True
+    assert body["min_cgpa"] == 2.4
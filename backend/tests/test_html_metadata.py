@@ -0,0 +1,73 @@
+"""Citation metadata from page markup, and the guard against fetching internal hosts."""
+
+import asyncio
+
+import pytest
+
+from modules import html_metadata
+from modules.html_metadata import MetaTagParser, has_required_fields, metadata_from_tags
+
+URL = "https://journal.example.org/articles/42"
+
+
+def parse(markup: str) -> dict:
+    parser = MetaTagParser()
+    parser.feed(markup)
+    return metadata_from_tags(parser, URL)
+
+
+def test_highwire_tags_win_over_open_graph():
+    metadata = parse("""<html><head>
+        <title>Site chrome | Journal</title>
+        <meta property="og:title" content="Shared title">
+        <meta name="citation_title" content="Sleep and Memory in Students">
+        <meta name="citation_author" content="Doe, Jane">
+        <meta name="citation_author" content="John Smith">
+        <meta name="citation_publication_date" content="2021/03/09">
+        <meta name="citation_journal_title" content="Journal of Examples">
+        <meta name="citation_firstpage" content="10"><meta name="citation_lastpage" content="19">
+        <meta name="citation_doi" content="doi:10.1000/xyz">
+        </head><body></body></html>""")
+
+    assert metadata["title"] == "Sleep and Memory in Students"
+    assert metadata["authors"] == [{"given": "Jane", "family": "Doe"}, {"given": "John", "family": "Smith"}]
+    assert (metadata["year"], metadata["month"], metadata["day"]) == (2021, 3, 9)
+    assert metadata["journal"] == "Journal of Examples"
+    assert metadata["pages"] == "10-19"
+    assert has_required_fields(metadata)
+
+
+def test_json_ld_and_page_title_fallbacks():
+    metadata = parse("""<head><title>  Only   a title </title>
+        <script type="application/ld+json">
+        {"@type": "NewsArticle", "headline": "Headline From JSON-LD",
+         "datePublished": "2019-07-01T08:00:00Z", "author": {"@type": "Person", "name": "Ada Lovelace"}}
+        </script></head>""")
+    assert metadata["title"] == "Headline From JSON-LD"
+    assert metadata["year"] == 2019
+    assert metadata["authors"] == [{"given": "Ada", "family": "Lovelace"}]
+
+    bare = parse("<head><title>  Only   a title </title></head>")
+    assert bare["title"] == "Only a title"
+    assert bare["site_name"] == "journal.example.org"
+    assert not has_required_fields(bare)
+
+
+@pytest.mark.parametrize("url", [
+    "http://localhost/admin",
+    "http://127.0.0.1:8000/",
+    "http://10.0.0.5/",
+    "http://192.168.1.1/",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/",
+    "http://printer.local/",
+    "file:///etc/passwd",
+])
+def test_non_public_hosts_are_refused(url):
+    assert not html_metadata.is_public_url(url)
+    assert asyncio.run(html_metadata.extract_html_metadata(url)) is None
+
+
+def test_public_hosts_are_allowed():
+    assert html_metadata.is_public_url("https://doi.org/10.1000/xyz")
+    assert html_metadata.is_public_url("http://93.184.216.34/")
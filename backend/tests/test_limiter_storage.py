@@ -0,0 +1,26 @@
+"""SQLite rate limit storage: one limit shared by every process on the host."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.rate_limit_storage import LIMIT, PROCESSES, STRATEGY_NAMES, allowed_across_processes
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("strategy", STRATEGY_NAMES)
+def test_limit_is_shared_and_atomic_across_processes(tmp_path, strategy):
+    uri = f"sqlite:///{tmp_path / 'ratelimit.db'}"
+    assert allowed_across_processes(uri, strategy, PROCESSES, LIMIT) == LIMIT
+
+
+def test_moving_window_on_sqlite_is_rejected_at_startup(tmp_path):
+    env = dict(os.environ, RATE_LIMIT_STORAGE_URI=f"sqlite:///{tmp_path / 'ratelimit.db'}",
+               RATE_LIMIT_STRATEGY="moving-window")
+    result = subprocess.run([sys.executable, "-c", "import rate_limiter"], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode != 0
+    assert "moving-window is not supported with sqlite://" in result.stderr
@@ -0,0 +1,40 @@
+"""
+Load test for the shared LLM gateway against a mock OpenRouter with fixed
+latency: concurrent paraphrase requests must overlap rather than queue
+behind one another on the event loop.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from modules import paraphraser
+
+CONCURRENCY = 10
+
+
+@pytest.mark.parametrize("latency, rate_limited_calls", [(0.3, ()), (0.3, {4})])
+def test_concurrent_requests_run_in_parallel(openrouter, latency, rate_limited_calls):
+    calls = openrouter(latency=latency, rate_limited_calls=rate_limited_calls)
+    app = FastAPI()
+    app.include_router(paraphraser.router)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post("/api/paraphrase", json={"text": f"Sample text number {i} to paraphrase."})
+                for i in range(CONCURRENCY)
+            ))
+            return time.perf_counter() - started, responses
+
+    elapsed, responses = asyncio.run(run())
+    assert [response.status_code for response in responses] == [200] * CONCURRENCY
+    # Every rate-limited call was retried
+    assert len(calls) == CONCURRENCY + len(rate_limited_calls)
+    # Serialized calls would take CONCURRENCY * latency (3s); overlapping ones about
+    # one latency, two when a call had to be retried
+    assert elapsed < 3 * latency
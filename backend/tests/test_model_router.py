@@ -0,0 +1,57 @@
+"""Routing statistics: slow primaries lose rank, streams record latency."""
+
+import asyncio
+
+import pytest
+
+import llm_gateway
+import model_router
+
+
+@pytest.fixture
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(model_router, "_stats", {})
+    monkeypatch.setattr(model_router, "MIN_HEDGE_DELAY", 0.05)
+    monkeypatch.setattr(model_router, "HEDGING_ENABLED", True)
+
+
+def test_primary_that_turns_slow_is_demoted(monkeypatch, fresh_stats):
+    async def fake_completion(messages, model, **kwargs):
+        await asyncio.sleep(1.0 if model == "a" else 0.01)
+        return model
+
+    monkeypatch.setattr(llm_gateway, "chat_completion", fake_completion)
+    for _ in range(model_router.MIN_SAMPLES):
+        model_router.get_stats("a").record(0.01, True)
+        model_router.get_stats("b").record(0.02, True)
+    assert model_router.rank_models(["a", "b"])[0] == "a"
+
+    async def run():
+        picks = []
+        for _ in range(10):
+            picks.append(model_router.rank_models(["a", "b"])[0])
+            assert await model_router.chat_completion([], ["a", "b"]) == "b"
+        return picks
+
+    picks = asyncio.run(run())
+    # Each lost hedge race is recorded against "a" until "b" is ranked first
+    assert picks[0] == "a" and picks[-1] == "b"
+
+
+def test_stream_records_time_to_first_token(monkeypatch, fresh_stats):
+    async def fake_stream(messages, model, **kwargs):
+        for token in ("one ", "two"):
+            await asyncio.sleep(0.01)
+            yield token
+
+    monkeypatch.setattr(llm_gateway, "stream_chat_completion", fake_stream)
+
+    async def run():
+        return [token async for token in model_router.stream_chat_completion([], ["a"])]
+
+    assert asyncio.run(run()) == ["one ", "two"]
+    stats = model_router.get_stats("a")
+    assert stats.wins == 1 and len(stats.first_token) == 1
+    assert 0.005 < stats.first_token[0] < 0.5
+    # Time to first token must not feed the p50 used for ranking or the hedge p95
+    assert not stats.samples and stats.p50 is None
@@ -0,0 +1,41 @@
+"""SQLite persistence of the paraphrase cache."""
+
+import asyncio
+
+from modules.paraphrase_cache import DOCUMENT_TTL_SECONDS, ParaphraseCache
+
+
+def test_cache_and_documents_share_a_file_but_not_a_table(tmp_path):
+    db_path = str(tmp_path / "paraphrase.db")
+
+    async def scenario():
+        cache = ParaphraseCache(db_path=db_path)
+        documents = ParaphraseCache(ttl_seconds=DOCUMENT_TTL_SECONDS, db_path=db_path, table="paraphrase_documents")
+        await cache.put("key", "cached paraphrase", tokens=12)
+        await documents.put("key", '[["source", "paraphrase"]]')
+
+        # Fresh instances, as after a restart, read back from SQLite
+        cache = ParaphraseCache(db_path=db_path)
+        documents = ParaphraseCache(db_path=db_path, table="paraphrase_documents")
+        assert await cache.get("key") == "cached paraphrase"
+        assert await documents.get("key") == '[["source", "paraphrase"]]'
+        assert cache.stats()["tokens_saved"] == 12
+
+        await documents.delete("key")
+        assert await ParaphraseCache(db_path=db_path).get("key") == "cached paraphrase"
+        assert await ParaphraseCache(db_path=db_path, table="paraphrase_documents").get("key") is None
+
+    asyncio.run(scenario())
+
+
+def test_expired_entry_is_a_miss_and_removed(tmp_path):
+    db_path = str(tmp_path / "paraphrase.db")
+
+    async def scenario():
+        cache = ParaphraseCache(ttl_seconds=-1, db_path=db_path)
+        await cache.put("key", "stale")
+        assert await cache.get("key") is None
+        assert cache.stats()["misses"] == 1
+        assert await ParaphraseCache(db_path=db_path).get("key") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+"""Every paraphrase endpoint, against a mocked OpenRouter."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from modules import paraphraser
+
+
+@pytest.fixture
+def client(openrouter):
+    openrouter()
+    app = FastAPI()
+    app.include_router(paraphraser.router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_paraphrase(client):
+    response = client.post("/api/paraphrase", json={"text": "The results were good."})
+    assert response.status_code == 200, response.text
+    assert "P(The results were good.)" in response.json()["paraphrased_text"]
+
+
+def test_paraphrase_incremental_document(client):
+    text = "First sentence here. Second sentence here."
+    first = client.post("/api/paraphrase", json={"text": text, "document_id": "doc-1"})
+    assert first.status_code == 200, first.text
+    second = client.post("/api/paraphrase", json={"text": text + " Third sentence here.", "document_id": "doc-1"})
+    assert second.status_code == 200, second.text
+    assert "P(Third sentence here.)" in second.json()["paraphrased_text"]
+
+
+def test_paraphrase_stream(client):
+    response = client.post("/api/paraphrase/stream", json={"text": "Streaming works well."})
+    assert response.status_code == 200, response.text
+    assert "event: done" in response.text
+    assert "P(Streaming" in response.text
+
+
+def test_paraphrase_batch(client):
+    response = client.post("/api/paraphrase/batch", json=["The first text.", "Another longer text."])
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [r["paraphrased_text"].strip() for r in results] == ["P(The first text.)", "P(Another longer text.)"]
+
+
+def test_paraphrase_long(client):
+    text = "\n\n".join(f"Paragraph {i} has a sentence in it." for i in range(20))
+    response = client.post("/api/paraphrase/long", json={"text": text})
+    assert response.status_code == 200, response.text
+    assert "P(" in response.json()["paraphrased_text"]
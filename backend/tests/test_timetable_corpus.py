@@ -0,0 +1,23 @@
+"""The solver benchmark corpus: right outcome, well inside the old solver's 20s timeouts."""
+
+import pytest
+
+from benchmarks.timetable_solver import ABLATIONS, CASES, SLOT_MINUTES, count_nodes, solve_case
+
+
+@pytest.mark.parametrize("slot_minutes", SLOT_MINUTES)
+@pytest.mark.parametrize("name", list(CASES))
+def test_corpus_case(name, slot_minutes):
+    expected, _ = CASES[name]
+    elapsed, response = solve_case(name, slot_minutes)
+    assert response.success is expected
+    if not expected:
+        assert response.conflicts or response.unplaced_sessions
+    assert elapsed < 2.0
+
+
+def test_nogoods_cut_search_on_chunked_unsat_case():
+    with_nogoods, outcome = count_nodes("chunked-wed-fragmented", 10, **ABLATIONS["both"])
+    without_nogoods, _ = count_nodes("chunked-wed-fragmented", 10, **ABLATIONS["symmetry only"])
+    assert outcome == "unsat"
+    assert with_nogoods < without_nogoods
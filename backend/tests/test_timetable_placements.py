@@ -0,0 +1,13 @@
+"""ScheduleState must accept exactly the placements the old grid scan did."""
+
+import pytest
+
+from benchmarks.timetable_placements import build_problem, half_filled, random_probes
+
+
+@pytest.mark.parametrize("slots_per_hour", [1, 4])
+def test_bitmask_state_matches_grid_scan(slots_per_hour):
+    problem = build_problem(slots_per_hour)
+    state, grid = half_filled(problem)
+    for session, day, start in random_probes(problem, 5000):
+        assert state.fits(session, day, start) == grid.fits(session, day, start), (session.name, day, start)
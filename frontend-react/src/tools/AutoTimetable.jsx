@@ -45,6 +45,8 @@ export default function AutoTimetable() {
         minBreakDuration: '',
         maxSessionDuration: ''
     })
+    // Soft preferences the current timetable was optimized for
+    const [solvedPreferences, setSolvedPreferences] = useState(null)
     const [fixedEvents, setFixedEvents] = useState([])
     const [fixedEventForm, setFixedEventForm] = useState({
         name: '',
@@ -151,7 +153,7 @@ export default function AutoTimetable() {
         setFixedEvents(prev => prev.filter(e => e.id !== id))
     }
 
-    const generateTimetable = async () => {
+    const generateTimetable = async (fromScratch = false) => {
         if (autoCourses.length === 0) {
             showToast('Please add at least one course', 'error')
             return
@@ -190,7 +192,32 @@ export default function AutoTimetable() {
                 }
             }
 
-            const data = await apiJson('/auto-timetable/generate', payload)
+            // Soft preferences are optimized, not enforced, so a repair that keeps
+            // every session would ignore a changed one: re-solve the week instead
+            const softPreferences = JSON.stringify([
+                preferences.compactSchedule,
+                preferences.preferredDays,
+                preferences.minBreakDuration
+            ])
+            const hasSoftPreferences = preferences.compactSchedule ||
+                preferences.preferredDays.length > 0 || Boolean(preferences.minBreakDuration)
+            const softChanged = solvedPreferences !== null && softPreferences !== solvedPreferences
+            const repairing = courses.length > 0 && !fromScratch && !softChanged
+
+            // Otherwise repair the existing timetable so unaffected sessions stay put
+            const data = repairing
+                ? await apiJson('/auto-timetable/repair', {
+                    ...payload,
+                    optimize: hasSoftPreferences,
+                    previous_timetable: courses.flatMap(c => c.days.map(day => ({
+                        course_name: c.name,
+                        day,
+                        start_time: c.startTime,
+                        end_time: c.endTime,
+                        color: c.color
+                    })))
+                })
+                : await apiJson('/auto-timetable/generate', softChanged ? { ...payload, optimize: hasSoftPreferences } : payload)
 
             if (data.success) {
                 // Convert backend format to frontend format
@@ -206,7 +233,8 @@ export default function AutoTimetable() {
                 }))
 
                 setCourses(newCourses)
-                showToast('Timetable generated successfully!', 'success')
+                setSolvedPreferences(softPreferences)
+                showToast(repairing ? data.message : 'Timetable generated successfully!', 'success')
             } else {
                 showToast(data.message || 'Failed to generate timetable', 'error')
             }
@@ -544,12 +572,22 @@ export default function AutoTimetable() {
 
                 <button
                     className="btn btn-primary"
-                    onClick={generateTimetable}
+                    onClick={() => generateTimetable()}
                     disabled={isGenerating || autoCourses.length === 0}
                     style={{ marginTop: '1rem', width: '100%' }}
                 >
-                    {isGenerating ? 'Generating...' : 'Generate Timetable'}
+                    {isGenerating ? 'Generating...' : courses.length > 0 ? 'Update Timetable' : 'Generate Timetable'}
                 </button>
+                {courses.length > 0 && (
+                    <button
+                        className="btn btn-secondary"
+                        onClick={() => generateTimetable(true)}
+                        disabled={isGenerating || autoCourses.length === 0}
+                        style={{ marginTop: '0.5rem', width: '100%' }}
+                    >
+                        Regenerate from Scratch
+                    </button>
+                )}
             </div>
 
             {/* Conflict Warnings */}